@@ -0,0 +1,131 @@
+"""Deterministic answers to pure arithmetic and date/time questions, without any LLM call.
+
+The parser is strict: the whole message has to be a calculation ("what is 17.5% of 2380",
+"(12 + 4) * 3") or a plain date/time question ("what day is it today"). Anything else, including
+questions with extra context ("what time is it in Tokyo"), returns None and the turn goes through
+the graph as usual.
+"""
+from __future__ import annotations
+
+import ast
+import math
+import re
+import time
+from typing import NamedTuple
+
+from app.agent.tools.calculator import calculator_tool
+from app.agent.tools.datetime_tool import datetime_tool
+
+
+class DirectAnswer(NamedTuple):
+    content: str
+    tool_call: dict  # a ToolCallRecord, as the tool executor would have recorded it
+
+
+_PREFIX = re.compile(r"^(?:what(?:'s| is)|whats|how much is|calculate|compute|evaluate)\s+")
+_NUMBER = r"\d+(?:\.\d+)?"
+_WORDS = [
+    (re.compile(rf"({_NUMBER})\s*%\s*of\s+"), r"\1 / 100 * "),
+    # any other percentage becomes a `percent()` call, so it only counts as an operand, never as the calculation
+    (re.compile(rf"({_NUMBER})\s*%"), r"percent(\1)"),
+    (re.compile(r"(?<=\d),(?=\d{3}\b)"), ""),
+    (re.compile(r"\bto the power of\b|\^"), "**"),
+    (re.compile(r"\bmultiplied by\b|\btimes\b|×|(?<=\d)\s*x\s*(?=[\d(])"), "*"),
+    (re.compile(r"\bdivided by\b|÷"), "/"),
+    (re.compile(r"\bplus\b"), "+"),
+    (re.compile(r"\bminus\b"), "-"),
+]
+_EXPRESSION = re.compile(r"(?:[\d.\s+\-*/()]|percent)+")
+_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)
+_MAX_EXPONENT = 64
+
+_DATETIME = [
+    ("day", re.compile(r"what day (?:of the week )?is (?:it|today)(?: today)?|what(?:'s| is) the day today|which day is (?:it|today)")),
+    ("date", re.compile(r"what(?:'s| is) (?:the date|today's date|the current date|the date today)|what date is (?:it|today)(?: today)?")),
+    ("time", re.compile(r"what time is it(?: now)?|what(?:'s| is) the (?:current )?time(?: now)?")),
+    ("year", re.compile(r"what year is it(?: now)?|what(?:'s| is) the current year")),
+]
+_DATETIME_OUTPUT = re.compile(r"Current UTC date: (?P<date>\S+), time: (?P<time>\S+), day: (?P<day>\w+)")
+
+
+def _strip(message: str) -> str:
+    return re.sub(r"[\s?.!=]+$", "", message.strip().lower())
+
+
+def _floats(node: ast.AST) -> ast.AST | None:
+    """A copy of an arithmetic-only tree with every number a float (numexpr's integers overflow), or None."""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return ast.Constant(float(node.value))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = _floats(node.operand)
+        return operand and ast.UnaryOp(node.op, operand)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "percent" and len(node.args) == 1 and not node.keywords:
+        value = _floats(node.args[0])
+        return value and ast.BinOp(value, ast.Div(), ast.Constant(100.0))
+    if isinstance(node, ast.BinOp) and isinstance(node.op, _OPERATORS):
+        if isinstance(node.op, ast.Pow) and not (isinstance(node.right, ast.Constant) and abs(node.right.value) <= _MAX_EXPONENT):
+            return None
+        left, right = _floats(node.left), _floats(node.right)
+        return left and right and ast.BinOp(left, node.op, right)
+    return None
+
+
+def _format(value: float) -> str:
+    if value.is_integer():
+        return f"{int(value):,}"
+    return f"{value:.10g}"
+
+
+def _calculation(text: str) -> DirectAnswer | None:
+    phrase = _PREFIX.sub("", text)
+    expression = phrase
+    for pattern, replacement in _WORDS:
+        expression = pattern.sub(replacement, expression)
+    if not _EXPRESSION.fullmatch(expression):
+        return None
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError:
+        return None
+    # a lone number or percentage ("what is 42", "what is 50%") is not a calculation
+    if not isinstance(tree.body, ast.BinOp) or (converted := _floats(tree.body)) is None:
+        return None
+
+    start = time.perf_counter()
+    output = calculator_tool.invoke({"expression": ast.unparse(converted)})
+    duration_ms = (time.perf_counter() - start) * 1000
+    try:
+        value = float(output.rsplit(" = ", 1)[1])
+    except (IndexError, ValueError):
+        return None  # the tool could not evaluate it (e.g. division by zero): let the agent explain
+    if not math.isfinite(value):
+        return None
+    tool_call = {"tool_name": "calculator", "input": {"expression": ast.unparse(converted)}, "output_summary": output, "duration_ms": round(duration_ms, 3)}
+    return DirectAnswer(f"{phrase} = {_format(value)}", tool_call)
+
+
+def _datetime(text: str) -> DirectAnswer | None:
+    kind = next((kind for kind, pattern in _DATETIME if pattern.fullmatch(text)), None)
+    if kind is None:
+        return None
+    start = time.perf_counter()
+    output = datetime_tool.invoke({"query": text})
+    duration_ms = (time.perf_counter() - start) * 1000
+    now = _DATETIME_OUTPUT.match(output)
+    if now is None:
+        return None
+    content = {
+        "day": f"Today is {now['day']}, {now['date']} (UTC).",
+        "date": f"Today's date is {now['date']} (UTC).",
+        "time": f"It is {now['time']} UTC.",
+        "year": f"It is {now['date'][:4]}.",
+    }[kind]
+    return DirectAnswer(content, {"tool_name": "datetime", "input": {"query": text}, "output_summary": output, "duration_ms": round(duration_ms, 3)})
+
+
+def direct_answer(message: str) -> DirectAnswer | None:
+    """The answer to `message` if it is certainly a pure calculation or date/time question, else None."""
+    text = _strip(message)
+    if not text or len(text) > 200:
+        return None
+    return _datetime(text) or _calculation(text)
@@ -0,0 +1,206 @@
+"""Deterministic stand-in chat model for benchmarks and offline load tests (model names starting with "fake-")."""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import zlib
+from typing import Any, NamedTuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from app.agent.nodes.quality_gate import GATE_PROMPT
+from app.agent.nodes.router import ROUTER_PROMPT
+
+FAKE_MODEL_PREFIX = "fake-"
+
+
+class LatencyProfile(NamedTuple):
+    ttft_ms: float = 0.0  # median time to first token
+    sigma: float = 0.0  # lognormal spread of the time to first token
+    tokens_per_second: float = 0.0  # 0: the whole reply at once
+    slow_fraction: float = 0.0  # share of calls hit by a slow-provider tail...
+    slow_factor: float = 1.0  # ...which multiplies their time to first token
+    answer_words: int = 120  # length of synthesized answers
+
+    def sample(self, rng: random.Random) -> tuple[float, float]:
+        """(seconds to first token, seconds per token) for one call."""
+        ttft = rng.lognormvariate(math.log(self.ttft_ms), self.sigma) if self.ttft_ms and self.sigma else self.ttft_ms
+        if self.slow_fraction and rng.random() < self.slow_fraction:
+            ttft *= self.slow_factor
+        return ttft / 1000, 1 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+
+LATENCY_PROFILES = {
+    "instant": LatencyProfile(),
+    "fast": LatencyProfile(ttft_ms=50, sigma=0.2, tokens_per_second=400),
+    "realistic": LatencyProfile(ttft_ms=400, sigma=0.4, tokens_per_second=80, slow_fraction=0.02, slow_factor=5),
+    "slow": LatencyProfile(ttft_ms=1500, sigma=0.6, tokens_per_second=30, slow_fraction=0.05, slow_factor=4),
+}
+_SPEC_KEYS = {"ttft": "ttft_ms", "sigma": "sigma", "tps": "tokens_per_second", "slow": "slow_fraction", "slowx": "slow_factor", "words": "answer_words"}
+
+
+def parse_latency(model: str) -> LatencyProfile:
+    """`fake-<profile>`, or a profile tuned inline: `fake-realistic,ttft=200,tps=150` (`fake-ttft=...` starts from instant)."""
+    name, *overrides = model.removeprefix(FAKE_MODEL_PREFIX).split(",")
+    if "=" in name:
+        name, overrides = "instant", [name, *overrides]
+    if name not in LATENCY_PROFILES:
+        raise ValueError(f"Unknown fake latency profile: {name}. Supported: {list(LATENCY_PROFILES)}")
+    fields = {}
+    for item in overrides:
+        key, _, value = item.partition("=")
+        if key not in _SPEC_KEYS:
+            raise ValueError(f"Unknown fake latency setting '{key}'. Supported: {list(_SPEC_KEYS)}")
+        fields[_SPEC_KEYS[key]] = int(value) if key == "words" else float(value)
+    return LATENCY_PROFILES[name]._replace(**fields)
+
+
+_WORDS = (
+    "the fintech market payments lending deal volume growth acquisition startup platform revenue quarter "
+    "banks regulation embedded finance cross-border infrastructure consolidation investors valuation round "
+    "series funding customers merchants adoption margin risk compliance data analysis trend outlook report"
+).split()
+_RESEARCH = re.compile(r"\b(search|latest|news|recent|current|who|compare|thorough|find|look up)\b", re.I)
+_ANALYSIS = re.compile(r"\b(calculate|compute|sum|percent|growth rate|date|time|today|day)\b|\d\s*[-+*/^%]\s*\d", re.I)
+_TOOL = re.compile(r"\b(use (?:a|the) tool|use tools|calculator|web_search)\b", re.I)
+_EXPRESSION = re.compile(r"[\d.]+(?:\s*[-+*/]\s*[\d.(][\d.()\s+*/-]*)+")
+_DATE = re.compile(r"\b(date|time|today|day)\b", re.I)
+# the synthesizer asks for another tool round on "thorough" questions; the gate reads the marker and loops once
+FOLLOW_UP = "More sources would make this answer more complete."
+
+
+def _text(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else json.dumps(message.content)
+
+
+class FakeChatModel(BaseChatModel):
+    """Plays router, tool caller, synthesizer and quality gate with no provider.
+
+    Replies are a function of the prompt (so repeated runs are comparable); latency is drawn from
+    the model's `LatencyProfile` with a seeded generator. Supports `bind_tools` and native async
+    streaming with usage on the last chunk, like the real providers.
+    """
+
+    model_name: str = "fake-instant"
+    latency: LatencyProfile = LatencyProfile()
+    seed: int = 0
+    tool_names: tuple[str, ...] = ()
+    _rng: random.Random = PrivateAttr()
+
+    def __init__(self, **kwargs: Any):
+        kwargs.setdefault("latency", parse_latency(kwargs.get("model_name", "fake-instant")))
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _get_ls_params(self, stop: list[str] | None = None, **kwargs: Any) -> dict:
+        return {"ls_provider": "fake", "ls_model_name": self.model_name, "ls_model_type": "chat"}
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> FakeChatModel:
+        copy = self.model_copy(update={"tool_names": tuple(getattr(t, "name", None) or t["name"] for t in tools)})
+        copy._rng = self._rng  # one latency sequence per model, bound or not
+        return copy
+
+    def _reply(self, messages: list[BaseMessage]) -> AIMessage:
+        system = messages[0].content if messages and isinstance(messages[0], SystemMessage) else None
+        last = _text(messages[-1]) if messages else ""
+        rng = random.Random(self.seed ^ zlib.crc32("\n".join(map(_text, messages)).encode()))
+
+        if system == ROUTER_PROMPT:
+            intent = ("tool_required" if _TOOL.search(last) else "research" if _RESEARCH.search(last)
+                      else "analysis" if _ANALYSIS.search(last) else "general_chat")
+            message = AIMessage(content=json.dumps({"intent": intent}))
+        elif system == GATE_PROMPT:
+            message = AIMessage(content=json.dumps({"sufficient": FOLLOW_UP not in last}))
+        elif self.tool_names and not isinstance(messages[-1], ToolMessage):
+            message = AIMessage(content="", tool_calls=[self._tool_call(last, rng)])
+        else:
+            message = AIMessage(content=self._answer(messages, rng))
+
+        prompt_tokens = sum(len(_text(m)) for m in messages) // 4 + 4 * len(messages) + 60 * len(self.tool_names)
+        completion_tokens = (len(message.content) + sum(len(json.dumps(tc["args"])) for tc in message.tool_calls)) // 4 + 1
+        message.usage_metadata = {"input_tokens": prompt_tokens, "output_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        message.response_metadata = {"model_name": self.model_name, "finish_reason": "tool_calls" if message.tool_calls else "stop"}
+        return message
+
+    def _tool_call(self, text: str, rng: random.Random) -> dict:
+        expression = _EXPRESSION.search(text)
+        if expression and "calculator" in self.tool_names:
+            name, args = "calculator", {"expression": expression.group().strip()}
+        elif _DATE.search(text) and "datetime" in self.tool_names:
+            name, args = "datetime", {"query": text[:120]}
+        elif "web_search" in self.tool_names:
+            # a follow-up round searches from the previous answer rather than the question
+            name, args = "web_search", {"query": text[:120] if FOLLOW_UP not in text else " ".join(text.split()[:8])}
+        else:
+            name, args = self.tool_names[0], {"query": text[:120]}
+        return {"name": name, "args": args, "id": f"call_{rng.getrandbits(64):016x}", "type": "tool_call"}
+
+    def _answer(self, messages: list[BaseMessage], rng: random.Random) -> str:
+        words = [rng.choice(_WORDS) for _ in range(self.latency.answer_words)]
+        for i in range(11, len(words), 12):
+            words[i] += "."
+        sources = [_text(m)[:80] for m in messages if isinstance(m, ToolMessage)]
+        answer = " ".join(words).capitalize()
+        if sources:
+            answer += " Sources: " + "; ".join(sources)
+        asked = " ".join(json.dumps(tc["args"]) for m in messages if isinstance(m, AIMessage) for tc in m.tool_calls)
+        if "thorough" in asked.lower():
+            answer += " " + FOLLOW_UP
+        return answer
+
+    def _timing(self) -> tuple[float, float]:
+        return self.latency.sample(self._rng)
+
+    @staticmethod
+    def _tokens(message: AIMessage) -> list[str]:
+        return re.split(r"(?<=\s)", message.content) if message.content else []
+
+    def _generate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        message = self._reply(messages)
+        ttft, per_token = self._timing()
+        time.sleep(ttft + per_token * len(self._tokens(message)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        message = self._reply(messages)
+        ttft, per_token = self._timing()
+        delay = ttft + per_token * len(self._tokens(message))
+        if delay:
+            await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: Any = None, **kwargs: Any):
+        message = self._reply(messages)
+        ttft, per_token = self._timing()
+        if ttft:
+            await asyncio.sleep(ttft)
+        for i, token in enumerate(self._tokens(message)):
+            if i and per_token:
+                await asyncio.sleep(per_token)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="", response_metadata=message.response_metadata, usage_metadata=message.usage_metadata,
+            tool_call_chunks=[{"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+                              for i, tc in enumerate(message.tool_calls)],
+            chunk_position="last",
+        ))
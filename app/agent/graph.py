@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Any
 
+from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, START, StateGraph
 
@@ -14,6 +15,7 @@ from app.agent.nodes import (
 from app.agent.providers import get_llm
 from app.agent.state import AgentState
 from app.agent.tools import ALL_TOOLS
+from app.services.budgets import over_budget
 
 
 def route_after_router(state: dict) -> str:
@@ -23,8 +25,8 @@ def route_after_router(state: dict) -> str:
     return "synthesizer"
 
 
-def route_after_quality_gate(state: dict) -> str:
-    if state.get("needs_more_info") and state.get("loop_count", 0) < 3:
+def route_after_quality_gate(state: dict, config: RunnableConfig = None) -> str:
+    if state.get("needs_more_info") and state.get("loop_count", 0) < 3 and not over_budget(state, config):
         return "tool_executor"
     return "__end__"
 
@@ -34,10 +36,12 @@ def build_graph(
     temperature: float = 0.7,
     api_key: str | None = None,
     checkpointer: Any = None,
+    answer_cache: Any = None,
 ) -> Any:
     llm = get_llm(model=model, temperature=temperature, api_key=api_key)
     llm_with_tools = llm.bind_tools(ALL_TOOLS)
 
+    # False compiles without one: one-off runs that keep no state
     if checkpointer is None:
         checkpointer = MemorySaver()
 
@@ -46,7 +50,7 @@ def build_graph(
     # add the 4 nodes
     graph.add_node("router", create_router_node(llm))
     graph.add_node("tool_executor", create_tool_executor_node(llm_with_tools, ALL_TOOLS))
-    graph.add_node("synthesizer", create_synthesizer_node(llm))
+    graph.add_node("synthesizer", create_synthesizer_node(llm, answer_cache=answer_cache, model=model))
     graph.add_node("quality_gate", create_quality_gate_node(llm))
 
     # wire them up
@@ -2,8 +2,10 @@ import json
 import logging
 
 from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 
-from app.agent.state import AgentState
+from app.agent.state import AgentState, llm_usage
+from app.services.budgets import over_budget
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +15,7 @@ Respond with ONLY: {"sufficient": true} or {"sufficient": false}"""
 
 
 def create_quality_gate_node(llm):
-    async def quality_gate_node(state: AgentState) -> dict:
+    async def quality_gate_node(state: AgentState, config: RunnableConfig) -> dict:
         loop_count = state.get("loop_count", 0) + 1
 
         # hard limit to prevent infinite loops
@@ -25,18 +27,15 @@ def create_quality_gate_node(llm):
         if state.get("intent") == "general_chat" or not state.get("tool_calls"):
             return {"needs_more_info": False, "loop_count": loop_count}
 
+        # out of budget: keep the answer we have rather than pay for a check that could ask for more
+        if over_budget(state, config):
+            logger.info("Budget used up, skipping quality check")
+            return {"needs_more_info": False, "loop_count": loop_count}
+
         # ask the LLM to evaluate response quality
         messages = [SystemMessage(content=GATE_PROMPT)] + state["messages"][-3:]
         response = await llm.ainvoke(messages)
 
-        usage = state.get("usage", {})
-        if hasattr(response, "usage_metadata") and response.usage_metadata:
-            meta = response.usage_metadata
-            usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + meta.get("input_tokens", 0)
-            usage["completion_tokens"] = usage.get("completion_tokens", 0) + meta.get("output_tokens", 0)
-            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
-            usage["llm_calls"] = usage.get("llm_calls", 0) + 1
-
         try:
             content = response.content.strip()
             if content.startswith("```"):
@@ -47,6 +46,6 @@ def create_quality_gate_node(llm):
             sufficient = True
 
         logger.info(f"Quality gate: sufficient={sufficient}, loop={loop_count}")
-        return {"needs_more_info": not sufficient, "loop_count": loop_count, "usage": usage}
+        return {"needs_more_info": not sufficient, "loop_count": loop_count, "usage": llm_usage(response)}
 
     return quality_gate_node
@@ -2,8 +2,10 @@ import json
 import logging
 
 from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 
-from app.agent.state import AgentState
+from app.agent.state import AgentState, llm_usage
+from app.services.budgets import enforce_budget
 
 logger = logging.getLogger(__name__)
 
@@ -18,8 +20,9 @@ Respond with ONLY a JSON object: {"intent": "category_name"}"""
 
 
 def create_router_node(llm):
-    async def router_node(state: AgentState) -> dict:
+    async def router_node(state: AgentState, config: RunnableConfig) -> dict:
         logger.info("Router node executing")
+        enforce_budget(state, config)
         messages = [
             SystemMessage(content=ROUTER_PROMPT),
             state["messages"][-1],
@@ -27,15 +30,6 @@ def create_router_node(llm):
 
         response = await llm.ainvoke(messages)
 
-        # track token usage
-        usage = state.get("usage", {})
-        if hasattr(response, "usage_metadata") and response.usage_metadata:
-            meta = response.usage_metadata
-            usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + meta.get("input_tokens", 0)
-            usage["completion_tokens"] = usage.get("completion_tokens", 0) + meta.get("output_tokens", 0)
-            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
-            usage["llm_calls"] = usage.get("llm_calls", 0) + 1
-
         # parse the intent from json response
         try:
             content = response.content.strip()
@@ -49,6 +43,6 @@ def create_router_node(llm):
             intent = "general_chat"
 
         logger.info(f"Classified intent: {intent}")
-        return {"intent": intent, "usage": usage}
+        return {"intent": intent, "usage": llm_usage(response)}
 
     return router_node
@@ -1,31 +1,49 @@
 import logging
 
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 
-from app.agent.state import AgentState
+from app.agent.state import AgentState, llm_usage
+from app.services.answer_cache import prompt_version
+from app.services.budgets import enforce_budget
 
 logger = logging.getLogger(__name__)
 
 SYNTH_PROMPT = """You are a helpful AI assistant. Synthesize the conversation and any tool results 
 into a clear, well-structured response. If tools were used, cite the sources naturally. 
 Be concise but thorough."""
+SYNTH_PROMPT_VERSION = prompt_version(SYNTH_PROMPT)
 
 
-def create_synthesizer_node(llm):
-    async def synthesizer_node(state: AgentState) -> dict:
+def _cache_key(state: AgentState, answer_cache, model: str):
+    # only context-free chat: the session's first turn, with no tool output the answer could depend on.
+    # `messages` holds only this turn's input either way, so it can't tell a follow-up apart
+    messages = state["messages"]
+    if state.get("intent") != "general_chat" or not state.get("first_turn") or len(messages) != 1:
+        return None
+    if not isinstance(messages[0], HumanMessage) or not isinstance(messages[0].content, str):
+        return None
+    return answer_cache.key(model, SYNTH_PROMPT_VERSION, messages[0].content)
+
+
+def create_synthesizer_node(llm, answer_cache=None, model: str = ""):
+    async def synthesizer_node(state: AgentState, config: RunnableConfig) -> dict:
+        key = None
+        if answer_cache is not None and config.get("configurable", {}).get("answer_cache"):
+            key = _cache_key(state, answer_cache, model)
+        if key is not None and (cached := answer_cache.get(key)) is not None:
+            logger.info("Synthesizer answered from cache")
+            return {"messages": [AIMessage(content=cached, response_metadata={"answer_cache": "hit"})]}
+
         logger.info("Synthesizer generating response")
+        enforce_budget(state, config)
         messages = [SystemMessage(content=SYNTH_PROMPT)] + state["messages"]
 
         response = await llm.ainvoke(messages)
 
-        usage = state.get("usage", {})
-        if hasattr(response, "usage_metadata") and response.usage_metadata:
-            meta = response.usage_metadata
-            usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + meta.get("input_tokens", 0)
-            usage["completion_tokens"] = usage.get("completion_tokens", 0) + meta.get("output_tokens", 0)
-            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
-            usage["llm_calls"] = usage.get("llm_calls", 0) + 1
+        if key is not None and isinstance(response.content, str) and response.content and not getattr(response, "tool_calls", None):
+            answer_cache.put(key, response.content)
 
-        return {"messages": [response], "usage": usage}
+        return {"messages": [response], "usage": llm_usage(response)}
 
     return synthesizer_node
@@ -2,8 +2,11 @@ import logging
 import time
 
 from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
 
-from app.agent.state import AgentState
+from app.agent.state import AgentState, llm_usage
+from app.services.budgets import enforce_budget
 
 logger = logging.getLogger(__name__)
 
@@ -11,20 +14,15 @@ logger = logging.getLogger(__name__)
 def create_tool_executor_node(llm_with_tools, tools):
     tools_by_name = {t.name: t for t in tools}
 
-    async def tool_executor_node(state: AgentState) -> dict:
+    async def tool_executor_node(state: AgentState, config: RunnableConfig) -> dict:
         logger.info("Tool executor running")
+        enforce_budget(state, config)
+        # tool progress for stream_mode="custom" consumers; a no-op otherwise
+        emit = get_stream_writer()
 
         # ask the LLM which tools to call
         response = await llm_with_tools.ainvoke(state["messages"])
 
-        usage = state.get("usage", {})
-        if hasattr(response, "usage_metadata") and response.usage_metadata:
-            meta = response.usage_metadata
-            usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + meta.get("input_tokens", 0)
-            usage["completion_tokens"] = usage.get("completion_tokens", 0) + meta.get("output_tokens", 0)
-            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
-            usage["llm_calls"] = usage.get("llm_calls", 0) + 1
-
         new_messages = [response]
         tool_calls_record = list(state.get("tool_calls", []))
 
@@ -35,6 +33,7 @@ def create_tool_executor_node(llm_with_tools, tools):
                 tool_input = tc["args"]
 
                 logger.info(f"Calling tool: {tool_name}")
+                emit({"event": "tool_start", "tool_name": tool_name})
                 start = time.time()
 
                 try:
@@ -48,6 +47,7 @@ def create_tool_executor_node(llm_with_tools, tools):
                 duration = (time.time() - start) * 1000
                 summary = output[:200] + "..." if len(output) > 200 else output
 
+                emit({"event": "tool_end", "tool_name": tool_name, "input": tool_input, "output_summary": summary})
                 new_messages.append(
                     ToolMessage(content=output, tool_call_id=tc["id"])
                 )
@@ -61,7 +61,7 @@ def create_tool_executor_node(llm_with_tools, tools):
         return {
             "messages": new_messages,
             "tool_calls": tool_calls_record,
-            "usage": usage,
+            "usage": llm_usage(response),
         }
 
     return tool_executor_node
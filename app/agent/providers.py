@@ -12,6 +12,8 @@ PROVIDER_PREFIXES = {
     "llama-": "groq",
     "mixtral-": "groq",
     "gemma-": "groq",
+    # deterministic stand-in for benchmarks and load tests, see `app.agent.fake_llm`
+    "fake-": "fake",
 }
 
 DEFAULT_MODELS = {
@@ -69,5 +71,9 @@ def get_llm(
             params["groq_api_key"] = api_key
         return ChatGroq(**params)
 
+    elif provider == "fake":
+        from app.agent.fake_llm import FakeChatModel
+        return FakeChatModel(model_name=model, **kwargs)
+
     else:
         raise ValueError(f"Unsupported provider: {provider}")
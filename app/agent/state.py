@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from typing import Any, TypedDict
+from typing import Annotated, Any, TypedDict
 
 from langchain_core.messages import BaseMessage
 from langgraph.graph import add_messages
 
+USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens", "llm_calls")
+
 
 class ToolCallRecord(TypedDict):
     tool_name: str
@@ -20,6 +22,25 @@ class UsageRecord(TypedDict):
     llm_calls: int
 
 
+def empty_usage() -> UsageRecord:
+    return {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "llm_calls": 0}
+
+
+def add_usage(current: UsageRecord | None, update: UsageRecord | None) -> UsageRecord:
+    """Reducer for `usage`: nodes return what their own LLM calls used and it is summed into the turn's total."""
+    current, update = current or {}, update or {}
+    return {field: current.get(field, 0) + update.get(field, 0) for field in USAGE_FIELDS}
+
+
+def llm_usage(response: Any) -> UsageRecord:
+    """One LLM response's token usage, as a `usage` update for the state."""
+    meta = getattr(response, "usage_metadata", None)
+    if not meta:
+        return empty_usage()
+    prompt, completion = meta.get("input_tokens", 0), meta.get("output_tokens", 0)
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion, "llm_calls": 1}
+
+
 class AgentState(TypedDict):
     messages: list[BaseMessage]  # uses add_messages reducer for dedup
     session_id: str
@@ -27,4 +48,6 @@ class AgentState(TypedDict):
     tool_calls: list[ToolCallRecord]
     needs_more_info: bool
     loop_count: int
-    usage: UsageRecord
+    first_turn: bool  # the session had no earlier turns, so nothing outside this turn's input shapes the answer
+    # summed across nodes (and parallel branches); each turn's input resets it with `Overwrite`
+    usage: Annotated[UsageRecord, add_usage]
@@ -1,17 +1,47 @@
 from __future__ import annotations
 
-import os
+import asyncio
+import math
+import random
+import time
 from typing import Any, Optional, Type
 
 from langchain_core.callbacks import CallbackManagerForToolRun, AsyncCallbackManagerForToolRun
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from app.config import get_settings
+
 
 class WebSearchInput(BaseModel):
     query: str = Field(description="Search query string")
 
 
+class LocalSearch:
+    """Offline stand-in for Tavily (`WEB_SEARCH_BACKEND=local`): three canned results shaped like
+    Tavily's, after a simulated round-trip of about `latency_ms`."""
+
+    def __init__(self, latency_ms: float = 0.0, max_results: int = 3):
+        self.latency_ms = latency_ms
+        self.max_results = max_results
+        self._rng = random.Random(0)
+
+    def _delay(self) -> float:
+        return self._rng.lognormvariate(math.log(self.latency_ms), 0.3) / 1000 if self.latency_ms else 0.0
+
+    def _results(self, query: str) -> list[dict]:
+        return [{"url": f"https://example.com/search/{i}", "content": f"Result {i + 1} for '{query}': fintech deal volume rose 12% "
+                 "on the quarter, led by payments infrastructure and embedded finance."} for i in range(self.max_results)]
+
+    def run(self, query: str) -> list[dict]:
+        time.sleep(self._delay())
+        return self._results(query)
+
+    async def arun(self, query: str) -> list[dict]:
+        await asyncio.sleep(self._delay())
+        return self._results(query)
+
+
 class WebSearchTool(BaseTool):
 
     name: str = "web_search"
@@ -20,19 +50,23 @@ class WebSearchTool(BaseTool):
         "company info, news, or anything needing up-to-date knowledge."
     )
     args_schema: Type[BaseModel] = WebSearchInput
-    _tavily_tool: Optional[Any] = None
+    _search: Optional[Any] = None
 
-    def _get_tavily(self):
-        if self._tavily_tool is None:
-            from langchain_community.tools.tavily_search import TavilySearchResults
-            self._tavily_tool = TavilySearchResults(max_results=3)
-        return self._tavily_tool
+    def _get_search(self):
+        if self._search is None:
+            settings = get_settings()
+            if settings.web_search_backend == "local":
+                self._search = LocalSearch(settings.web_search_local_latency_ms)
+            else:
+                from langchain_community.tools.tavily_search import TavilySearchResults
+                self._search = TavilySearchResults(max_results=3)
+        return self._search
 
     def _run(self, query: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
-        return self._get_tavily().run(query)
+        return self._get_search().run(query)
 
     async def _arun(self, query: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None) -> str:
-        return await self._get_tavily().arun(query)
+        return await self._get_search().arun(query)
 
 
 web_search_tool = WebSearchTool()
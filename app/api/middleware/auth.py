@@ -1,28 +1,34 @@
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
+from __future__ import annotations
 
-from app.config import get_settings
+import hashlib
+import hmac
+from functools import lru_cache
+from typing import Any, Iterable
 
-PUBLIC_PATHS = {"/health", "/docs", "/redoc", "/openapi.json", "/"}
+PUBLIC_PATHS = frozenset({"/health", "/docs", "/redoc", "/openapi.json", "/"})
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        settings = get_settings()
+class APIKeys:
+    """Configured API keys, held as SHA-256 digests and checked in constant time."""
 
-        if not settings.api_key_enabled:
-            return await call_next(request)
+    def __init__(self, keys: Iterable[str]):
+        self._digests = tuple(hashlib.sha256(k.encode()).digest() for k in keys)
 
-        if request.url.path in PUBLIC_PATHS:
-            return await call_next(request)
+    def verify(self, key: str | None) -> bool:
+        if not key:
+            return False
+        digest = hashlib.sha256(key.encode()).digest()
+        # compare against every key so timing doesn't reveal which one (or whether any) matched
+        found = False
+        for expected in self._digests:
+            found |= hmac.compare_digest(digest, expected)
+        return found
 
-        api_key = request.headers.get("X-API-Key")
-        if not api_key or api_key not in settings.api_keys_list:
-            request_id = getattr(request.state, "request_id", "unknown")
-            return JSONResponse(
-                status_code=401,
-                content={"error": {"code": "UNAUTHORIZED", "message": "Missing or invalid API key.", "details": {}, "request_id": request_id}},
-            )
+    @staticmethod
+    def from_settings(settings: Any) -> APIKeys:
+        return _api_keys(tuple(settings.api_keys_list))
 
-        return await call_next(request)
+
+@lru_cache(maxsize=8)
+def _api_keys(keys: tuple[str, ...]) -> APIKeys:
+    return APIKeys(keys)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import gzip
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import get_settings
+
+try:  # optional, `pip install .[speedups]`
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# cheapest levels: compression runs on the event loop for every response, and higher levels
+# buy little on history JSON (br 1 → 5.6x at ~1.6 ms for 350 KB; br 5 → 6.2x at ~11 ms)
+_COMPRESSORS = {
+    "br": lambda body: brotli.compress(body, quality=1),
+    "gzip": lambda body: gzip.compress(body, compresslevel=1, mtime=0),
+}
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Codings from an Accept-Encoding header, minus any the client refused with q=0."""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        params = params.strip()
+        try:
+            q = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            q = 1.0
+        if coding.strip() and q > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """Negotiated br/gzip compression for whole JSON responses of at least `min_bytes`.
+
+    Only single-body responses with a `Content-Length` are touched, so event streams (which
+    compress themselves, see `encode_sse`) and small bodies pass straight through. Encodings are
+    tried in the configured order; `br` needs the optional `brotli` package.
+    """
+
+    def __init__(self, app: ASGIApp, settings: Any = None):
+        self.app = app
+        settings = settings or get_settings()
+        self.encodings = [e for e in settings.response_compression_list if e in _COMPRESSORS and (e != "br" or brotli is not None)]
+        self.min_bytes = settings.response_compression_min_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        header = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"accept-encoding"), "")
+        accepted = accepted_encodings(header) if header else set()
+        encoding = next((e for e in self.encodings if e in accepted or "*" in accepted), None)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        held: Message | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal held
+            if message["type"] == "http.response.start":
+                if self._eligible(message["headers"]):
+                    held = message
+                    return
+            elif held is not None and message["type"] == "http.response.body":
+                start, held = held, None
+                if not message.get("more_body"):
+                    body = _COMPRESSORS[encoding](message.get("body", b""))
+                    start["headers"] = [*((k, v) for k, v in start["headers"] if k != b"content-length"),
+                                        (b"content-length", str(len(body)).encode()), (b"content-encoding", encoding.encode()),
+                                        (b"vary", b"Accept-Encoding")]
+                    message = {**message, "body": body}
+                await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    def _eligible(self, headers) -> bool:
+        length = content_type = None
+        for name, value in headers:
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"content-type":
+                content_type = value
+            elif name == b"content-encoding":
+                return False
+        return length is not None and length >= self.min_bytes and content_type is not None and content_type.startswith(b"application/json")
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.middleware.auth import APIKeys
+from app.api.middleware.request_context import send_error
+from app.config import get_settings
+from app.core.exceptions import AppError, AuthenticationError
+
+
+def admin_keys(settings: Any) -> APIKeys:
+    return APIKeys([settings.admin_api_key] if settings.admin_api_key else [])
+
+
+class ProfilingMiddleware:
+    """Profiles one request sent with `X-Profile: 1` and a valid `X-Admin-Key`.
+
+    The event loop is sampled from when the request arrives until its body (streams included)
+    is sent, and the response gets an `X-Profile-Id` to fetch the profile with from
+    `/admin/profiles/{id}`. Only installed when profiling is enabled. Other requests just pay for
+    scanning their headers. The loop is shared, so the profile also shows other requests' work
+    during that time.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: Any, settings: Any = None):
+        self.app = app
+        self.profiler = profiler
+        self.admin_keys = admin_keys(settings or get_settings())
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        wanted = admin_key = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                wanted = value not in (b"", b"0", b"false")
+            elif name == b"x-admin-key":
+                admin_key = value.decode("latin-1")
+        if not wanted:
+            await self.app(scope, receive, send)
+            return
+
+        request_id = scope.get("state", {}).get("request_id", "unknown")
+        try:
+            if not self.admin_keys.verify(admin_key):
+                raise AuthenticationError("Profiling a request needs a valid X-Admin-Key.")
+            sampler = self.profiler.start()
+        except AppError as e:
+            await send_error(request_id, send, e)
+            return
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), (b"x-profile-id", sampler.profile.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            self.profiler.finish(sampler)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from typing import Any
+
+import structlog
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.middleware.auth import PUBLIC_PATHS, APIKeys
+from app.api.responses import render_json
+from app.config import get_settings
+from app.core.exceptions import AppError, AuthenticationError, RateLimitError
+from app.services.metrics import record_rate_limited, record_request_latency
+from app.services.rate_limiter import RateLimitDecision, client_id
+
+logger = logging.getLogger(__name__)
+
+
+class RequestContextMiddleware:
+    """Request ID, API-key auth, rate limiting and access logging as a single pure ASGI layer.
+
+    Settings are read once at startup. The request ID is taken from `X-Request-ID` (or generated),
+    stored in `request.state`, bound to the structlog context and echoed on the response. Latency
+    is logged and recorded when the response starts, so streaming bodies pass through untouched.
+    Non-public requests are checked against `rate_limiter` per client (API key, else IP) and the
+    client is stored as `request.state.client_id` so the turn's token usage can be charged to it
+    (and counted against its budget).
+    """
+
+    def __init__(self, app: ASGIApp, settings: Any = None, rate_limiter: Any = None):
+        self.app = app
+        settings = settings or get_settings()
+        self.auth_enabled = settings.api_key_enabled
+        self.api_keys = APIKeys.from_settings(settings)
+        # /metrics exposes token and cost totals, so it needs a key unless opted out for an unauthenticated scraper
+        self.public_paths = PUBLIC_PATHS | {"/metrics"} if settings.metrics_public else PUBLIC_PATHS
+        self.rate_limiter = rate_limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        request_id = api_key = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+            elif name == b"x-api-key":
+                api_key = value.decode("latin-1")
+        request_id = request_id or f"req_{uuid.uuid4().hex[:12]}"
+        scope.setdefault("state", {})["request_id"] = request_id
+        structlog.contextvars.clear_contextvars()
+        structlog.contextvars.bind_contextvars(request_id=request_id)
+
+        started = False
+        extra_headers = [(b"x-request-id", request_id.encode("latin-1"))]
+
+        async def send_with_context(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                message["headers"] = [*message.get("headers", ()), *extra_headers]
+                self._log(scope, request_id, message["status"], start)
+            await send(message)
+
+        if scope["path"] not in self.public_paths:
+            if self.auth_enabled and not self.api_keys.verify(api_key):
+                await send_error(request_id, send_with_context, AuthenticationError())
+                return
+            # unverified keys are not identities: without auth, clients are told apart by address
+            client = client_id(api_key if self.auth_enabled else None, (scope.get("client") or ("",))[0])
+            scope["state"]["client_id"] = client
+            if self.rate_limiter is not None:
+                decision = await self.rate_limiter.check(client)
+                extra_headers += _rate_limit_headers(decision)
+                if not decision.allowed:
+                    record_rate_limited(scope["path"])
+                    extra_headers.append((b"retry-after", str(decision.retry_after).encode()))
+                    await send_error(request_id, send_with_context, RateLimitError(details={"retry_after": decision.retry_after}))
+                    return
+        try:
+            await self.app(scope, receive, send_with_context)
+        except Exception:
+            if not started:
+                self._log(scope, request_id, 500, start)
+            raise
+
+    @staticmethod
+    def _log(scope: Scope, request_id: str, status_code: int, start: float) -> None:
+        latency_ms = (time.perf_counter() - start) * 1000
+        logger.info("Request completed", extra={
+            "request_id": request_id,
+            "method": scope["method"],
+            "endpoint": scope["path"],
+            "status_code": status_code,
+            "latency_ms": round(latency_ms, 2),
+        })
+        # the route template, not the path: session ids would make a metric series per session
+        route = scope.get("route")
+        record_request_latency(getattr(route, "path", "unmatched"), scope["method"], status_code, latency_ms)
+
+
+def _rate_limit_headers(decision: RateLimitDecision) -> list[tuple[bytes, bytes]]:
+    if decision.limit <= 0:
+        return []
+    return [(b"ratelimit-limit", str(decision.limit).encode()), (b"ratelimit-remaining", str(decision.remaining).encode()),
+            (b"ratelimit-reset", str(decision.reset_seconds).encode())]
+
+
+async def send_error(request_id: str, send: Send, exc: AppError) -> None:
+    body = render_json({"error": {"code": exc.error_code, "message": exc.message, "details": exc.details, "request_id": request_id}})
+    await send({"type": "http.response.start", "status": exc.status_code,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
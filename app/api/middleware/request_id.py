@@ -1,19 +0,0 @@
-import uuid
-
-import structlog
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.requests import Request
-from starlette.responses import Response
-
-
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        request_id = request.headers.get("X-Request-ID", f"req_{uuid.uuid4().hex[:12]}")
-        request.state.request_id = request_id
-
-        structlog.contextvars.clear_contextvars()
-        structlog.contextvars.bind_contextvars(request_id=request_id)
-
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
-        return response
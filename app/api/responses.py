@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:  # optional speedup, `pip install .[speedups]`
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        # same form pydantic writes: UTC as a trailing Z
+        return obj.isoformat().replace("+00:00", "Z")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def render_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for content that is already plain dicts/lists/datetimes, rendered with orjson when available.
+
+    Routes that build their payload straight from stored records return this instead of a
+    response model, skipping model construction and validation. It is not the app's default
+    response class: routes that do return models keep FastAPI's pydantic-core `dump_json` path,
+    which only applies with the default class.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
+
+
+def usage_content(usage: dict) -> dict:
+    """A usage record as `UsageResponse` renders it."""
+    return {"prompt_tokens": usage.get("prompt_tokens", 0), "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0), "llm_calls": usage.get("llm_calls", 0)}
+
+
+def tool_calls_content(tool_calls: list[dict]) -> list[dict]:
+    """Tool-call records as `ToolCallResponse` renders them."""
+    return [{"tool_name": tc["tool_name"], "input": tc["input"], "output_summary": tc["output_summary"]} for tc in tool_calls]
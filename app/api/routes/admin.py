@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from app.api.middleware.profiling import admin_keys
+from app.config import get_settings
+from app.core.exceptions import AuthenticationError, InvalidRequestError, ProfileNotFoundError
+from app.services.profiler import Profile
+
+
+def require_admin(request: Request) -> None:
+    if not admin_keys(get_settings()).verify(request.headers.get("x-admin-key")):
+        raise AuthenticationError("Missing or invalid X-Admin-Key.")
+
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+def _folded(profile: Profile) -> PlainTextResponse:
+    summary = profile.summary()
+    return PlainTextResponse(profile.folded(), headers={
+        "X-Profile-Id": profile.id, "X-Profile-Samples": str(summary["samples"]),
+        "X-Profile-Idle-Fraction": str(summary["idle_fraction"]),
+    })
+
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def profile_window(request: Request, seconds: float = Query(10.0, gt=0), interval_ms: float | None = Query(None, ge=1, le=1000)):
+    """Sample the event loop for `seconds` and return the collapsed stacks (flamegraph.pl / speedscope input)."""
+    profiler = request.app.state.profiler
+    if seconds > profiler.max_seconds:
+        raise InvalidRequestError(f"seconds must be at most {profiler.max_seconds:g}.")
+    sampler = profiler.start(interval_ms / 1000 if interval_ms else None)
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profile = profiler.finish(sampler)
+    return _folded(profile)
+
+
+@router.get("/profiles")
+async def list_profiles(request: Request):
+    return {"profiles": [p.summary() for p in reversed(request.app.state.profiler.recent())]}
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(request: Request, profile_id: str):
+    profile = request.app.state.profiler.get(profile_id)
+    if profile is None:
+        raise ProfileNotFoundError()
+    return _folded(profile)
+
+
+@router.get("/profile/continuous", response_class=PlainTextResponse)
+async def continuous_profile(request: Request, minutes: int | None = Query(None, ge=1)):
+    """The always-on low-rate profile over the last `minutes` (all kept minutes by default)."""
+    profile = request.app.state.profiler.continuous(minutes)
+    if profile is None:
+        raise ProfileNotFoundError("Continuous profiling is off (PROFILING_CONTINUOUS_HZ=0).")
+    return _folded(profile)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from app.api.responses import render_json
+from app.api.schemas.requests import AgentConfig, BatchRequest
+from app.api.schemas.responses import ErrorResponse
+from app.config import get_settings
+from app.core.exceptions import InvalidRequestError
+
+router = APIRouter(prefix="/batch", tags=["Batch"])
+
+
+async def _ndjson(results: AsyncIterator[dict], ids: list[str | None]) -> AsyncIterator[bytes]:
+    ok = failed = 0
+    async with aclosing(results):
+        async for result in results:
+            if result["status"] == "ok":
+                ok += 1
+            else:
+                failed += 1
+            yield render_json({"event": "result", "id": ids[result["index"]], **result}) + b"\n"
+    yield render_json({"event": "done", "items": ok + failed, "succeeded": ok, "failed": failed}) + b"\n"
+
+
+@router.post("/messages", responses={400: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
+async def send_batch(request: Request, body: BatchRequest):
+    """Independent one-turn prompts on ephemeral sessions, streamed back as NDJSON as each completes.
+
+    Each line is a `result` (with the item's `index`, `id` and `status`), in completion order, and
+    the last is `done` with the counts. A failed item gets an `error` result; the batch carries on.
+    """
+    settings = get_settings()
+    if len(body.items) > settings.batch_max_items:
+        raise InvalidRequestError(f"A batch may have at most {settings.batch_max_items} items.")
+    sm = request.app.state.session_manager
+    sm.admission.check_capacity()
+    default = body.agent_config or AgentConfig()
+    items = [(item.content, item.agent_config or default) for item in body.items]
+    concurrency = min(body.concurrency or settings.batch_concurrency, settings.batch_max_concurrency)
+    results = sm.run_batch(items, concurrency, client_id=getattr(request.state, "client_id", None))
+    return StreamingResponse(_ndjson(results, [item.id for item in body.items]), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache"})
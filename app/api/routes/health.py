@@ -1,9 +1,11 @@
 import time
 
 from fastapi import APIRouter, Request
+from fastapi.responses import Response
 
 from app.api.schemas.responses import HealthCheckResponse
 from app.config import get_settings
+from app.services.telemetry import PROMETHEUS_CONTENT_TYPE, render_prometheus
 
 router = APIRouter()
 _start_time = time.time()
@@ -12,9 +14,26 @@ _start_time = time.time()
 @router.get("/health", response_model=HealthCheckResponse, tags=["System"])
 async def health_check(request: Request) -> HealthCheckResponse:
     settings = get_settings()
+    sm = request.app.state.session_manager
+    try:
+        store_ok = await sm.store.ping()
+    except Exception:
+        store_ok = False
     return HealthCheckResponse(
-        status="healthy",
+        status="healthy" if store_ok else "degraded",
         version=settings.app_version,
         uptime_seconds=round(time.time() - _start_time, 2),
-        checks={"llm_provider": "ok", "checkpoint_store": "ok"},
+        checks={"llm_provider": "ok", "checkpoint_store": "ok" if store_ok else "unavailable"},
+        answer_cache=sm.answer_cache.stats(),
+        admission=sm.admission.stats(),
+        jobs=sm.jobs.stats(),
     )
+
+
+@router.get("/metrics", tags=["System"], response_class=Response)
+async def prometheus_metrics(request: Request) -> Response:
+    """All recorded metrics in Prometheus text format."""
+    reader = getattr(request.app.state, "metrics_reader", None)
+    if reader is None or not get_settings().metrics_enabled:
+        return Response(status_code=404)
+    return Response(render_prometheus(reader.snapshot()), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Request
+
+from app.api.responses import FastJSONResponse
+from app.api.schemas.responses import ErrorResponse, JobResponse
+from app.core.exceptions import JobNotFoundError
+from app.services.jobs import public_job
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get("/{job_id}", response_model=JobResponse, responses={404: {"model": ErrorResponse}})
+async def get_job(request: Request, job_id: str):
+    """An async turn's status, and its result or error once it has finished.
+
+    Only the client that submitted the job can see it; to anyone else it doesn't exist.
+    """
+    job = await request.app.state.session_manager.jobs.get(job_id)
+    if job is None or job.get("client_id") != getattr(request.state, "client_id", None):
+        raise JobNotFoundError()
+    return FastJSONResponse(public_job(job))
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import resource
+import sys
+
+from fastapi import APIRouter, Depends, Query, Request
+
+from app.api.routes.admin import require_admin
+from app.core.exceptions import SnapshotNotFoundError
+from app.services.memory_accounting import COMPONENTS
+
+router = APIRouter(prefix="/admin/memory", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+def _peak_rss() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KiB elsewhere
+
+
+def _snapshots(request: Request):
+    snapshots = getattr(request.app.state, "memory_snapshots", None)
+    if snapshots is None:
+        raise SnapshotNotFoundError("Allocation snapshots are off (MEMORY_TRACEMALLOC_ENABLED=false).")
+    return snapshots
+
+
+@router.get("")
+async def memory_report(request: Request, limit: int = Query(20, ge=1, le=1000)):
+    """Approximate bytes held per session by component, the largest sessions first, with totals.
+
+    Estimates are kept as sessions grow, so this costs no more with many sessions; in-flight stream
+    buffers are the exception and are summed now.
+    """
+    sm = request.app.state.session_manager
+    accounts, streams = sm.memory, sm.streams.bytes_by_session()
+    graphs = sum(g["bytes"] for g in accounts.graphs.values())
+    top = []
+    for session_id, account in accounts.top(limit):
+        session = await sm.store.get(session_id)
+        sizes = {**account, "stream_buffers": streams.get(session_id, 0)}
+        top.append({
+            "session_id": session_id, "status": session.status if session else "deleted",
+            "model": session.agent_config.model if session else None, "bytes": sizes, "total_bytes": sum(sizes.values()),
+        })
+    totals = {**{name: accounts.totals[name] for name in COMPONENTS}, "stream_buffers": sum(streams.values()), "graphs": graphs}
+    return {
+        "location": accounts.location, "sessions_tracked": len(accounts), "max_sessions": accounts.max_sessions,
+        "totals": {**totals, "total": sum(totals.values())}, "graphs": accounts.graphs,
+        "peak_rss_bytes": _peak_rss(), "top_sessions": top,
+    }
+
+
+@router.post("/snapshot")
+async def take_snapshot(request: Request):
+    """Start tracing allocations (if not already) and take the baseline later diffs compare against."""
+    return await asyncio.to_thread(_snapshots(request).start)
+
+
+@router.get("/snapshot/diff")
+async def snapshot_diff(request: Request, limit: int = Query(25, ge=1, le=500), group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$")):
+    """What was allocated and is still held since the baseline, largest growth first."""
+    snapshots = _snapshots(request)
+    if snapshots.baseline is None:
+        raise SnapshotNotFoundError()
+    return await asyncio.to_thread(snapshots.diff, limit, group_by)
+
+
+@router.delete("/snapshot", status_code=204)
+async def drop_snapshot(request: Request):
+    """Drop the baseline and stop tracing."""
+    _snapshots(request).stop()
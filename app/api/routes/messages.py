@@ -1,89 +1,108 @@
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
-import time
-import uuid
-from datetime import datetime, timezone
+from typing import Any, Awaitable
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Query, Request
 from fastapi.responses import StreamingResponse
-from langchain_core.messages import HumanMessage
 
+from app.api.responses import FastJSONResponse, tool_calls_content, usage_content
 from app.api.schemas.requests import SendMessageRequest
-from app.api.schemas.responses import ErrorResponse, MessageResponse, ToolCallResponse, UsageResponse
+from app.api.schemas.responses import ErrorResponse, JobResponse, MessageResponse
+from app.config import get_settings
+from app.core.exceptions import ClientDisconnectedError
+from app.services.jobs import public_job
 from app.services.metrics import record_token_usage
+from app.services.streaming import coalesce_tokens, encode_sse, resolve_stream_options
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/sessions", tags=["Messages"])
 
 
-@router.post("/{session_id}/messages", response_model=MessageResponse, responses={404: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
-async def send_message(request: Request, session_id: str, body: SendMessageRequest):
-    sm = request.app.state.session_manager
-    result = await sm.send_message(session_id=session_id, content=body.content, metadata=body.metadata)
+async def _wait_disconnect(request: Request) -> None:
+    # the body is already read, so the next message is the disconnect
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _unless_disconnected(request: Request, work: Awaitable[Any]) -> Any:
+    """Await `work`, cancelling it (and the agent run behind it) if the client goes away first."""
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_wait_disconnect(request))
+    try:
+        await asyncio.wait((task, watcher), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+    if task.done() and not task.cancelled():
+        return task.result()
+    raise ClientDisconnectedError()
+
+
+async def _complete_turn(sm: Any, session_id: str, body: SendMessageRequest, client_id: str | None) -> dict:
+    result = await sm.send_message(session_id=session_id, content=body.content, metadata=body.metadata, supersede=body.supersede,
+                                   durability=body.durability, client_id=client_id)
 
     # track token metrics
     usage = result.get("usage", {})
     if usage.get("total_tokens", 0) > 0:
-        session = sm.get_session(session_id)
+        session = await sm.get_session(session_id)
         record_token_usage(session.agent_config.model, usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
 
-    return MessageResponse(
-        message_id=result["message_id"], session_id=result["session_id"], role=result["role"],
-        content=result["content"], tool_calls=[ToolCallResponse(**tc) for tc in result.get("tool_calls", [])],
-        usage=UsageResponse(**result.get("usage", {})), latency_ms=result["latency_ms"], created_at=result["created_at"],
-    )
+    return {
+        "message_id": result["message_id"], "session_id": result["session_id"], "role": result["role"],
+        "content": result["content"], "tool_calls": tool_calls_content(result.get("tool_calls", [])),
+        "usage": usage_content(usage), "latency_ms": result["latency_ms"], "created_at": result["created_at"],
+    }
+
 
+@router.post("/{session_id}/messages", response_model=MessageResponse, responses={202: {"model": JobResponse}, 402: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 409: {"model": ErrorResponse}, 429: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
+async def send_message(request: Request, session_id: str, body: SendMessageRequest, run_async: bool = Query(False, alias="async")):
+    """Run one turn and return the answer; with `?async=true`, queue it as a job and answer 202 with its id.
 
-@router.post("/{session_id}/messages/stream", responses={404: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
+    Jobs are polled at `GET /jobs/{job_id}`, and POSTed to `callback_url` when they finish if one is given.
+    """
+    sm = request.app.state.session_manager
+    client_id = getattr(request.state, "client_id", None)
+    if not run_async:
+        return FastJSONResponse(await _unless_disconnected(request, _complete_turn(sm, session_id, body, client_id)))
+
+    # refuse what would fail straight away with its own status, not as a failed job
+    session = await sm.get_session(session_id)
+    await sm.check_budget(session, client_id)
+    job = await sm.jobs.submit(session_id, lambda: _complete_turn(sm, session_id, body, client_id), callback_url=body.callback_url,
+                               client_id=client_id)
+    return FastJSONResponse(public_job(job), status_code=202, headers={"Location": f"/jobs/{job['job_id']}"})
+
+
+@router.post("/{session_id}/messages/stream", responses={402: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 429: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
 async def send_message_stream(request: Request, session_id: str, body: SendMessageRequest):
-    """SSE streaming endpoint — tokens sent in real-time as the agent generates them."""
+    """SSE streaming endpoint — tokens sent in real-time as the agent generates them.
+
+    Every frame carries an `id:`; re-POSTing with a `Last-Event-ID` header resumes the turn instead of starting a new one.
+    """
     sm = request.app.state.session_manager
-    session = sm._get_active_session(session_id)
-    graph = sm._get_or_build_graph(session.agent_config)
-
-    async def event_stream():
-        start = time.time()
-        msg_id = f"msg_{uuid.uuid4().hex[:8]}"
-        full_content = ""
-        all_tool_calls = []
-
-        session.history.append({"message_id": f"msg_{uuid.uuid4().hex[:8]}", "role": "user", "content": body.content, "created_at": datetime.now(timezone.utc)})
-
-        yield f"data: {json.dumps({'event': 'start', 'message_id': msg_id})}\n\n"
-
-        try:
-            async for event in graph.astream_events(
-                {"messages": [HumanMessage(content=body.content)], "session_id": session_id, "intent": "general_chat",
-                 "tool_calls": [], "needs_more_info": False, "loop_count": 0,
-                 "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "llm_calls": 0}},
-                config={"configurable": {"thread_id": session_id}}, version="v2",
-            ):
-                kind = event.get("event", "")
-
-                if kind == "on_chat_model_stream":
-                    chunk = event.get("data", {}).get("chunk")
-                    if chunk and hasattr(chunk, "content") and chunk.content:
-                        full_content += chunk.content
-                        yield f"data: {json.dumps({'event': 'token', 'content': chunk.content})}\n\n"
-
-                elif kind == "on_tool_start":
-                    yield f"data: {json.dumps({'event': 'tool_start', 'tool_name': event.get('name', 'unknown')})}\n\n"
-
-                elif kind == "on_tool_end":
-                    output = str(event.get("data", {}).get("output", ""))
-                    summary = output[:200] + "..." if len(output) > 200 else output
-                    all_tool_calls.append({"tool_name": event.get("name", "unknown"), "input": {}, "output_summary": summary})
-                    yield f"data: {json.dumps({'event': 'tool_end', 'tool_name': event.get('name', ''), 'output_summary': summary})}\n\n"
-
-        except Exception as e:
-            logger.error(f"Streaming error: {e}", exc_info=True)
-            yield f"data: {json.dumps({'event': 'error', 'message': str(e)})}\n\n"
-            return
-
-        latency_ms = (time.time() - start) * 1000
-        session.history.append({"message_id": msg_id, "role": "assistant", "content": full_content, "created_at": datetime.now(timezone.utc), "tool_calls": all_tool_calls, "usage": {}})
-        yield f"data: {json.dumps({'event': 'done', 'message_id': msg_id, 'latency_ms': round(latency_ms, 2)})}\n\n"
-
-    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "Connection": "keep-alive"})
+    session = await sm.get_session(session_id)
+    client = getattr(request.state, "client_id", None)
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        # reconnect: replay what the client missed, then follow the turn if it is still running
+        payloads = await sm.resume_stream(session_id, last_event_id)
+    else:
+        sm.turns.check_capacity(session_id, supersede=body.supersede)
+        sm.admission.check_capacity()
+        # refuse up front with a 402 rather than in an error frame once the stream is open
+        await sm.check_budget(session, client)
+        payloads = sm.open_stream(session_id, body.content, supersede=body.supersede, durability=body.durability,
+                                  client_id=client).subscribe()
+
+    window_ms, max_bytes, compress = resolve_stream_options(body.stream, get_settings())
+    compress = compress and "gzip" in request.headers.get("accept-encoding", "")
+
+    headers = {"Cache-Control": "no-cache", "Connection": "keep-alive"}
+    if compress:
+        headers.update({"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    frames = encode_sse(coalesce_tokens(payloads, window_ms, max_bytes), compress=compress)
+    return StreamingResponse(frames, media_type="text/event-stream", headers=headers)
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Request
+
+from app.api.schemas.responses import ErrorResponse, SpendResponse
+
+router = APIRouter(tags=["Usage"])
+
+
+@router.get("/sessions/{session_id}/usage", response_model=SpendResponse, responses={404: {"model": ErrorResponse}})
+async def session_usage(request: Request, session_id: str):
+    """Tokens and estimated cost the session has spent so far, against its budget."""
+    sm = request.app.state.session_manager
+    await sm.get_session(session_id)
+    return await sm.ledger.spend("session", session_id)
+
+
+@router.get("/usage", response_model=SpendResponse)
+async def client_usage(request: Request):
+    """The caller's own spend (per API key, or address without auth) in the current budget window."""
+    return await request.app.state.session_manager.ledger.spend("client", request.state.client_id)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from app.api.middleware.auth import APIKeys
+from app.api.schemas.requests import WSSendMessage
+from app.config import get_settings
+from app.core.exceptions import AppError, InvalidRequestError, RateLimitError
+from app.services.metrics import record_rate_limited, record_websocket_connection
+from app.services.rate_limiter import client_id
+from app.services.streaming import coalesce_tokens, dumps, resolve_stream_options
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["WebSocket"])
+
+# browsers can't set headers on a WebSocket handshake, so they offer the key as a subprotocol
+# `cyndx.api-key.<key>` next to `cyndx`, which the server selects; query strings end up in access logs
+WS_SUBPROTOCOL = "cyndx"
+WS_KEY_PROTOCOL_PREFIX = "cyndx.api-key."
+
+
+def _handshake_auth(websocket: WebSocket) -> tuple[str | None, str | None]:
+    """The API key and the subprotocol to accept for a handshake."""
+    offered = [p.strip() for p in websocket.headers.get("sec-websocket-protocol", "").split(",") if p.strip()]
+    api_key = websocket.headers.get("x-api-key")
+    if api_key is None:
+        api_key = next((p[len(WS_KEY_PROTOCOL_PREFIX):] for p in offered if p.startswith(WS_KEY_PROTOCOL_PREFIX)), None)
+    return api_key, WS_SUBPROTOCOL if WS_SUBPROTOCOL in offered else None
+
+
+class _Connection:
+    """One client socket carrying concurrent turns for any number of sessions.
+
+    Every outgoing payload is tagged with the client's message `id` and `session_id`. Payloads
+    go through a bounded outbox drained by a single sender, so a client that reads slowly
+    stalls its own turns (and their graph streams) instead of growing server memory; one that
+    stops reading for `ws_send_timeout_seconds` is disconnected. Each turn counts as one request
+    against the client's rate limit.
+    """
+
+    def __init__(self, websocket: WebSocket, session_manager, settings, rate_limiter=None, client: str | None = None):
+        self.ws = websocket
+        self.sm = session_manager
+        self.settings = settings
+        self.rate_limiter = rate_limiter
+        self.client = client
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=settings.ws_send_queue_size)
+        self.turns: dict[str, asyncio.Task] = {}
+        self.closing = False
+
+    async def send(self, payload: dict) -> None:
+        try:
+            self.outbox.put_nowait(payload)
+        except asyncio.QueueFull:
+            await asyncio.wait_for(self.outbox.put(payload), self.settings.ws_send_timeout_seconds)
+
+    async def _sender(self) -> None:
+        while True:
+            payload = await self.outbox.get()
+            await self.ws.send_text(dumps(payload).decode())
+
+    async def _run_turn(self, msg: WSSendMessage) -> None:
+        tag = {"id": msg.id, "session_id": msg.session_id}
+        try:
+            if self.rate_limiter is not None:
+                decision = await self.rate_limiter.check(self.client)
+                if not decision.allowed:
+                    record_rate_limited("/ws")
+                    await self.send({**tag, "event": "error", "code": RateLimitError.error_code, "message": RateLimitError.message,
+                                     "retry_after": decision.retry_after})
+                    return
+            await self.sm.get_session(msg.session_id)
+            self.sm.turns.check_capacity(msg.session_id, supersede=msg.supersede)
+            self.sm.admission.check_capacity()
+            window_ms, max_bytes, _ = resolve_stream_options(msg.stream, self.settings)
+            payloads = self.sm.stream_message(msg.session_id, msg.content, supersede=msg.supersede, durability=msg.durability,
+                                              client_id=self.client)
+            async for payload in coalesce_tokens(payloads, window_ms, max_bytes):
+                await self.send({**tag, **payload})
+        except AppError as e:
+            await self.send({**tag, "event": "error", "code": e.error_code, "message": e.message})
+        except asyncio.TimeoutError:
+            logger.warning("WebSocket client stopped reading; closing")
+            await self.ws.close(code=1008, reason="Client is not reading.")
+        except Exception as e:
+            logger.error(f"WebSocket turn {msg.id} failed: {e}", exc_info=True)
+            await self.send({**tag, "event": "error", "code": AppError.error_code, "message": AppError.message})
+        except asyncio.CancelledError:
+            if not self.closing:
+                self._notify({**tag, "event": "cancelled"})
+            raise
+        finally:
+            self.turns.pop(msg.id, None)
+
+    def _handle(self, raw: str) -> None:
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            data = None
+        if not isinstance(data, dict):
+            self._notify({"event": "error", "code": "INVALID_REQUEST", "message": "Messages must be JSON objects."})
+            return
+
+        kind = data.get("type")
+        try:
+            if kind == "send":
+                msg = WSSendMessage.model_validate(data)
+                if msg.id in self.turns:
+                    raise InvalidRequestError(f"Message id '{msg.id}' is already in flight.")
+                if len(self.turns) >= self.settings.ws_max_turns_per_connection:
+                    raise RateLimitError(f"At most {self.settings.ws_max_turns_per_connection} turns may run per connection.")
+                self.turns[msg.id] = asyncio.create_task(self._run_turn(msg))
+            elif kind == "cancel":
+                task = self.turns.get(str(data.get("id")))
+                if task is not None:
+                    task.cancel()
+            elif kind == "ping":
+                self._notify({"event": "pong"})
+            else:
+                raise InvalidRequestError("Message type must be one of: send, cancel, ping.")
+        except ValidationError as e:
+            err = e.errors()[0]
+            field = ".".join(str(p) for p in err["loc"])
+            self._notify({"id": data.get("id"), "event": "error", "code": "INVALID_REQUEST", "message": f"{field}: {err['msg']}"})
+        except AppError as e:
+            self._notify({"id": data.get("id"), "event": "error", "code": e.error_code, "message": e.message})
+
+    def _notify(self, payload: dict) -> None:
+        # control replies are dropped rather than awaited when the outbox is full; the client is already behind
+        try:
+            self.outbox.put_nowait(payload)
+        except asyncio.QueueFull:
+            pass
+
+    async def serve(self) -> None:
+        sender = asyncio.create_task(self._sender())
+        try:
+            async for raw in self.ws.iter_text():
+                self._handle(raw)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.closing = True
+            for task in list(self.turns.values()):
+                task.cancel()
+            await asyncio.gather(*self.turns.values(), return_exceptions=True)
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+
+
+@router.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    """Multiplexed streaming: many sessions and concurrent turns over one authenticated socket."""
+    settings = get_settings()
+    api_key, subprotocol = _handshake_auth(websocket)
+    if settings.api_key_enabled and not APIKeys.from_settings(settings).verify(api_key):
+        await websocket.close(code=1008, reason="Missing or invalid API key.")
+        return
+
+    await websocket.accept(subprotocol=subprotocol)
+    record_websocket_connection(1)
+    try:
+        client = client_id(api_key if settings.api_key_enabled else None, websocket.client.host if websocket.client else None)
+        rate_limiter = getattr(websocket.app.state, "rate_limiter", None)
+        await _Connection(websocket, websocket.app.state.session_manager, settings, rate_limiter, client).serve()
+    finally:
+        record_websocket_connection(-1)
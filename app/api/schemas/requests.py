@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -17,12 +17,58 @@ class AgentConfig(BaseModel):
         description="Optional: bring your own LLM API key for this session. If omitted, uses server default.",
         examples=["sk-...", "sk-ant-...", "gsk_..."],
     )
+    answer_cache: bool = Field(
+        default=False,
+        description="Serve and share answers to context-free general_chat messages (e.g. greetings, FAQs) across sessions.",
+    )
+    direct_answers: bool = Field(
+        default=False,
+        description="Answer pure arithmetic and date/time questions with the calculator or datetime tool directly, without LLM calls.",
+    )
 
 
 class CreateSessionRequest(BaseModel):
     agent_config: Optional[AgentConfig] = None
 
 
+class StreamOptions(BaseModel):
+    coalesce_ms: Optional[float] = Field(default=None, ge=0, le=1000, description="Merge tokens arriving within this window into one frame; 0 sends every chunk.")
+    coalesce_bytes: Optional[int] = Field(default=None, ge=0, le=65536, description="Flush a merged token frame once it reaches this size; 0 disables the limit.")
+    compress: Optional[bool] = Field(default=None, description="gzip the event stream (flushed per frame) when the client accepts it.")
+
+
 class SendMessageRequest(BaseModel):
     content: str = Field(..., min_length=1, max_length=32000)
     metadata: Optional[dict[str, Any]] = None
+    supersede: Optional[bool] = Field(
+        default=None,
+        description="Cancel the session's in-flight turn in favour of this message. Defaults to the server setting.",
+    )
+    durability: Optional[Literal["sync", "async", "exit", "deferred"]] = Field(
+        default=None,
+        description="When this turn's checkpoints are persisted. Defaults to the server setting.",
+    )
+    stream: Optional[StreamOptions] = Field(default=None, description="Frame coalescing and compression for the streaming endpoint. Defaults to the server settings.")
+    callback_url: Optional[str] = Field(default=None, max_length=2048, description="With ?async=true, POST the finished job here (allowed hosts only).")
+
+
+class WSSendMessage(BaseModel):
+    type: Literal["send"] = "send"
+    id: str = Field(..., min_length=1, max_length=64, description="Client-chosen id echoed on every event of this turn.")
+    session_id: str
+    content: str = Field(..., min_length=1, max_length=32000)
+    supersede: Optional[bool] = None
+    durability: Optional[Literal["sync", "async", "exit", "deferred"]] = None
+    stream: Optional[StreamOptions] = None
+
+
+class BatchItem(BaseModel):
+    id: Optional[str] = Field(default=None, max_length=128, description="Client-chosen id echoed on this item's result.")
+    content: str = Field(..., min_length=1, max_length=32000)
+    agent_config: Optional[AgentConfig] = Field(default=None, description="This item's config, instead of the batch's.")
+
+
+class BatchRequest(BaseModel):
+    items: list[BatchItem] = Field(..., min_length=1)
+    agent_config: Optional[AgentConfig] = Field(default=None, description="Config for items without their own.")
+    concurrency: Optional[int] = Field(default=None, ge=1, description="Items running at once. Defaults to, and is capped by, the server settings.")
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -9,6 +9,8 @@ from pydantic import BaseModel, Field
 class AgentConfigResponse(BaseModel):
     model: str
     temperature: float
+    answer_cache: bool = False
+    direct_answers: bool = False
 
 
 class ToolCallResponse(BaseModel):
@@ -24,6 +26,25 @@ class UsageResponse(BaseModel):
     llm_calls: int = 0
 
 
+class BudgetResponse(BaseModel):
+    tokens: Optional[int] = None  # None: no budget
+    cost_usd: Optional[float] = None
+
+
+class SpendResponse(BaseModel):
+    scope: str  # "session" or "client"
+    id: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    llm_calls: int = 0
+    turns: int = 0
+    cost_usd: float = 0.0  # estimated from the model price table
+    budget: BudgetResponse
+    remaining: BudgetResponse
+    resets_in_seconds: Optional[int] = None  # client ledgers only
+
+
 class SessionResponse(BaseModel):
     session_id: str
     created_at: datetime
@@ -42,6 +63,24 @@ class MessageResponse(BaseModel):
     created_at: datetime
 
 
+class JobError(BaseModel):
+    code: str
+    message: str
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    session_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[MessageResponse] = None
+    error: Optional[JobError] = None
+    callback_url: Optional[str] = None
+    callback: Optional[Literal["pending", "delivered", "rejected", "failed"]] = None
+
+
 class HistoryMessageResponse(BaseModel):
     message_id: str
     role: str
@@ -49,6 +88,7 @@ class HistoryMessageResponse(BaseModel):
     created_at: datetime
     tool_calls: Optional[list[ToolCallResponse]] = None
     usage: Optional[UsageResponse] = None
+    status: Optional[str] = None  # "abandoned" when the client went away mid-turn
 
 
 class HistoryResponse(BaseModel):
@@ -68,6 +108,9 @@ class HealthCheckResponse(BaseModel):
     version: str
     uptime_seconds: float
     checks: dict[str, str]
+    answer_cache: Optional[dict[str, float]] = None
+    admission: Optional[dict[str, int]] = None
+    jobs: Optional[dict[str, int]] = None
 
 
 class ErrorDetail(BaseModel):
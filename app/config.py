@@ -20,6 +20,10 @@ class Settings(BaseSettings):
     app_version: str = "1.0.0"
     debug: bool = False
     log_level: str = "INFO"
+    # records are rendered and written on a background thread; beyond this many queued they are dropped (and counted)
+    log_queue_size: int = 10_000
+    # keep only a fraction of INFO/DEBUG records per logger prefix, e.g. "app.agent=0.1,app.api=0.5"; warnings always kept
+    log_sample_rates: str = ""
 
     # server
     host: str = "0.0.0.0"
@@ -28,6 +32,8 @@ class Settings(BaseSettings):
     # llm defaults
     default_model: str = "llama-3.1-8b-instant"
     default_temperature: float = 0.7
+    # allow "fake-*" models (app.agent.fake_llm: no provider, simulated latency) for benchmarks and load tests
+    fake_llm_enabled: bool = False
 
     # provider keys (need at least one)
     openai_api_key: Optional[str] = None
@@ -37,20 +43,121 @@ class Settings(BaseSettings):
 
     # tools
     tavily_api_key: Optional[str] = None
+    # "local" answers web searches with canned results after a simulated round-trip (offline load tests)
+    web_search_backend: str = "tavily"
+    web_search_local_latency_ms: float = 300.0
 
-    # rate limiting
+    # rate limiting, per API key (or client IP without one)
     rate_limit_enabled: bool = True
-    rate_limit_requests: int = 60
-    rate_limit_window: str = "1 minute"
+    rate_limit_requests: int = 60  # per minute; 0 disables
+    rate_limit_tokens: int = 200_000  # LLM tokens per minute, charged from each turn's usage; 0 disables
+    # "memory" is per-worker; "redis" shares the limits across workers via REDIS_URL
+    rate_limit_backend: str = "memory"
+
+    # token and cost budgets per session and per client (API key, or address without one), 0 = unlimited; checked
+    # before every LLM call. client budgets reset every window (0 = never). usage is accounted either way (GET /usage)
+    budget_session_tokens: int = 0
+    budget_session_cost_usd: float = 0.0
+    budget_client_tokens: int = 0
+    budget_client_cost_usd: float = 0.0
+    budget_client_window_seconds: int = 86400
+    # USD per 1M input/output tokens by model prefix, on top of the built-in table, e.g. "gpt-4o-mini=0.15/0.6"
+    model_prices: str = ""
+
+    # session + checkpoint store ("memory" is per-process; "redis" is shared by all workers)
+    session_store_backend: str = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    redis_key_prefix: str = "cyndx:"
+    session_ttl_seconds: int = 86400
+    session_cache_ttl_seconds: float = 2.0
+
+    # checkpoint serialization ("default" is LangGraph's JsonPlusSerializer)
+    checkpoint_serde: str = "default"
+    checkpoint_compression: str = "zstd"
+    checkpoint_compression_threshold: int = 1024
+    # when a turn's checkpoints are written: sync | async | exit | deferred (see README)
+    checkpoint_durability: str = "async"
+
+    # cross-session answer cache for context-free general_chat turns (sessions opt in)
+    answer_cache_max_entries: int = 1024
+    answer_cache_ttl_seconds: float = 3600.0
+
+    # sse streaming: token frames merged per window/size (0/0 = one frame per chunk)
+    stream_coalesce_ms: float = 20.0
+    stream_coalesce_bytes: int = 1024
+    stream_compression: bool = False
+    # resumable sse: per-turn ring buffer replayed on reconnect with Last-Event-ID
+    stream_resume_max_frames: int = 512
+    stream_resume_max_bytes: int = 16 * 1024 * 1024
+    stream_resume_ttl_seconds: float = 60.0
+    stream_resume_grace_seconds: float = 15.0
+
+    # json responses: negotiated encodings in preference order ("" disables; br needs `brotli`) and the size threshold
+    response_compression: str = "br,gzip"
+    response_compression_min_bytes: int = 1024
+
+    # websocket endpoint
+    ws_max_turns_per_connection: int = 16
+    ws_send_queue_size: int = 256
+    ws_send_timeout_seconds: float = 30.0
+
+    # per-session turn queue
+    turn_queue_max_depth: int = 4
+    turn_queue_supersede: bool = False
+    # with the shared store: a session's turn lease across workers, and how long a turn waits for it (409 after)
+    turn_lease_seconds: float = 60.0
+    turn_lease_wait_seconds: float = 30.0
+
+    # admission control: turns running at once per worker (0 disables), and how many may wait and for how long
+    admission_max_concurrent_turns: int = 32
+    admission_max_queue: int = 64
+    admission_queue_timeout_seconds: float = 10.0
+
+    # batch endpoint (POST /batch/messages): items per request, and items running at once by default and at most
+    batch_max_items: int = 1000
+    batch_concurrency: int = 4
+    batch_max_concurrency: int = 16
+
+    # async jobs (POST /sessions/{id}/messages?async=true): job workers per process, jobs allowed to wait, how long
+    # records are kept after their last change, and the hosts webhook callbacks may go to (comma-separated)
+    job_workers: int = 4
+    job_max_queue: int = 100
+    job_result_ttl_seconds: int = 3600
+    job_callback_hosts: str = "localhost,127.0.0.1"
+    job_callback_timeout_seconds: float = 10.0
 
     # auth
     api_key_enabled: bool = False
     api_keys: str = ""
 
-    # otel
+    # metrics: prometheus text on /metrics (pulled), and/or pushed over OTLP/HTTP to a collector
+    metrics_enabled: bool = True
+    metrics_public: bool = False  # serve /metrics without an API key (and outside rate limits)
     otel_enabled: bool = False
     otel_service_name: str = "cyndx-langgraph-api"
-    otel_exporter_endpoint: Optional[str] = None
+    otel_exporter_endpoint: Optional[str] = None  # e.g. http://localhost:4318 (the /v1/metrics path is added)
+    otel_export_interval_seconds: float = 60.0
+    # per-node, per-LLM-call (incl. time to first token) and per-tool latency histograms from graph callbacks
+    agent_metrics_enabled: bool = True
+
+    # approximate memory per session (GET /admin/memory), kept for the most recently active sessions.
+    # tracemalloc snapshot diffs (/admin/memory/snapshot) are off by default; tracing slows every allocation
+    memory_accounting_max_sessions: int = 100_000
+    memory_tracemalloc_enabled: bool = False
+    memory_tracemalloc_frames: int = 10
+
+    # profiling of the event loop on demand (X-Profile header, /admin/profile*), behind X-Admin-Key;
+    # when disabled nothing is installed. continuous_hz > 0 also keeps an always-on low-rate profile
+    profiling_enabled: bool = False
+    admin_api_key: Optional[str] = None
+    profiling_interval_ms: float = 5.0
+    profiling_max_seconds: float = 60.0
+    profiling_continuous_hz: float = 0.0
+    profiling_continuous_minutes: int = 10
+
+    @property
+    def response_compression_list(self) -> list[str]:
+        return [e.strip() for e in self.response_compression.split(",") if e.strip()]
 
     @property
     def api_keys_list(self) -> list[str]:
@@ -46,3 +46,74 @@ class AuthenticationError(AppError):
     status_code = 401
     error_code = "UNAUTHORIZED"
     message = "Missing or invalid API key."
+
+
+class BudgetExceededError(AppError):
+    status_code = 402
+    error_code = "BUDGET_EXCEEDED"
+    message = "The token or cost budget for this session or API key is used up."
+
+
+class TurnQueueFullError(RateLimitError):
+    error_code = "TURN_QUEUE_FULL"
+    message = "Too many messages are already queued for this session."
+
+
+class SessionBusyError(AppError):
+    status_code = 409
+    error_code = "SESSION_BUSY"
+    message = "Another worker is still running a turn of this session. Retry when it finishes."
+
+
+class TurnSupersededError(AppError):
+    status_code = 409
+    error_code = "TURN_SUPERSEDED"
+    message = "A newer message for this session superseded this one."
+
+
+class SessionConflictError(AppError):
+    status_code = 409
+    error_code = "SESSION_CONFLICT"
+    message = "The session was modified concurrently. Please retry."
+
+
+class StreamNotFoundError(AppError):
+    status_code = 404
+    error_code = "STREAM_NOT_FOUND"
+    message = "The stream to resume no longer exists."
+
+
+class OverloadedError(AppError):
+    status_code = 503
+    error_code = "OVERLOADED"
+    message = "The service is at capacity. Please retry later."
+
+
+class ClientDisconnectedError(AppError):
+    status_code = 499
+    error_code = "CLIENT_DISCONNECTED"
+    message = "The client disconnected before the response was ready."
+
+
+class ProfilerBusyError(AppError):
+    status_code = 409
+    error_code = "PROFILER_BUSY"
+    message = "The maximum number of profiles is already running. Retry when one finishes."
+
+
+class ProfileNotFoundError(AppError):
+    status_code = 404
+    error_code = "PROFILE_NOT_FOUND"
+    message = "No profile with the given ID (only the most recent ones are kept)."
+
+
+class JobNotFoundError(AppError):
+    status_code = 404
+    error_code = "JOB_NOT_FOUND"
+    message = "No job with the given ID (finished jobs are kept for a limited time)."
+
+
+class SnapshotNotFoundError(AppError):
+    status_code = 404
+    error_code = "SNAPSHOT_NOT_FOUND"
+    message = "No allocation baseline; POST /admin/memory/snapshot first."
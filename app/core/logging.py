@@ -1,12 +1,107 @@
 from __future__ import annotations
 
+import atexit
 import logging
+import queue
+import random
 import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import IO
 
 import structlog
 
+_listener: QueueListener | None = None
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    """`"app.agent=0.1,app.api=0.5"` → {logger prefix: fraction of INFO/DEBUG records kept}."""
+    rates = {}
+    for part in spec.split(","):
+        name, _, rate = part.partition("=")
+        if name.strip():
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class LogSampler(logging.Filter):
+    """Keeps a fraction of INFO and DEBUG records per logger prefix; warnings and errors always pass."""
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            # the most specific configured prefix wins
+            matches = [p for p in self.rates if name == p or name.startswith(p + ".")]
+            rate = self._resolved[name] = self.rates[max(matches, key=len)] if matches else 1.0
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the background listener without rendering them and without ever blocking.
+
+    Only the cheap parts happen on the caller's thread: the message is resolved and the structlog
+    context (request id) is captured, since both belong to the caller. When the queue is full the
+    record is dropped and counted.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if not isinstance(record.msg, dict):  # structlog loggers hand over an already-processed event dict
+            record.msg = record.getMessage()
+            record.args = None
+        record.structlog_context = structlog.contextvars.get_contextvars()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            from app.services.metrics import record_log_dropped
+
+            record_log_dropped()
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # wait for room rather than fail: everything queued before shutdown gets written
+        self.queue.put(self._sentinel, timeout=10)
+
+
+def _record_context(logger, method_name, event_dict: dict) -> dict:
+    # stdlib records are rendered on the listener thread: use what was captured when they were logged
+    record = event_dict.get("_record")
+    if record is not None:
+        # ExtraAdder (which runs first, so explicit extras win) copied it like any other attribute
+        event_dict.pop("structlog_context", None)
+        for key, value in getattr(record, "structlog_context", {}).items():
+            event_dict.setdefault(key, value)
+        event_dict["timestamp"] = datetime.fromtimestamp(record.created, timezone.utc).isoformat()
+    return event_dict
+
+
+def setup_logging(log_level: str = "INFO", json_format: bool = True, queue_size: int = 10_000, sample_rates: str = "",
+                  stream: IO[str] | None = None) -> None:
+    """Route all logging through a bounded queue to a listener thread that renders and writes it.
+
+    Call `shutdown_logging` (done by the app lifespan and at exit) to flush what is still queued.
+    """
+    shutdown_logging()
 
-def setup_logging(log_level: str = "INFO", json_format: bool = True) -> None:
     shared_processors: list = [
         structlog.contextvars.merge_contextvars,
         structlog.stdlib.filter_by_level,
@@ -26,18 +121,61 @@ def setup_logging(log_level: str = "INFO", json_format: bool = True) -> None:
         cache_logger_on_first_use=True,
     )
 
+    foreign_pre_chain: list = [
+        structlog.stdlib.ExtraAdder(),
+        _record_context,
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+    ]
+    if json_format:
+        foreign_pre_chain.append(structlog.processors.format_exc_info)
     formatter = structlog.stdlib.ProcessorFormatter(
+        foreign_pre_chain=foreign_pre_chain,
         processors=[structlog.stdlib.ProcessorFormatter.remove_processors_meta, renderer],
     )
 
-    handler = logging.StreamHandler(sys.stdout)
+    handler = logging.StreamHandler(stream or sys.stdout)
     handler.setFormatter(formatter)
 
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    if sample_rates:
+        queue_handler.addFilter(LogSampler(parse_sample_rates(sample_rates)))
+
+    global _listener
+    _listener = _Listener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
     root = logging.getLogger()
     root.handlers.clear()
-    root.addHandler(handler)
+    root.addHandler(queue_handler)
     root.setLevel(getattr(logging, log_level.upper(), logging.INFO))
 
     # quiet down noisy libs
     for lib in ("httpcore", "httpx", "urllib3"):
         logging.getLogger(lib).setLevel(logging.WARNING)
+
+
+def shutdown_logging() -> None:
+    """Stop the listener thread after it has written every queued record.
+
+    Anything logged afterwards (interpreter teardown, a test run outliving the app) is written
+    synchronously by the same handler instead of piling up in a queue nobody reads.
+    """
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if isinstance(h, NonBlockingQueueHandler) and h.queue is listener.queue]:
+        root.removeHandler(handler)
+    try:
+        listener.stop()
+    except queue.Full:
+        pass
+    for handler in listener.handlers:
+        handler.flush()
+        root.addHandler(handler)
+
+
+atexit.register(shutdown_logging)
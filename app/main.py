@@ -5,19 +5,20 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-
-from app.api.middleware.auth import AuthMiddleware
-from app.api.middleware.logging import LoggingMiddleware
-from app.api.middleware.rate_limiter import limiter
-from app.api.middleware.request_id import RequestIDMiddleware
-from app.api.routes import health, messages, sessions
+
+from app.api.middleware.compression import CompressionMiddleware
+from app.api.middleware.profiling import ProfilingMiddleware
+from app.api.middleware.request_context import RequestContextMiddleware
+from app.api.responses import FastJSONResponse
+from app.api.routes import admin, batch, health, jobs, memory, messages, sessions, usage, ws
 from app.config import get_settings
 from app.core.exceptions import AppError
-from app.core.logging import setup_logging
+from app.core.logging import setup_logging, shutdown_logging
+from app.services.memory_accounting import AllocationSnapshots
+from app.services.profiler import ProfilerService
+from app.services.rate_limiter import create_rate_limiter
 from app.services.session_manager import SessionManager
+from app.services.telemetry import create_otlp_pusher, setup_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -25,11 +26,27 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     settings = get_settings()
-    setup_logging(log_level=settings.log_level, json_format=not settings.debug)
-    app.state.session_manager = SessionManager()
+    setup_logging(log_level=settings.log_level, json_format=not settings.debug, queue_size=settings.log_queue_size,
+                  sample_rates=settings.log_sample_rates)
+    app.state.metrics_reader = setup_metrics(settings)
+    pusher = create_otlp_pusher(settings, app.state.metrics_reader)
+    if pusher is not None:
+        pusher.start()
+    app.state.session_manager = SessionManager(rate_limiter=app.state.rate_limiter)
+    profiler = getattr(app.state, "profiler", None)
+    if profiler is not None:
+        profiler.start_continuous()
     logger.info(f"{settings.app_name} v{settings.app_version} starting up")
     yield
     logger.info("Shutting down")
+    if profiler is not None:
+        profiler.close()
+    await app.state.session_manager.close()
+    if app.state.rate_limiter is not None:
+        await app.state.rate_limiter.close()
+    if pusher is not None:
+        await pusher.close()
+    shutdown_logging()
 
 
 def create_app() -> FastAPI:
@@ -42,41 +59,61 @@ def create_app() -> FastAPI:
         lifespan=lifespan,
     )
 
-    # middleware stack (outermost first)
-    app.add_middleware(LoggingMiddleware)
-    app.add_middleware(AuthMiddleware)
-    app.add_middleware(RequestIDMiddleware)
+    # negotiated br/gzip for large json bodies (inside the request context layer)
+    app.add_middleware(CompressionMiddleware, settings=settings)
+
+    # on-demand profiling: nothing is installed unless enabled
+    if settings.profiling_enabled:
+        if not settings.admin_api_key:
+            logger.warning("PROFILING_ENABLED is set without ADMIN_API_KEY; every profiling request will be refused")
+        app.state.profiler = ProfilerService(
+            interval_ms=settings.profiling_interval_ms, max_seconds=settings.profiling_max_seconds,
+            continuous_hz=settings.profiling_continuous_hz, continuous_minutes=settings.profiling_continuous_minutes,
+        )
+        app.add_middleware(ProfilingMiddleware, profiler=app.state.profiler, settings=settings)
+
+    # allocation snapshot diffs for memory investigations (tracing only starts with a baseline)
+    if settings.memory_tracemalloc_enabled:
+        app.state.memory_snapshots = AllocationSnapshots(frames=settings.memory_tracemalloc_frames)
 
-    # rate limiting
-    app.state.limiter = limiter
-    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+    # request id, auth, rate limiting and access logging in one pure ASGI layer
+    app.state.rate_limiter = create_rate_limiter(settings)
+    app.add_middleware(RequestContextMiddleware, settings=settings, rate_limiter=app.state.rate_limiter)
 
     # routes
     app.include_router(health.router)
     app.include_router(sessions.router)
     app.include_router(messages.router)
+    app.include_router(usage.router)
+    app.include_router(batch.router)
+    app.include_router(jobs.router)
+    app.include_router(ws.router)
+    app.include_router(memory.router)
+    if settings.profiling_enabled:
+        app.include_router(admin.router)
 
     # error handlers
     @app.exception_handler(AppError)
-    async def app_error_handler(request: Request, exc: AppError) -> JSONResponse:
+    async def app_error_handler(request: Request, exc: AppError) -> FastJSONResponse:
         request_id = getattr(request.state, "request_id", "unknown")
-        return JSONResponse(status_code=exc.status_code, content={
+        headers = {"Retry-After": str(exc.details["retry_after"])} if "retry_after" in exc.details else None
+        return FastJSONResponse(status_code=exc.status_code, headers=headers, content={
             "error": {"code": exc.error_code, "message": exc.message, "details": exc.details, "request_id": request_id}
         })
 
     @app.exception_handler(RequestValidationError)
-    async def validation_error_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
+    async def validation_error_handler(request: Request, exc: RequestValidationError) -> FastJSONResponse:
         request_id = getattr(request.state, "request_id", "unknown")
         details = {".".join(str(loc) for loc in e["loc"]): e["msg"] for e in exc.errors()}
-        return JSONResponse(status_code=422, content={
+        return FastJSONResponse(status_code=422, content={
             "error": {"code": "VALIDATION_ERROR", "message": "Request validation failed.", "details": details, "request_id": request_id}
         })
 
     @app.exception_handler(Exception)
-    async def generic_error_handler(request: Request, exc: Exception) -> JSONResponse:
+    async def generic_error_handler(request: Request, exc: Exception) -> FastJSONResponse:
         request_id = getattr(request.state, "request_id", "unknown")
         logger.error(f"Unhandled exception: {exc}", exc_info=True)
-        return JSONResponse(status_code=500, content={
+        return FastJSONResponse(status_code=500, content={
             "error": {"code": "INTERNAL_ERROR", "message": "An unexpected error occurred.", "details": {}, "request_id": request_id}
         })
 
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from app.core.exceptions import OverloadedError
+from app.services.metrics import record_admission_queue, record_admission_wait, record_turn_shed
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionController:
+    """Caps how many turns run at once on this worker; the rest wait in a bounded FIFO queue.
+
+    A turn that finds `max_queue` others already waiting is shed at once, and one that waits
+    longer than `queue_timeout` is shed when its deadline passes, both with `503 OVERLOADED`
+    and a `retry_after` estimated from recent turn durations. Only agent turns are admitted
+    here; health, session and history requests never queue behind them.
+    """
+
+    def __init__(self, max_concurrent: int = 32, max_queue: int = 64, queue_timeout: float = 10.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        # running average of how long an admitted turn holds its slot
+        self._turn_seconds = 5.0
+
+    @property
+    def depth(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        # the time for everyone already queued (and this client) to get a slot, at the current pace
+        return max(1, min(60, math.ceil(self._turn_seconds * (len(self._waiters) + 1) / max(1, self.max_concurrent))))
+
+    def check_capacity(self) -> None:
+        if self.max_concurrent and self.active >= self.max_concurrent and len(self._waiters) >= self.max_queue:
+            self._shed("queue_full")
+
+    def _shed(self, reason: str) -> None:
+        record_turn_shed(reason)
+        retry_after = self.retry_after()
+        logger.warning(f"Shedding turn ({reason}): {self.active} running, {len(self._waiters)} queued")
+        raise OverloadedError(details={"retry_after": retry_after, "reason": reason})
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if not self.max_concurrent:
+            yield
+            return
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+        else:
+            self.check_capacity()
+            await self._wait()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._turn_seconds = 0.9 * self._turn_seconds + 0.1 * (time.monotonic() - start)
+            self._release()
+
+    async def _wait(self) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        record_admission_queue(1)
+        start = time.monotonic()
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await waiter
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over just as this turn gave up; pass it on
+                self._release()
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, TimeoutError):
+                self._shed("deadline")
+            raise
+        finally:
+            record_admission_queue(-1)
+            record_admission_wait((time.monotonic() - start) * 1000)
+
+    def _release(self) -> None:
+        # hand the slot straight to the oldest live waiter so nobody can jump the queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict[str, int]:
+        return {"running": self.active, "queued": len(self._waiters), "max_concurrent": self.max_concurrent, "max_queue": self.max_queue}
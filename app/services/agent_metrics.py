@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.services.metrics import (
+    record_error,
+    record_llm_call,
+    record_node_duration,
+    record_tool_call,
+)
+
+# runs whose end never arrives (a callback error upstream) must not accumulate forever
+_MAX_OPEN_RUNS = 10_000
+
+
+def _status(error: BaseException) -> str:
+    return "cancelled" if isinstance(error, asyncio.CancelledError) else "error"
+
+
+def _count_error(error: BaseException, source: str) -> None:
+    # an LLM or tool error also fails the node (and graph) it ran in: count it once, where it was raised
+    if not getattr(error, "_agent_metrics_counted", False):
+        try:
+            error._agent_metrics_counted = True
+        except AttributeError:
+            pass
+        record_error(type(error).__name__, source)
+
+
+class _LLMRun:
+    __slots__ = ("provider", "model", "node", "started", "first_token")
+
+    def __init__(self, provider: str, model: str, node: str, started: float):
+        self.provider, self.model, self.node, self.started = provider, model, node, started
+        self.first_token: float | None = None
+
+
+class AgentMetricsHandler(BaseCallbackHandler):
+    """Latency metrics for graph nodes, LLM calls (with time to first token and tokens/s) and tools, plus errors by type.
+
+    One instance serves every turn of the worker: the only state is start times keyed by run
+    id. It runs inline on the event loop (`run_inline`) instead of in the default executor, so
+    each event costs a dict operation and, at the end of a run, a histogram record.
+    """
+
+    run_inline = True
+    ignore_retriever = True
+    ignore_custom_event = True
+
+    def __init__(self):
+        self._nodes: dict[UUID, tuple[str, float]] = {}
+        self._llm: dict[UUID, _LLMRun] = {}
+        self._tools: dict[UUID, tuple[str, float]] = {}
+
+    @staticmethod
+    def _open(runs: dict, run_id: UUID, value: Any) -> None:
+        if len(runs) >= _MAX_OPEN_RUNS:
+            runs.clear()
+        runs[run_id] = value
+
+    # ── graph nodes: the chain run LangGraph starts for each node is named after it ──
+
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, metadata: dict | None = None, name: str | None = None, **kwargs: Any) -> None:
+        node = metadata.get("langgraph_node") if metadata else None
+        if node is not None and name == node:
+            self._open(self._nodes, run_id, (node, time.perf_counter()))
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._nodes.pop(run_id, None)
+        if run is not None:
+            record_node_duration(run[0], "ok", (time.perf_counter() - run[1]) * 1000)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._nodes.pop(run_id, None)
+        if run is not None:
+            status = _status(error)
+            record_node_duration(run[0], status, (time.perf_counter() - run[1]) * 1000)
+            if status == "error":
+                _count_error(error, f"node:{run[0]}")
+
+    # ── LLM calls ──
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata: dict | None = None,
+                            invocation_params: dict | None = None, **kwargs: Any) -> None:
+        metadata, params = metadata or {}, invocation_params or {}
+        model = metadata.get("ls_model_name") or params.get("model") or params.get("model_name") or "unknown"
+        self._open(self._llm, run_id, _LLMRun(metadata.get("ls_provider", "unknown"), model, metadata.get("langgraph_node", ""), time.perf_counter()))
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._llm.get(run_id)
+        if run is not None and run.first_token is None:
+            run.first_token = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._llm.pop(run_id, None)
+        if run is None:
+            return
+        now = time.perf_counter()
+        ttft_ms = (run.first_token - run.started) * 1000 if run.first_token is not None else None
+        output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    output_tokens += usage.get("output_tokens", 0)
+        # generation rate: from the first token when streamed, so prompt processing isn't counted
+        generating = now - (run.first_token or run.started)
+        tokens_per_second = output_tokens / generating if output_tokens and generating > 0 else None
+        record_llm_call(run.provider, run.model, run.node, "ok", (now - run.started) * 1000, ttft_ms, tokens_per_second)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._llm.pop(run_id, None)
+        if run is not None:
+            status = _status(error)
+            record_llm_call(run.provider, run.model, run.node, status, (time.perf_counter() - run.started) * 1000)
+            if status == "error":
+                _count_error(error, f"llm:{run.provider}")
+
+    # ── tools ──
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._open(self._tools, run_id, ((serialized or {}).get("name") or kwargs.get("name") or "unknown", time.perf_counter()))
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._tools.pop(run_id, None)
+        if run is not None:
+            record_tool_call(run[0], "ok", (time.perf_counter() - run[1]) * 1000)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._tools.pop(run_id, None)
+        if run is not None:
+            status = _status(error)
+            record_tool_call(run[0], status, (time.perf_counter() - run[1]) * 1000)
+            if status == "error":
+                _count_error(error, f"tool:{run[0]}")
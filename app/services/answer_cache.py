@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import time
+from collections import OrderedDict
+
+from app.services.metrics import record_answer_cache_lookup
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WS.sub(" ", text).strip().casefold()
+
+
+def prompt_version(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode()).hexdigest()[:12]
+
+
+class AnswerCache:
+    """Process-wide LRU of synthesizer answers for context-free `general_chat` messages.
+
+    Entries are keyed on (model, system prompt version, normalized message text) and expire
+    after `ttl_seconds`. Only sessions that opt in read or fill it (see the synthesizer node).
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str, str], tuple[float, str]] = OrderedDict()
+
+    @staticmethod
+    def key(model: str, prompt_version: str, text: str) -> tuple[str, str, str]:
+        return model, prompt_version, normalize_text(text)
+
+    def get(self, key: tuple[str, str, str]) -> str | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            record_answer_cache_lookup(hit=False)
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        record_answer_cache_lookup(hit=True)
+        return entry[1]
+
+    def put(self, key: tuple[str, str, str], answer: str) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, answer)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict[str, float]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "hit_rate": round(self.hit_rate, 4)}
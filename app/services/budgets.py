@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import Any
+
+from app.agent.state import USAGE_FIELDS
+from app.core.exceptions import BudgetExceededError
+from app.services.kv_backend import KVBackend
+from app.services.metrics import record_budget_exceeded, record_llm_cost
+
+# USD per 1M input / output tokens, by model-name prefix (the longest matching prefix wins)
+DEFAULT_PRICES: dict[str, tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "claude-3-5-haiku": (0.80, 4.00),
+    "claude-3-5-sonnet": (3.00, 15.00),
+    "claude-3-7-sonnet": (3.00, 15.00),
+    "claude-sonnet-4": (3.00, 15.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b": (0.59, 0.79),
+    "mixtral-8x7b": (0.24, 0.24),
+    "gemma2-9b": (0.20, 0.20),
+}
+
+
+def parse_prices(spec: str) -> dict[str, tuple[float, float]]:
+    """`"gpt-4o-mini=0.15/0.6,claude-3-5-haiku=0.8/4"` -> {prefix: (input, output)} in USD per 1M tokens."""
+    prices = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        prefix, _, pair = item.partition("=")
+        prompt, _, completion = pair.partition("/")
+        try:
+            prices[prefix.strip()] = (float(prompt), float(completion or prompt))
+        except ValueError:
+            raise ValueError(f"Invalid model price '{item}', expected model=input/output (USD per 1M tokens)")
+    return prices
+
+
+class PriceTable:
+    """Model prices for cost accounting; models matching no prefix are counted at zero cost."""
+
+    def __init__(self, overrides: str = ""):
+        self.prices = {**DEFAULT_PRICES, **parse_prices(overrides)}
+        self._by_model: dict[str, tuple[float, float]] = {}
+
+    def price(self, model: str) -> tuple[float, float]:
+        price = self._by_model.get(model)
+        if price is None:
+            matches = [prefix for prefix in self.prices if model.startswith(prefix)]
+            price = self._by_model[model] = self.prices[max(matches, key=len)] if matches else (0.0, 0.0)
+        return price
+
+    def micro_usd(self, model: str, usage: dict) -> int:
+        # USD per 1M tokens times tokens is micro-dollars, which the ledgers keep as integers
+        prompt, completion = self.price(model)
+        return round(usage.get("prompt_tokens", 0) * prompt + usage.get("completion_tokens", 0) * completion)
+
+
+class Budget:
+    """What one turn may still spend: each budgeted scope's remaining tokens and micro-dollars.
+
+    Passed to the graph in the run config and checked against the turn's running `usage`
+    before every LLM call (see `enforce_budget`).
+    """
+
+    __slots__ = ("limits", "price")
+
+    def __init__(self, limits: list[tuple[str, float, float]], price: tuple[float, float]):
+        self.limits = limits  # (scope, tokens left, micro-USD left), inf where that scope has no such budget
+        self.price = price
+
+    def exceeded(self, usage: dict | None) -> str | None:
+        usage = usage or {}
+        tokens = usage.get("total_tokens", 0)
+        cost = usage.get("prompt_tokens", 0) * self.price[0] + usage.get("completion_tokens", 0) * self.price[1]
+        for scope, tokens_left, cost_left in self.limits:
+            if tokens >= tokens_left or cost >= cost_left:
+                return scope
+        return None
+
+
+def over_budget(state: dict, config: Any) -> str | None:
+    """The scope whose budget this turn has used up, if any."""
+    budget = (config or {}).get("configurable", {}).get("budget")
+    return budget.exceeded(state.get("usage")) if budget is not None else None
+
+
+def enforce_budget(state: dict, config: Any) -> None:
+    """Stop the turn before its next LLM call once a budget is used up."""
+    scope = over_budget(state, config)
+    if scope is not None:
+        record_budget_exceeded(scope, "graph")
+        raise BudgetExceededError(f"The {scope} budget was used up during this turn.", details={"scope": scope, "usage": dict(state.get("usage") or {})})
+
+
+class UsageLedger:
+    """Cumulative token usage and estimated cost per session and per client, kept in a `KVBackend`.
+
+    Every field is an atomic hash increment (cost in micro-dollars), so workers sharing Redis
+    share the ledgers and concurrent turns never lose an update. Client ledgers (API key, or
+    address without one) are fixed windows of `client_window_seconds` (0: never reset); session
+    ledgers expire with the session. Budgets of 0 are unlimited, and with none set turns are
+    only accounted, not checked.
+    """
+
+    def __init__(self, backend: KVBackend, prices: PriceTable, *, session_tokens: int = 0, session_cost_usd: float = 0.0,
+                 client_tokens: int = 0, client_cost_usd: float = 0.0, client_window_seconds: int = 86400,
+                 session_ttl_seconds: int | None = None, key_prefix: str = "cyndx:"):
+        self.backend = backend
+        self.prices = prices
+        self.limits = {
+            "session": (session_tokens or math.inf, session_cost_usd * 1e6 or math.inf),
+            "client": (client_tokens or math.inf, client_cost_usd * 1e6 or math.inf),
+        }
+        self.client_window_seconds = client_window_seconds
+        self.session_ttl_seconds = session_ttl_seconds
+        self.key_prefix = key_prefix
+
+    @property
+    def enforcing(self) -> bool:
+        return any(limit != math.inf for limits in self.limits.values() for limit in limits)
+
+    def _key(self, scope: str, ident: str) -> tuple[str, int | None]:
+        """The ledger's key and how long it should live."""
+        if scope == "session":
+            return f"{self.key_prefix}usage:session:{ident}", self.session_ttl_seconds
+        window = int(time.time() // self.client_window_seconds) if self.client_window_seconds else 0
+        return f"{self.key_prefix}usage:client:{ident}:{window}", self.client_window_seconds * 2 or None
+
+    def _scopes(self, session_id: str | None, client_id: str | None) -> list[tuple[str, str]]:
+        return ([("session", session_id)] if session_id else []) + ([("client", client_id)] if client_id else [])
+
+    async def record(self, session_id: str | None, client_id: str | None, model: str, usage: dict) -> None:
+        micro_usd = self.prices.micro_usd(model, usage)
+        amounts = {**{field: usage.get(field, 0) for field in USAGE_FIELDS}, "turns": 1, "cost_micro_usd": micro_usd}
+        for scope, ident in self._scopes(session_id, client_id):
+            key, ttl = self._key(scope, ident)
+            for field, amount in amounts.items():
+                if amount:
+                    await self.backend.hincrby(key, field, amount)
+            if ttl:
+                await self.backend.expire(key, ttl)
+        record_llm_cost(model, micro_usd / 1e6)
+
+    async def _spent(self, scope: str, ident: str) -> tuple[int, int]:
+        tokens, cost = await self.backend.hmget(self._key(scope, ident)[0], ["total_tokens", "cost_micro_usd"])
+        return int(tokens or 0), int(cost or 0)
+
+    async def budget(self, session_id: str, client_id: str | None, model: str) -> Budget | None:
+        """What the next turn may spend; raises `BudgetExceededError` when a budget is already used up."""
+        if not self.enforcing:
+            return None
+        limits = []
+        for scope, ident in self._scopes(session_id, client_id):
+            max_tokens, max_cost = self.limits[scope]
+            if max_tokens == max_cost == math.inf:
+                continue
+            tokens, cost = await self._spent(scope, ident)
+            if tokens >= max_tokens or cost >= max_cost:
+                record_budget_exceeded(scope, "admission")
+                raise BudgetExceededError(f"The {scope} budget is used up.", details={"scope": scope})
+            limits.append((scope, max_tokens - tokens, max_cost - cost))
+        return Budget(limits, self.prices.price(model))
+
+    async def spend(self, scope: str, ident: str) -> dict:
+        """The ledger of one session or client, with its budget and what is left of it."""
+        key, _ = self._key(scope, ident)
+        fields = await self.backend.hgetall(key)
+        counters = {field: int(fields.get(field, 0)) for field in (*USAGE_FIELDS, "turns")}
+        cost = int(fields.get("cost_micro_usd", 0))
+        max_tokens, max_cost = self.limits[scope]
+        result = {
+            "scope": scope, "id": ident, **counters, "cost_usd": round(cost / 1e6, 6),
+            "budget": {"tokens": None if max_tokens == math.inf else int(max_tokens),
+                       "cost_usd": None if max_cost == math.inf else round(max_cost / 1e6, 6)},
+            "remaining": {"tokens": None if max_tokens == math.inf else max(0, int(max_tokens) - counters["total_tokens"]),
+                          "cost_usd": None if max_cost == math.inf else round(max(0, max_cost - cost) / 1e6, 6)},
+        }
+        if scope == "client" and self.client_window_seconds:
+            result["resets_in_seconds"] = self.client_window_seconds - int(time.time() % self.client_window_seconds)
+        return result
+
+
+def create_usage_ledger(settings: Any, backend: KVBackend) -> UsageLedger:
+    return UsageLedger(
+        backend, PriceTable(settings.model_prices),
+        session_tokens=settings.budget_session_tokens, session_cost_usd=settings.budget_session_cost_usd,
+        client_tokens=settings.budget_client_tokens, client_cost_usd=settings.budget_client_cost_usd,
+        client_window_seconds=settings.budget_client_window_seconds,
+        session_ttl_seconds=settings.session_ttl_seconds or None, key_prefix=settings.redis_key_prefix,
+    )
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from typing import Any
+
+import msgpack
+from langchain_core import messages as lc_messages
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.agent.nodes.quality_gate import GATE_PROMPT
+from app.agent.nodes.router import ROUTER_PROMPT
+from app.agent.nodes.synthesizer import SYNTH_PROMPT
+
+# ext type codes inside a compact payload
+_EXT_STATIC = 1  # index into STATIC_STRINGS
+_EXT_REF = 2  # back-reference to a string seen earlier in the same payload
+_EXT_OBJECT = 3  # first element of a [marker, fields] list that rebuilds an object
+_EXT_FALLBACK = 4  # value the default serializer had to handle
+
+_MESSAGE_TYPES = [
+    lc_messages.AIMessage, lc_messages.AIMessageChunk, lc_messages.HumanMessage, lc_messages.HumanMessageChunk,
+    lc_messages.SystemMessage, lc_messages.ToolMessage, lc_messages.ToolMessageChunk, lc_messages.ChatMessage,
+    lc_messages.FunctionMessage, lc_messages.RemoveMessage,
+]
+# object kinds: message classes by position, then tuple
+_OBJECT_KINDS: list[Any] = [*_MESSAGE_TYPES, tuple]
+
+# Strings that recur in nearly every checkpoint: state keys, node and tool names, message fields,
+# provider metadata keys and the system prompts. Append-only — the index is part of the format.
+STATIC_STRINGS: list[str] = [
+    # checkpoint + metadata
+    "v", "id", "ts", "channel_versions", "versions_seen", "updated_channels", "source", "step", "parents",
+    "input", "loop", "update", "__start__", "__end__", "__input__", "__interrupt__", "__error__",
+    "branch:to:router", "branch:to:tool_executor", "branch:to:synthesizer", "branch:to:quality_gate",
+    # agent state
+    "messages", "session_id", "intent", "tool_calls", "needs_more_info", "loop_count", "usage",
+    "router", "tool_executor", "synthesizer", "quality_gate",
+    "general_chat", "research", "analysis", "tool_required",
+    "prompt_tokens", "completion_tokens", "total_tokens", "llm_calls",
+    "tool_name", "output_summary", "duration_ms", "web_search", "calculator", "datetime", "expression", "query",
+    # message fields
+    "content", "additional_kwargs", "response_metadata", "name", "type", "tool_call", "tool_call_id", "args",
+    "invalid_tool_calls", "usage_metadata", "input_tokens", "output_tokens", "input_token_details",
+    "output_token_details", "cache_read", "cache_creation", "reasoning", "audio", "artifact", "status",
+    "success", "error", "text", "model_name", "model_provider", "finish_reason", "stop", "length",
+    "system_fingerprint", "token_usage", "logprobs", "service_tier", "default", "refusal",
+    "openai", "anthropic", "google_genai", "groq", "stop_reason", "end_turn", "tool_use", "stop_sequence",
+    # prompts
+    ROUTER_PROMPT, SYNTH_PROMPT, GATE_PROMPT,
+]
+
+
+def _index_bytes(i: int) -> bytes:
+    return i.to_bytes(max(1, (i.bit_length() + 7) // 8), "big")
+
+
+# prebuilt ext values; ExtType construction is the hot spot when encoding
+_STATIC_EXT = {s: msgpack.ExtType(_EXT_STATIC, _index_bytes(i)) for i, s in enumerate(STATIC_STRINGS)}
+_OBJECT_EXT = {cls: msgpack.ExtType(_EXT_OBJECT, _index_bytes(i)) for i, cls in enumerate(_OBJECT_KINDS)}
+_REF_EXT: list[msgpack.ExtType] = []
+
+
+def _ref_ext(i: int) -> msgpack.ExtType:
+    while len(_REF_EXT) <= i and len(_REF_EXT) < 4096:
+        _REF_EXT.append(msgpack.ExtType(_EXT_REF, _index_bytes(len(_REF_EXT))))
+    return _REF_EXT[i] if i < len(_REF_EXT) else msgpack.ExtType(_EXT_REF, _index_bytes(i))
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    # static strings resolve while unpacking; refs and objects need the ordered walk in _decode
+    if code == _EXT_STATIC:
+        return STATIC_STRINGS[int.from_bytes(data, "big")]
+    return msgpack.ExtType(code, data)
+
+
+def _codec(name: str) -> tuple[Any, Any]:
+    if name == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=3).compress, zstandard.ZstdDecompressor().decompress
+    if name == "lz4":
+        import lz4.frame
+
+        return lz4.frame.compress, lz4.frame.decompress
+    raise ValueError(f"Unknown checkpoint compression: {name}. Supported: ['zstd', 'lz4', 'none']")
+
+
+class CompactSerializer:
+    """Checkpoint serializer producing small msgpack payloads.
+
+    - messages are stored as their non-default fields instead of full LangChain constructor dumps
+    - strings from `STATIC_STRINGS` become 1–2 byte references, and any other string of at least
+      `intern_min_length` chars is written once per payload and back-referenced afterwards
+    - payloads above `compression_threshold` bytes are compressed with zstd or lz4
+
+    Anything it does not know how to encode is delegated to the default `JsonPlusSerializer`
+    and embedded, and payloads written by the default serializer still load.
+    """
+
+    def __init__(self, compression: str | None = "zstd", compression_threshold: int = 1024, intern_min_length: int = 8):
+        self.compression = None if compression in (None, "none") else compression
+        self.compression_threshold = compression_threshold
+        self.intern_min_length = intern_min_length
+        self.fallback = JsonPlusSerializer()
+        # payloads written under a different compression setting must still load
+        self._codecs: dict[str, tuple[Any, Any]] = {}
+        if self.compression:
+            self._codecs[self.compression] = _codec(self.compression)
+
+    # ── encoding ──
+
+    def _encode(self, obj: Any, seen: dict[str, int]) -> Any:
+        kind = type(obj)
+        if kind is str:
+            # every string long enough is numbered on first sight, static or not, so the
+            # decoder can rebuild the same numbering from the strings it sees in order
+            if len(obj) >= self.intern_min_length:
+                ref = seen.get(obj)
+                if ref is None:
+                    seen[obj] = len(seen)
+                elif obj not in _STATIC_EXT:
+                    return _ref_ext(ref)
+            return _STATIC_EXT.get(obj, obj)
+        if kind is dict:
+            return {self._encode(k, seen): self._encode(v, seen) for k, v in obj.items()}
+        if kind is list:
+            return [self._encode(v, seen) for v in obj]
+        if obj is None or kind is bool or kind is float or kind is bytes or (kind is int and -(2**63) <= obj < 2**64):
+            return obj
+        if kind is tuple:
+            return [_OBJECT_EXT[tuple], [self._encode(v, seen) for v in obj]]
+        marker = _OBJECT_EXT.get(kind)
+        if marker is not None:
+            return [marker, self._encode(obj.model_dump(exclude_defaults=True), seen)]
+        return msgpack.ExtType(_EXT_FALLBACK, msgpack.packb(self.fallback.dumps_typed(obj)))
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        if obj is None or isinstance(obj, (bytes, bytearray)):
+            return self.fallback.dumps_typed(obj)
+        data = msgpack.packb(self._encode(obj, {}))
+        if self.compression and len(data) > self.compression_threshold:
+            return f"compact+{self.compression}", self._codecs[self.compression][0](data)
+        return "compact", data
+
+    # ── decoding ──
+
+    def _decode(self, obj: Any, seen: list[str], known: set[str]) -> Any:
+        kind = type(obj)
+        if kind is str:
+            if len(obj) >= self.intern_min_length and obj not in known:
+                known.add(obj)
+                seen.append(obj)
+            return obj
+        if kind is dict:
+            return {self._decode(k, seen, known): self._decode(v, seen, known) for k, v in obj.items()}
+        if kind is list:
+            if obj and type(obj[0]) is msgpack.ExtType and obj[0].code == _EXT_OBJECT:
+                cls = _OBJECT_KINDS[int.from_bytes(obj[0].data, "big")]
+                if cls is tuple:
+                    return tuple(self._decode(v, seen, known) for v in obj[1])
+                return cls(**self._decode(obj[1], seen, known))
+            return [self._decode(v, seen, known) for v in obj]
+        if kind is msgpack.ExtType:
+            if obj.code == _EXT_REF:
+                return seen[int.from_bytes(obj.data, "big")]
+            if obj.code == _EXT_FALLBACK:
+                return self.fallback.loads_typed(tuple(msgpack.unpackb(obj.data)))
+            raise ValueError(f"Unknown compact ext code: {obj.code}")
+        return obj
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if not type_.startswith("compact"):
+            return self.fallback.loads_typed(data)
+        if type_ != "compact":
+            codec = type_.split("+", 1)[1]
+            if codec not in self._codecs:
+                self._codecs[codec] = _codec(codec)
+            payload = self._codecs[codec][1](payload)
+        return self._decode(msgpack.unpackb(payload, strict_map_key=False, ext_hook=_ext_hook), [], set())
+
+
+def create_checkpoint_serde(settings: Any) -> Any:
+    """Serializer for the configured `CHECKPOINT_SERDE`; None means LangGraph's default."""
+    if settings.checkpoint_serde == "default":
+        return None
+    if settings.checkpoint_serde == "compact":
+        return CompactSerializer(
+            compression=settings.checkpoint_compression,
+            compression_threshold=settings.checkpoint_compression_threshold,
+        )
+    raise ValueError(f"Unknown checkpoint serde: {settings.checkpoint_serde}. Supported: ['default', 'compact']")
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from collections.abc import AsyncIterator, Awaitable, Iterator, Sequence
+from contextvars import ContextVar
+from typing import Any
+
+import msgpack
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+from app.services.kv_backend import KVBackend
+
+logger = logging.getLogger(__name__)
+
+_SEP = "\x00"
+
+# the thread whose checkpoint is being written, for serializers that account per thread (see `MeteredSerde`)
+checkpoint_thread: ContextVar[str | None] = ContextVar("checkpoint_thread", default=None)
+
+
+class KVCheckpointSaver(BaseCheckpointSaver[str]):
+    """LangGraph checkpointer on top of a `KVBackend`, so every worker sees the same threads.
+
+    Layout per thread (all keys are registered in `ckpt_keys:{thread}` for deletion):
+    - `ckpt:{thread}`         hash `{ns}\\0{checkpoint_id}` -> checkpoint, metadata, parent id
+    - `ckpt_latest:{thread}`  hash `{ns}` -> newest checkpoint id
+    - `ckpt_blobs:{thread}`   hash `{ns}\\0{channel}\\0{version}` -> channel value
+    - `ckpt_writes:{thread}:{ns}:{checkpoint_id}` hash `{task_id}\\0{idx}` -> pending write
+    """
+
+    def __init__(self, backend: KVBackend, *, key_prefix: str = "", ttl_seconds: int | None = None,
+                 serde: SerializerProtocol | None = None):
+        super().__init__(serde=serde)
+        self.backend = backend
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, kind: str, thread_id: str, *parts: str) -> str:
+        return ":".join((f"{self.key_prefix}{kind}", thread_id, *parts))
+
+    async def _touch(self, thread_id: str, *keys: str) -> None:
+        index = self._key("ckpt_keys", thread_id)
+        await self.backend.sadd(index, *keys)
+        if self.ttl_seconds:
+            for key in (index, *keys):
+                await self.backend.expire(key, self.ttl_seconds)
+
+    async def _load_blobs(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> dict[str, Any]:
+        channels = list(versions)
+        fields = [_SEP.join((checkpoint_ns, ch, str(versions[ch]))) for ch in channels]
+        values: dict[str, Any] = {}
+        for ch, raw in zip(channels, await self.backend.hmget(self._key("ckpt_blobs", thread_id), fields)):
+            if raw is None:
+                continue
+            type_, data = msgpack.unpackb(raw)
+            if type_ != "empty":
+                values[ch] = self.serde.loads_typed((type_, data))
+        return values
+
+    async def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list[tuple[str, str, Any]]:
+        stored = await self.backend.hgetall(self._key("ckpt_writes", thread_id, checkpoint_ns, checkpoint_id))
+        writes = []
+        for field, raw in stored.items():
+            task_id, idx = field.split(_SEP)
+            _, channel, type_, data, task_path = msgpack.unpackb(raw)
+            writes.append((writes_sort_key(task_path, task_id, int(idx)), (task_id, channel, self.serde.loads_typed((type_, data)))))
+        return [w for _, w in sorted(writes, key=lambda x: x[0])]
+
+    async def _build_tuple(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, raw: bytes) -> CheckpointTuple:
+        c_type, c_data, m_type, m_data, parent_id = msgpack.unpackb(raw)
+        checkpoint: Checkpoint = self.serde.loads_typed((c_type, c_data))
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={
+                **checkpoint,
+                "channel_values": await self._load_blobs(thread_id, checkpoint_ns, checkpoint["channel_versions"]),
+            },
+            metadata=self.serde.loads_typed((m_type, m_data)),
+            pending_writes=await self._load_writes(thread_id, checkpoint_ns, checkpoint_id),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        if not checkpoint_id:
+            latest = await self.backend.hget(self._key("ckpt_latest", thread_id), checkpoint_ns)
+            if latest is None:
+                return None
+            checkpoint_id = latest.decode()
+        raw = await self.backend.hget(self._key("ckpt", thread_id), _SEP.join((checkpoint_ns, checkpoint_id)))
+        if raw is None:
+            return None
+        return await self._build_tuple(thread_id, checkpoint_ns, checkpoint_id, raw)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        if config is None:
+            raise ValueError("KVCheckpointSaver.alist requires a thread_id")
+        thread_id = config["configurable"]["thread_id"]
+        config_ns = config["configurable"].get("checkpoint_ns")
+        config_id = get_checkpoint_id(config)
+        before_id = get_checkpoint_id(before) if before else None
+
+        stored = await self.backend.hgetall(self._key("ckpt", thread_id))
+        entries = sorted((tuple(field.split(_SEP)) for field in stored), key=lambda e: e[1], reverse=True)
+        for checkpoint_ns, checkpoint_id in entries:
+            if config_ns is not None and checkpoint_ns != config_ns:
+                continue
+            if config_id and checkpoint_id != config_id:
+                continue
+            if before_id and checkpoint_id >= before_id:
+                continue
+            tup = await self._build_tuple(thread_id, checkpoint_ns, checkpoint_id, stored[_SEP.join((checkpoint_ns, checkpoint_id))])
+            if filter and not all(tup.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            yield tup
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        c = checkpoint.copy()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        values: dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+
+        blobs = {
+            _SEP.join((checkpoint_ns, k, str(v))): msgpack.packb(self.serde.dumps_typed(values[k]) if k in values else ("empty", b""))
+            for k, v in new_versions.items()
+        }
+        c_type, c_data = self.serde.dumps_typed(c)
+        m_type, m_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        parent_id = config["configurable"].get("checkpoint_id")
+
+        blobs_key, ckpt_key, latest_key = (self._key(k, thread_id) for k in ("ckpt_blobs", "ckpt", "ckpt_latest"))
+        await self.backend.hset(blobs_key, blobs)
+        await self.backend.hset(ckpt_key, {
+            _SEP.join((checkpoint_ns, checkpoint["id"])): msgpack.packb((c_type, c_data, m_type, m_data, parent_id)),
+        })
+        await self.backend.hset(latest_key, {checkpoint_ns: checkpoint["id"].encode()})
+        await self._touch(thread_id, blobs_key, ckpt_key, latest_key)
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        key = self._key("ckpt_writes", thread_id, checkpoint_ns, checkpoint_id)
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            field = _SEP.join((task_id, str(write_idx)))
+            raw = msgpack.packb((task_id, channel, *self.serde.dumps_typed(value), task_path))
+            # regular writes are idempotent per task; special channels (errors, interrupts) overwrite
+            if write_idx >= 0:
+                await self.backend.hsetnx(key, field, raw)
+            else:
+                await self.backend.hset(key, {field: raw})
+        await self._touch(thread_id, key)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        index = self._key("ckpt_keys", thread_id)
+        await self.backend.delete(*await self.backend.smembers(index), index)
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+class DeferredCheckpointSaver(BaseCheckpointSaver):
+    """Wraps a checkpointer so runs marked `checkpoint_durability="deferred"` don't wait on writes.
+
+    Puts of a deferred run are queued per thread and applied in order by a background task, so a
+    turn can return before its checkpoint is stored. Reads of a thread first wait for its queued
+    writes, so the next turn always resumes from the latest checkpoint. Other runs pass through.
+    """
+
+    def __init__(self, inner: BaseCheckpointSaver):
+        super().__init__(serde=inner.serde)
+        self.inner = inner
+        self._pending: dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def _deferred(config: RunnableConfig) -> bool:
+        return config["configurable"].get("checkpoint_durability") == "deferred"
+
+    @staticmethod
+    async def _write(thread_id: str, write: Awaitable[Any]) -> Any:
+        token = checkpoint_thread.set(thread_id)
+        try:
+            return await write
+        finally:
+            checkpoint_thread.reset(token)
+
+    def _enqueue(self, thread_id: str, write: Any) -> None:
+        previous = self._pending.get(thread_id)
+
+        async def run() -> None:
+            if previous is not None:
+                await asyncio.shield(previous)
+            try:
+                await write
+            except Exception as e:
+                logger.error(f"Deferred checkpoint write failed for {thread_id}: {e}", exc_info=True)
+            finally:
+                if self._pending.get(thread_id) is task:
+                    del self._pending[thread_id]
+
+        task = asyncio.create_task(run())
+        self._pending[thread_id] = task
+
+    async def flush(self, thread_id: str | None = None) -> None:
+        """Wait until queued writes (of one thread, or all) are stored."""
+        tasks = list(self._pending.values()) if thread_id is None else [self._pending[thread_id]] if thread_id in self._pending else []
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        await self.flush(config["configurable"]["thread_id"])
+        return await self.inner.aget_tuple(config)
+
+    async def alist(self, config: RunnableConfig | None, **kwargs: Any) -> AsyncIterator[CheckpointTuple]:
+        await self.flush(config["configurable"]["thread_id"] if config else None)
+        async for tup in self.inner.alist(config, **kwargs):
+            yield tup
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        if not self._deferred(config):
+            return await self._write(thread_id, self.inner.aput(config, checkpoint, metadata, new_versions))
+        # the loop hands over a copy of the checkpoint, so storing it later is safe
+        self._enqueue(thread_id, self._write(thread_id, self.inner.aput(config, checkpoint, metadata, new_versions)))
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+                                 "checkpoint_id": checkpoint["id"]}}
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        if not self._deferred(config):
+            return await self._write(thread_id, self.inner.aput_writes(config, writes, task_id, task_path))
+        self._enqueue(thread_id, self._write(thread_id, self.inner.aput_writes(config, writes, task_id, task_path)))
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self.flush(thread_id)
+        await self.inner.adelete_thread(thread_id)
+
+    # sync API (unused by the async graph runs) goes straight to the wrapped saver
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return self.inner.get_tuple(config)
+
+    def list(self, config: RunnableConfig | None, **kwargs: Any) -> Iterator[CheckpointTuple]:
+        return self.inner.list(config, **kwargs)
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        return self.inner.put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        self.inner.put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.inner.delete_thread(thread_id)
+
+    def get_next_version(self, current: Any, channel: None) -> Any:
+        return self.inner.get_next_version(current, channel)
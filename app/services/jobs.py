@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.exceptions import AppError, InvalidRequestError, OverloadedError
+from app.services.kv_backend import KVBackend
+from app.services.metrics import record_job_callback, record_job_finished, record_job_queue
+
+logger = logging.getLogger(__name__)
+
+Run = Callable[[], Awaitable[dict]]
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        return obj.isoformat().replace("+00:00", "Z")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def public_job(job: dict) -> dict:
+    """A job record as its client sees it, without the owner it is checked against."""
+    return {k: v for k, v in job.items() if k != "client_id"}
+
+
+class JobQueue:
+    """Turns submitted with `?async=true`, run in the background by a bounded pool of worker tasks.
+
+    Job records live in a `KVBackend` (the session store's when it is shared), so any worker can
+    answer a poll while the turn runs on the worker that accepted it. Records expire
+    `result_ttl_seconds` after their last change. A finished job is POSTed to its `callback_url`,
+    which must be on one of `callback_hosts`, with a few retries. Records keep the submitting client
+    so only it can poll them. Jobs still waiting or running
+    when the worker shuts down fail with `WORKER_SHUTDOWN`.
+    """
+
+    def __init__(self, backend: KVBackend, *, workers: int = 4, max_queue: int = 100, result_ttl_seconds: int = 3600,
+                 key_prefix: str = "cyndx:", callback_hosts: tuple[str, ...] = ("localhost", "127.0.0.1"),
+                 callback_timeout: float = 10.0, callback_attempts: int = 3):
+        self.backend = backend
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl_seconds = result_ttl_seconds
+        self.key_prefix = key_prefix
+        self.callback_hosts = callback_hosts
+        self.callback_timeout = callback_timeout
+        self.callback_attempts = callback_attempts
+        self.running = 0
+        self._queue: asyncio.Queue[tuple[dict, Run, float]] = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+        self._callbacks: set[asyncio.Task] = set()
+        self._http: httpx.AsyncClient | None = None  # made with the first callback; building its TLS context is not free
+        # running average of a job's run time, for Retry-After when the queue is full
+        self._job_seconds = 5.0
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.key_prefix}job:{job_id}"
+
+    async def _save(self, job: dict) -> None:
+        key = self._key(job["job_id"])
+        await self.backend.hset(key, {"job": json.dumps(job, default=_default).encode()})
+        await self.backend.expire(key, self.result_ttl_seconds)
+
+    async def get(self, job_id: str) -> dict | None:
+        raw = await self.backend.hget(self._key(job_id), "job")
+        return json.loads(raw) if raw else None
+
+    def check_callback(self, url: str) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or parts.hostname not in self.callback_hosts:
+            raise InvalidRequestError(f"callback_url must be an http(s) URL on one of: {', '.join(self.callback_hosts)}.")
+
+    def check_capacity(self) -> None:
+        if self._queue.qsize() >= self.max_queue:
+            retry_after = max(1, min(60, round(self._job_seconds * (self._queue.qsize() + 1) / max(1, self.workers))))
+            raise OverloadedError("The job queue is full. Please retry later.", details={"retry_after": retry_after, "reason": "job_queue_full"})
+
+    async def submit(self, session_id: str, run: Run, callback_url: str | None = None, client_id: str | None = None) -> dict:
+        """Queue `run` (one turn of `session_id`, for `client_id`) and return the new job's record."""
+        self.check_capacity()
+        if callback_url:
+            self.check_callback(callback_url)
+        job = {
+            "job_id": f"job_{uuid.uuid4().hex[:12]}", "session_id": session_id, "status": "queued", "created_at": _now(),
+            "started_at": None, "finished_at": None, "result": None, "error": None,
+            "callback_url": callback_url, "callback": "pending" if callback_url else None, "client_id": client_id,
+        }
+        await self._save(job)
+        self._start()
+        self._queue.put_nowait((job, run, time.monotonic()))
+        record_job_queue(1)
+        return job
+
+    def stats(self) -> dict[str, int]:
+        return {"running": self.running, "queued": self._queue.qsize(), "workers": self.workers, "max_queue": self.max_queue}
+
+    def _start(self) -> None:
+        # started with the first job, on the loop that serves requests
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def _work(self) -> None:
+        while True:
+            job, run, submitted = await self._queue.get()
+            record_job_queue(-1)
+            try:
+                await self._run(job, run, submitted)
+            except Exception as e:
+                # the store failed under the job; the worker carries on
+                logger.error(f"Job {job['job_id']} could not be saved: {e}", exc_info=True)
+
+    async def _run(self, job: dict, run: Run, submitted: float) -> None:
+        start = time.monotonic()
+        self.running += 1
+        try:
+            job.update(status="running", started_at=_now())
+            await self._save(job)
+            job.update(status="succeeded", result=await run())
+        except AppError as e:
+            job.update(status="failed", error={"code": e.error_code, "message": e.message})
+        except asyncio.CancelledError:
+            job.update(status="failed", error={"code": "WORKER_SHUTDOWN", "message": "The worker shut down before the job finished."})
+            raise
+        except Exception as e:
+            logger.error(f"Job {job['job_id']} failed: {e}", exc_info=True)
+            job.update(status="failed", error={"code": "INTERNAL_ERROR", "message": "An unexpected error occurred."})
+        finally:
+            self.running -= 1
+            job["finished_at"] = _now()
+            run_seconds = time.monotonic() - start
+            self._job_seconds = 0.9 * self._job_seconds + 0.1 * run_seconds
+            record_job_finished(job["status"], (start - submitted) * 1000, run_seconds * 1000)
+            await self._save(job)
+        if job["callback_url"]:
+            task = asyncio.create_task(self._callback(job))
+            self._callbacks.add(task)
+            task.add_done_callback(self._callbacks.discard)
+
+    async def _callback(self, job: dict) -> None:
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=self.callback_timeout)
+        body = json.dumps({k: v for k, v in public_job(job).items() if k != "callback"}, default=_default)
+        for attempt in range(self.callback_attempts):
+            try:
+                resp = await self._http.post(job["callback_url"], content=body, headers={"Content-Type": "application/json"})
+                if resp.status_code < 500:
+                    job["callback"] = "delivered" if resp.status_code < 400 else "rejected"
+                    break
+            except httpx.HTTPError as e:
+                logger.warning(f"Callback of {job['job_id']} failed (attempt {attempt + 1}): {e}")
+            if attempt + 1 < self.callback_attempts:
+                await asyncio.sleep(2 ** attempt)
+        else:
+            job["callback"] = "failed"
+        record_job_callback(job["callback"])
+        await self._save(job)
+
+    async def close(self) -> None:
+        for task in [*self._workers, *self._callbacks]:
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._callbacks, return_exceptions=True)
+        self._workers = []
+        while not self._queue.empty():
+            job, _, _ = self._queue.get_nowait()
+            record_job_queue(-1)
+            job.update(status="failed", finished_at=_now(), error={"code": "WORKER_SHUTDOWN", "message": "The worker shut down before the job started."})
+            await self._save(job)
+        if self._http is not None:
+            await self._http.aclose()
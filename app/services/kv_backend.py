@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import time
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+class KVBackend(ABC):
+    """The small subset of Redis commands the shared session and checkpoint stores rely on.
+
+    Keys and hash fields are `str`, values are `bytes`. `hcas` is the only compound operation:
+    it writes `mapping` into a hash only if `field` still holds `expected`, which is what the
+    session store uses for optimistic versioning.
+    """
+
+    @abstractmethod
+    async def ping(self) -> bool: ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None: ...
+
+    @abstractmethod
+    async def expire(self, key: str, seconds: int) -> None: ...
+
+    @abstractmethod
+    async def hget(self, key: str, field: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def hmget(self, key: str, fields: list[str]) -> list[bytes | None]: ...
+
+    @abstractmethod
+    async def hgetall(self, key: str) -> dict[str, bytes]: ...
+
+    @abstractmethod
+    async def hset(self, key: str, mapping: dict[str, bytes]) -> None: ...
+
+    @abstractmethod
+    async def hsetnx(self, key: str, field: str, value: bytes) -> bool: ...
+
+    @abstractmethod
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int: ...
+
+    @abstractmethod
+    async def hcas(self, key: str, field: str, expected: bytes, mapping: dict[str, bytes]) -> bool: ...
+
+    @abstractmethod
+    async def rpush(self, key: str, *values: bytes) -> int: ...
+
+    @abstractmethod
+    async def lrange(self, key: str, start: int, end: int) -> list[bytes]: ...
+
+    @abstractmethod
+    async def sadd(self, key: str, *members: str) -> None: ...
+
+    @abstractmethod
+    async def smembers(self, key: str) -> set[str]: ...
+
+    async def close(self) -> None:
+        return None
+
+
+class LocalKVBackend(KVBackend):
+    """In-process stand-in with Redis semantics, for tests and single-process development."""
+
+    def __init__(self):
+        self._data: dict[str, Any] = {}
+        self._expires: dict[str, float] = {}
+
+    def _live(self, key: str) -> Any:
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return self._data.get(key)
+
+    def _hash(self, key: str) -> dict[str, bytes]:
+        value = self._live(key)
+        if value is None:
+            value = self._data[key] = {}
+        return value
+
+    async def ping(self) -> bool:
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+
+    async def expire(self, key: str, seconds: int) -> None:
+        if self._live(key) is not None:
+            self._expires[key] = time.monotonic() + seconds
+
+    async def hget(self, key: str, field: str) -> bytes | None:
+        return (self._live(key) or {}).get(field)
+
+    async def hmget(self, key: str, fields: list[str]) -> list[bytes | None]:
+        values = self._live(key) or {}
+        return [values.get(f) for f in fields]
+
+    async def hgetall(self, key: str) -> dict[str, bytes]:
+        return dict(self._live(key) or {})
+
+    async def hset(self, key: str, mapping: dict[str, bytes]) -> None:
+        self._hash(key).update(mapping)
+
+    async def hsetnx(self, key: str, field: str, value: bytes) -> bool:
+        values = self._hash(key)
+        if field in values:
+            return False
+        values[field] = value
+        return True
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        values = self._hash(key)
+        new = int(values.get(field, b"0")) + amount
+        values[field] = str(new).encode()
+        return new
+
+    async def hcas(self, key: str, field: str, expected: bytes, mapping: dict[str, bytes]) -> bool:
+        values = self._hash(key)
+        if values.get(field) != expected:
+            return False
+        values.update(mapping)
+        return True
+
+    async def rpush(self, key: str, *values: bytes) -> int:
+        items = self._live(key)
+        if items is None:
+            items = self._data[key] = []
+        items.extend(values)
+        return len(items)
+
+    async def lrange(self, key: str, start: int, end: int) -> list[bytes]:
+        items = self._live(key) or []
+        return list(items[start:] if end == -1 else items[start:end + 1])
+
+    async def sadd(self, key: str, *members: str) -> None:
+        items = self._live(key)
+        if items is None:
+            items = self._data[key] = set()
+        items.update(members)
+
+    async def smembers(self, key: str) -> set[str]:
+        return set(self._live(key) or ())
+
+
+# compare-and-set: KEYS[1]=hash, ARGV[1]=field, ARGV[2]=expected, ARGV[3..]=field/value pairs
+_HCAS_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+return 1
+"""
+
+
+class RedisKVBackend(KVBackend):
+    """Redis-protocol backend (Redis, Valkey, KeyDB, Memorystore) via `redis.asyncio`."""
+
+    def __init__(self, url: str):
+        from redis.asyncio import Redis
+
+        self._redis = Redis.from_url(url)
+        self._hcas = self._redis.register_script(_HCAS_SCRIPT)
+
+    async def ping(self) -> bool:
+        return bool(await self._redis.ping())
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def expire(self, key: str, seconds: int) -> None:
+        await self._redis.expire(key, seconds)
+
+    async def hget(self, key: str, field: str) -> bytes | None:
+        return await self._redis.hget(key, field)
+
+    async def hmget(self, key: str, fields: list[str]) -> list[bytes | None]:
+        if not fields:
+            return []
+        return await self._redis.hmget(key, fields)
+
+    async def hgetall(self, key: str) -> dict[str, bytes]:
+        raw = await self._redis.hgetall(key)
+        return {k.decode(): v for k, v in raw.items()}
+
+    async def hset(self, key: str, mapping: dict[str, bytes]) -> None:
+        if mapping:
+            await self._redis.hset(key, mapping=mapping)
+
+    async def hsetnx(self, key: str, field: str, value: bytes) -> bool:
+        return bool(await self._redis.hsetnx(key, field, value))
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        return await self._redis.hincrby(key, field, amount)
+
+    async def hcas(self, key: str, field: str, expected: bytes, mapping: dict[str, bytes]) -> bool:
+        pairs = [item for kv in mapping.items() for item in kv]
+        return bool(await self._hcas(keys=[key], args=[field, expected, *pairs]))
+
+    async def rpush(self, key: str, *values: bytes) -> int:
+        return await self._redis.rpush(key, *values)
+
+    async def lrange(self, key: str, start: int, end: int) -> list[bytes]:
+        return await self._redis.lrange(key, start, end)
+
+    async def sadd(self, key: str, *members: str) -> None:
+        if members:
+            await self._redis.sadd(key, *members)
+
+    async def smembers(self, key: str) -> set[str]:
+        return {m.decode() for m in await self._redis.smembers(key)}
+
+    async def close(self) -> None:
+        await self._redis.aclose()
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import heapq
+import json
+import linecache
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Any, Callable
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.services.checkpoint_store import checkpoint_thread
+from app.services.metrics import record_session_memory
+
+COMPONENTS = ("history", "checkpoints")
+
+
+def deep_sizeof(obj: Any) -> int:
+    """`sys.getsizeof` of a history record and everything in it (dicts, lists, strings, scalars)."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k) + deep_sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_sizeof(v) for v in obj)
+    return size
+
+
+def json_size(obj: Any) -> int:
+    return len(json.dumps(obj, default=str))
+
+
+def traced_allocations(fn: Callable[[], Any]) -> tuple[Any, int]:
+    """Call `fn` and count the bytes it leaves allocated, tracing just for the call unless already tracing."""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    try:
+        result = fn()
+    finally:
+        size = tracemalloc.get_traced_memory()[0] - before
+        if started:
+            tracemalloc.stop()
+    return result, max(0, size)
+
+
+class MeteredSerde:
+    """Checkpoint serializer that charges every value it writes to the thread being written.
+
+    `DeferredCheckpointSaver` names the thread in `checkpoint_thread` around each write, so this
+    works with any checkpointer underneath. Reads pass straight through.
+    """
+
+    def __init__(self, inner: Any, accounts: MemoryAccounts):
+        self.inner = inner or JsonPlusSerializer()
+        self.accounts = accounts
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        thread_id = checkpoint_thread.get()
+        if thread_id is not None:
+            self.accounts.add(thread_id, "checkpoints", len(data))
+        return type_, data
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        return self.inner.loads_typed(data)
+
+
+class MemoryAccounts:
+    """Approximate bytes each session holds, by component, kept up to date as they grow.
+
+    Nothing is measured at report time: history is charged per appended record (its Python size
+    in the worker, or its encoded size when the store is shared), checkpoints per serialized write
+    (see `MeteredSerde`). Checkpointers keep every checkpoint of a thread, so a session's share only
+    grows until it is deleted from the store. Accounts are kept for the `max_sessions` sessions that
+    grew most recently. Graphs are cached per model, temperature and key and shared by sessions, so
+    they are counted apart.
+    """
+
+    def __init__(self, shared: bool = False, max_sessions: int = 100_000):
+        self.location = "shared store" if shared else "worker"
+        self._record_size = json_size if shared else deep_sizeof
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, dict[str, int]] = OrderedDict()
+        self.totals = dict.fromkeys(COMPONENTS, 0)
+        self.graphs: dict[str, dict[str, int]] = {}  # by model: count and bytes
+        self._graph_samples: dict[str, list[int]] = {}
+
+    def add(self, session_id: str, component: str, nbytes: int) -> None:
+        account = self._sessions.get(session_id)
+        if account is None:
+            account = self._sessions[session_id] = dict.fromkeys(COMPONENTS, 0)
+            if len(self._sessions) > self.max_sessions:
+                _, evicted = self._sessions.popitem(last=False)
+                for name, size in evicted.items():
+                    self.totals[name] -= size
+                    record_session_memory(name, -size)
+        else:
+            self._sessions.move_to_end(session_id)
+        account[component] += nbytes
+        self.totals[component] += nbytes
+        record_session_memory(component, nbytes)
+
+    def add_history(self, session_id: str, *records: dict) -> None:
+        self.add(session_id, "history", sum(self._record_size(r) for r in records))
+
+    def get(self, session_id: str) -> dict[str, int] | None:
+        return self._sessions.get(session_id)
+
+    def top(self, n: int) -> list[tuple[str, dict[str, int]]]:
+        return heapq.nlargest(n, self._sessions.items(), key=lambda item: sum(item[1].values()))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def measure_graph(self, model: str, build: Callable[[], Any]) -> Any:
+        """Build a graph and count its bytes.
+
+        A model's first build also pays for its provider's lazy imports, so its first two builds are
+        traced and the smaller is the estimate for later ones, which are not traced.
+        """
+        samples = self._graph_samples.setdefault(model, [])
+        if len(samples) < 2:
+            graph, size = traced_allocations(build)
+            samples.append(size)
+        else:
+            graph = build()
+        entry = self.graphs.setdefault(model, {"count": 0, "bytes": 0})
+        entry["count"] += 1
+        entry["bytes"] += min(samples)
+        return graph
+
+
+class AllocationSnapshots:
+    """tracemalloc snapshot diffs for investigations: take a baseline, then list what grew since.
+
+    Tracing starts with the baseline and stops when it is dropped; every allocation in the process
+    is slower while it runs.
+    """
+
+    _FILTERS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+
+    def __init__(self, frames: int = 10):
+        self.frames = frames
+        self.baseline: tracemalloc.Snapshot | None = None
+        self.taken_at: float | None = None
+        self._started = False
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(self._FILTERS)
+
+    def start(self) -> dict:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started = True
+        self.baseline, self.taken_at = self._snapshot(), time.time()
+        return {"traced_bytes": tracemalloc.get_traced_memory()[0], "frames": tracemalloc.get_traceback_limit()}
+
+    def diff(self, limit: int = 25, group_by: str = "lineno") -> dict:
+        snapshot = self._snapshot()
+        stats = snapshot.compare_to(self.baseline, group_by)
+        return {
+            "seconds": round(time.time() - self.taken_at, 1),
+            "size_diff": sum(s.size_diff for s in stats), "count_diff": sum(s.count_diff for s in stats),
+            "top": [{
+                "size_diff": s.size_diff, "count_diff": s.count_diff, "size": s.size, "count": s.count,
+                "traceback": [f"{f.filename}:{f.lineno} {linecache.getline(f.filename, f.lineno).strip()}".rstrip()
+                              for f in s.traceback],
+            } for s in stats[:limit]],
+        }
+
+    def stop(self) -> None:
+        self.baseline = self.taken_at = None
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
@@ -11,6 +11,30 @@ llm_token_usage = meter.create_counter(name="llm_token_usage", description="Tota
 active_sessions = meter.create_up_down_counter(name="active_sessions", description="Currently active sessions")
 tool_call_duration = meter.create_histogram(name="tool_call_duration_ms", description="Tool execution duration", unit="ms")
 error_counter = meter.create_counter(name="errors_total", description="Total errors by type")
+answer_cache_lookups = meter.create_counter(name="answer_cache_lookups_total", description="Answer cache lookups by result (hit/miss)")
+websocket_connections = meter.create_up_down_counter(name="websocket_connections", description="Open WebSocket connections")
+turns_abandoned = meter.create_counter(name="turns_abandoned_total", description="Turns cancelled because their client went away or a newer message superseded them")
+abandoned_tokens_saved = meter.create_counter(name="abandoned_turn_tokens_saved", description="Estimated LLM tokens not spent on abandoned turns", unit="tokens")
+stream_resumes = meter.create_counter(name="stream_resumes_total", description="SSE reconnects with Last-Event-ID by outcome (live/buffered/history/not_found)")
+rate_limited = meter.create_counter(name="rate_limited_total", description="Requests and WebSocket turns rejected by the per-client rate limiter")
+admission_queue_depth = meter.create_up_down_counter(name="admission_queue_depth", description="Turns waiting for a worker-wide admission slot")
+admission_queue_wait = meter.create_histogram(name="admission_queue_wait_ms", description="Time a turn waited for an admission slot", unit="ms")
+turns_shed = meter.create_counter(name="turns_shed_total", description="Turns rejected with 503 by admission control, by reason (queue_full/deadline)")
+log_records_dropped = meter.create_counter(name="log_records_dropped_total", description="Log records dropped because the logging queue was full")
+node_duration = meter.create_histogram(name="graph_node_duration_ms", description="Agent graph node duration by node and status", unit="ms")
+llm_call_duration = meter.create_histogram(name="llm_call_duration_ms", description="LLM call duration by provider, model, node and status", unit="ms")
+llm_time_to_first_token = meter.create_histogram(name="llm_time_to_first_token_ms", description="Time to the first streamed token of an LLM call", unit="ms")
+llm_output_rate = meter.create_histogram(name="llm_output_tokens_per_second", description="LLM completion tokens per second, from the first token when streamed", unit="tokens/s")
+llm_cost = meter.create_counter(name="llm_cost_usd", description="Estimated LLM spend from the model price table", unit="USD")
+budget_exceeded = meter.create_counter(name="budget_exceeded_total", description="Turns stopped by a token or cost budget, by scope (session/client) and stage (admission/graph)")
+session_memory = meter.create_up_down_counter(name="session_memory_bytes", description="Approximate bytes held by sessions, by component (history/checkpoints)", unit="By")
+batch_items = meter.create_counter(name="batch_items_total", description="Batch endpoint items by status (ok/error)")
+job_queue_depth = meter.create_up_down_counter(name="job_queue_depth", description="Async jobs waiting for a job worker")
+job_queue_wait = meter.create_histogram(name="job_queue_wait_ms", description="Time an async job waited for a job worker", unit="ms")
+job_duration = meter.create_histogram(name="job_duration_ms", description="Async job run time by status (succeeded/failed)", unit="ms")
+job_callbacks = meter.create_counter(name="job_callbacks_total", description="Async job webhook callbacks by outcome (delivered/rejected/failed)")
+direct_answers = meter.create_counter(name="direct_answers_total", description="Opted-in turns answered without an LLM, by tool (calculator/datetime), or sent to the graph (fallback)")
+turn_queue_wait = meter.create_histogram(name="turn_queue_wait_ms", description="Time a turn waited behind earlier turns of the same session", unit="ms")
 
 
 def record_request_latency(endpoint: str, method: str, status_code: int, latency_ms: float):
@@ -22,6 +46,103 @@ def record_token_usage(model: str, prompt_tokens: int, completion_tokens: int):
     llm_token_usage.add(completion_tokens, attributes={"model": model, "token_type": "completion"})
 
 
+def record_llm_cost(model: str, cost_usd: float):
+    if cost_usd > 0:
+        llm_cost.add(cost_usd, attributes={"model": model})
+
+
+def record_budget_exceeded(scope: str, stage: str):
+    budget_exceeded.add(1, attributes={"scope": scope, "stage": stage})
+
+
+def record_node_duration(node: str, status: str, duration_ms: float):
+    node_duration.record(duration_ms, attributes={"node": node, "status": status})
+
+
+def record_llm_call(provider: str, model: str, node: str, status: str, duration_ms: float, ttft_ms: float | None = None,
+                    tokens_per_second: float | None = None):
+    attributes = {"provider": provider, "model": model, "node": node}
+    llm_call_duration.record(duration_ms, attributes={**attributes, "status": status})
+    if ttft_ms is not None:
+        llm_time_to_first_token.record(ttft_ms, attributes=attributes)
+    if tokens_per_second is not None:
+        llm_output_rate.record(tokens_per_second, attributes=attributes)
+
+
+def record_tool_call(tool: str, status: str, duration_ms: float):
+    tool_call_duration.record(duration_ms, attributes={"tool": tool, "status": status})
+
+
+def record_error(error_type: str, source: str):
+    error_counter.add(1, attributes={"error_type": error_type, "source": source})
+
+
+def record_turn_queue_wait(wait_ms: float):
+    turn_queue_wait.record(wait_ms)
+
+
+def record_admission_queue(delta: int):
+    admission_queue_depth.add(delta)
+
+
+def record_admission_wait(wait_ms: float):
+    admission_queue_wait.record(wait_ms)
+
+
+def record_turn_shed(reason: str):
+    turns_shed.add(1, attributes={"reason": reason})
+
+
+def record_turn_abandoned(model: str, mode: str, tokens_saved: int):
+    turns_abandoned.add(1, attributes={"model": model, "mode": mode})
+    abandoned_tokens_saved.add(tokens_saved, attributes={"model": model})
+
+
+def record_stream_resume(outcome: str):
+    stream_resumes.add(1, attributes={"outcome": outcome})
+
+
+def record_rate_limited(endpoint: str):
+    rate_limited.add(1, attributes={"endpoint": endpoint})
+
+
+def record_log_dropped():
+    log_records_dropped.add(1)
+
+
+def record_answer_cache_lookup(hit: bool):
+    answer_cache_lookups.add(1, attributes={"result": "hit" if hit else "miss"})
+
+
+def record_websocket_connection(delta: int):
+    websocket_connections.add(delta)
+
+
+def record_batch_item(status: str):
+    batch_items.add(1, attributes={"status": status})
+
+
+def record_direct_answer(outcome: str):
+    direct_answers.add(1, attributes={"outcome": outcome})
+
+
+def record_job_queue(delta: int):
+    job_queue_depth.add(delta)
+
+
+def record_job_finished(status: str, wait_ms: float, run_ms: float):
+    job_queue_wait.record(wait_ms)
+    job_duration.record(run_ms, attributes={"status": status})
+
+
+def record_job_callback(outcome: str):
+    job_callbacks.add(1, attributes={"outcome": outcome})
+
+
+def record_session_memory(component: str, delta: int):
+    session_memory.add(delta, attributes={"component": component})
+
+
 def record_session_created():
     active_sessions.add(1)
 
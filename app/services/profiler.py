@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import functools
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from typing import Any
+
+from app.core.exceptions import ProfilerBusyError
+
+IDLE = "<event loop idle: waiting for I/O>"
+OTHER = "<other stacks>"
+# innermost functions that mean the event loop is parked in its selector
+_IDLE_FUNCTIONS = frozenset({"select", "poll", "epoll", "kqueue", "control"})
+_MAX_DEPTH = 128
+
+
+@functools.lru_cache(maxsize=65_536)
+def _frame_label(code: Any) -> str:
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profile:
+    """Sampled stacks of one thread, as counts of collapsed stacks (root first)."""
+
+    def __init__(self, interval: float, max_stacks: int = 20_000, profile_id: str | None = None):
+        self.id = profile_id or f"prof_{uuid.uuid4().hex[:12]}"
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self.started = time.time()
+        self.duration = 0.0
+
+    def add(self, stack: tuple[str, ...], count: int = 1) -> None:
+        if stack not in self.stacks and len(self.stacks) >= self.max_stacks:
+            stack = (OTHER,)
+        self.stacks[stack] += count
+        self.samples += count
+
+    def merge(self, other: Profile) -> None:
+        for stack, count in other.stacks.items():
+            self.add(stack, count)
+        self.duration += other.duration
+
+    def folded(self) -> str:
+        """Collapsed-stack text (`frame;frame;frame count`), read by flamegraph.pl, inferno and speedscope."""
+        lines = [f"{';'.join(frame.replace(';', ':') for frame in stack)} {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def summary(self) -> dict:
+        idle = self.stacks.get((IDLE,), 0)
+        return {"profile_id": self.id, "samples": self.samples, "interval_ms": round(self.interval * 1000, 3),
+                "duration_seconds": round(self.duration, 3), "idle_fraction": round(idle / self.samples, 4) if self.samples else None,
+                "distinct_stacks": len(self.stacks)}
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds from a background thread.
+
+    Nothing is hooked into the sampled thread: each sample reads its current frame through
+    `sys._current_frames()`, so the profiled code runs unmodified and there is no cost at all
+    once the sampler stops. A loop parked in its selector is recorded as a single `IDLE` frame.
+    That is time spent waiting on the network (the LLM provider, Redis), not time spent in code.
+    With `rotate_every`, the profile being filled is moved to `history` on that period and a
+    fresh one started.
+    """
+
+    def __init__(self, thread_id: int, profile: Profile, rotate_every: float | None = None, history: deque | None = None):
+        self.thread_id, self.profile = thread_id, profile
+        self.rotate_every, self.history = rotate_every, history
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{profile.id}", daemon=True)
+
+    def start(self) -> StackSampler:
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        self._thread.join()
+        self.profile.duration = time.perf_counter() - self.started
+        return self.profile
+
+    def _run(self) -> None:
+        interval, next_at = self.profile.interval, time.perf_counter()
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack = self._stack(frame)
+            del frame
+            now = time.perf_counter()
+            with self.lock:
+                if self.rotate_every and now - self.started >= self.rotate_every:
+                    self.profile.duration = now - self.started
+                    self.history.append(self.profile)
+                    self.profile, self.started = Profile(interval, self.profile.max_stacks, self.profile.id), now
+                self.profile.add(stack)
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay < 0:  # fell behind (GIL held by the sampled thread): skip rather than burst
+                next_at, delay = time.perf_counter(), 0
+            self._stop.wait(delay)
+
+    @staticmethod
+    def _stack(frame: Any) -> tuple[str, ...]:
+        if frame.f_code.co_name in _IDLE_FUNCTIONS and frame.f_code.co_filename.endswith("selectors.py"):
+            return (IDLE,)
+        labels = []
+        while frame is not None and len(labels) < _MAX_DEPTH:
+            labels.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return tuple(labels)
+
+
+class ProfilerService:
+    """Per-request and windowed profiles of the event-loop thread, plus an optional always-on sampler.
+
+    At most `max_active` on-demand samplers run at once. Finished profiles are kept (the last
+    `keep` of them) so a request profiled via header can be fetched afterwards by id. The
+    continuous sampler fills one profile per minute and keeps the last `continuous_minutes`, so
+    its memory is bounded by both the per-profile stack cap and the number of minutes.
+    """
+
+    def __init__(self, interval_ms: float = 5.0, max_seconds: float = 60.0, continuous_hz: float = 0.0,
+                 continuous_minutes: int = 10, max_active: int = 2, keep: int = 20):
+        self.interval = interval_ms / 1000
+        self.max_seconds = max_seconds
+        self.max_active, self.keep = max_active, keep
+        self.continuous_hz, self.continuous_minutes = continuous_hz, continuous_minutes
+        self._active: dict[str, StackSampler] = {}
+        self._finished: OrderedDict[str, Profile] = OrderedDict()
+        self._continuous: StackSampler | None = None
+        self._minutes: deque[Profile] = deque(maxlen=max(1, continuous_minutes))
+
+    # samplers watch the thread they were started from: the event loop's, for routes and the lifespan
+
+    def start(self, interval: float | None = None) -> StackSampler:
+        if len(self._active) >= self.max_active:
+            raise ProfilerBusyError(details={"active": len(self._active)})
+        sampler = StackSampler(threading.get_ident(), Profile(interval or self.interval)).start()
+        self._active[sampler.profile.id] = sampler
+        return sampler
+
+    def finish(self, sampler: StackSampler) -> Profile:
+        profile = sampler.stop()
+        self._active.pop(profile.id, None)
+        self._finished[profile.id] = profile
+        while len(self._finished) > self.keep:
+            self._finished.popitem(last=False)
+        return profile
+
+    def get(self, profile_id: str) -> Profile | None:
+        return self._finished.get(profile_id)
+
+    def recent(self) -> list[Profile]:
+        return list(self._finished.values())
+
+    # ── continuous low-frequency sampling ──
+
+    def start_continuous(self) -> None:
+        if self.continuous_hz > 0 and self._continuous is None:
+            profile = Profile(1 / self.continuous_hz, profile_id="continuous")
+            self._continuous = StackSampler(threading.get_ident(), profile, rotate_every=60, history=self._minutes).start()
+
+    def continuous(self, minutes: int | None = None) -> Profile | None:
+        """The continuous profile over the last `minutes` full minutes plus the current one."""
+        sampler = self._continuous
+        if sampler is None:
+            return None
+        merged = Profile(sampler.profile.interval, max_stacks=50_000, profile_id="continuous")
+        with sampler.lock:
+            recent = list(self._minutes)[-minutes:] if minutes else list(self._minutes)
+            for profile in recent:
+                merged.merge(profile)
+            sampler.profile.duration = time.perf_counter() - sampler.started
+            merged.merge(sampler.profile)
+        return merged
+
+    def close(self) -> None:
+        for sampler in list(self._active.values()):
+            self.finish(sampler)
+        if self._continuous is not None:
+            self._continuous.stop()
+            self._continuous = None
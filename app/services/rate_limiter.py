@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+from app.services.kv_backend import KVBackend
+
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    limit: int  # requests per minute
+    remaining: int  # requests left right now
+    reset_seconds: int  # until the request allowance is whole again
+    retry_after: int  # seconds to wait when not allowed
+
+
+def client_id(api_key: str | None, host: str | None) -> str:
+    """Who a request is charged to: its API key (hashed, never stored raw), else the client address."""
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    return f"ip:{host or 'unknown'}"
+
+
+class LocalRateLimiter:
+    """Per-client token buckets in process memory: one for requests, one for LLM tokens.
+
+    Both refill continuously to their per-minute allowance. A request takes one request token
+    and needs a positive LLM-token balance; the turn's real `usage` is charged afterwards and
+    may drive the balance negative, which holds the client's next requests until it refills.
+    A limit of 0 (or less) disables that bucket. Limits are per worker, and at most `max_clients`
+    buckets are kept, dropping the least recently seen.
+    """
+
+    max_clients = 10_000
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int = 0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        # client -> [requests, tokens, refilled at], least recently seen first
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+
+    def _bucket(self, client: str) -> list[float]:
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) >= self.max_clients:
+                self._prune(now)
+            bucket = self._buckets[client] = [self.requests_per_minute, self.tokens_per_minute, now]
+            return bucket
+        self._buckets.move_to_end(client)
+        elapsed = now - bucket[2]
+        bucket[0] = min(self.requests_per_minute, bucket[0] + elapsed * self.requests_per_minute / 60)
+        bucket[1] = min(self.tokens_per_minute, bucket[1] + elapsed * self.tokens_per_minute / 60)
+        bucket[2] = now
+        return bucket
+
+    def _prune(self, now: float) -> None:
+        # clients whose buckets would be full again carry no state worth keeping; past that,
+        # the least recently seen go, so a burst of new clients can't grow the map
+        full_after = 60.0
+        while self._buckets:
+            client, bucket = next(iter(self._buckets.items()))
+            if now - bucket[2] < full_after and len(self._buckets) < self.max_clients:
+                return
+            del self._buckets[client]
+
+    async def check(self, client: str) -> RateLimitDecision:
+        bucket = self._bucket(client)
+        rpm = self.requests_per_minute
+        wait = 0.0
+        if rpm > 0 and bucket[0] < 1:
+            wait = (1 - bucket[0]) * 60 / rpm
+        if self.tokens_per_minute and bucket[1] <= 0:
+            wait = max(wait, -bucket[1] * 60 / self.tokens_per_minute + 1e-3)
+        if wait <= 0 and rpm > 0:
+            bucket[0] -= 1
+        reset = math.ceil((rpm - bucket[0]) * 60 / rpm) if rpm > 0 else 0
+        return RateLimitDecision(wait <= 0, rpm, int(bucket[0]), reset, math.ceil(wait))
+
+    async def charge(self, client: str, tokens: int) -> None:
+        if self.tokens_per_minute and tokens > 0:
+            self._bucket(client)[1] -= tokens
+
+    async def close(self) -> None:
+        return None
+
+
+class SharedRateLimiter:
+    """Limits shared by every worker through a `KVBackend`, as fixed one-minute windows.
+
+    Each client gets one hash per minute with `requests` and `tokens` counters, so a check is a
+    single atomic increment plus a read. Bursts of up to twice the limit are possible across a
+    window boundary.
+    """
+
+    def __init__(self, backend: KVBackend, requests_per_minute: int, tokens_per_minute: int = 0, key_prefix: str = "cyndx:"):
+        self.backend = backend
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.key_prefix = key_prefix
+
+    def _window(self) -> tuple[int, int]:
+        now = time.time()
+        return int(now // 60), 60 - int(now % 60)
+
+    def _key(self, client: str, window: int) -> str:
+        return f"{self.key_prefix}ratelimit:{client}:{window}"
+
+    async def check(self, client: str) -> RateLimitDecision:
+        window, reset = self._window()
+        key = self._key(client, window)
+        count = await self.backend.hincrby(key, "requests", 1)
+        if count == 1:
+            await self.backend.expire(key, 120)
+        tokens = int(await self.backend.hget(key, "tokens") or 0) if self.tokens_per_minute else 0
+        allowed = (self.requests_per_minute <= 0 or count <= self.requests_per_minute) and (not self.tokens_per_minute or tokens < self.tokens_per_minute)
+        remaining = max(0, self.requests_per_minute - count)
+        return RateLimitDecision(allowed, self.requests_per_minute, remaining, reset, 0 if allowed else reset)
+
+    async def charge(self, client: str, tokens: int) -> None:
+        if self.tokens_per_minute and tokens > 0:
+            window, _ = self._window()
+            key = self._key(client, window)
+            await self.backend.hincrby(key, "tokens", tokens)
+            await self.backend.expire(key, 120)
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def create_rate_limiter(settings: Any) -> LocalRateLimiter | SharedRateLimiter | None:
+    if not settings.rate_limit_enabled:
+        return None
+    if settings.rate_limit_backend == "memory":
+        return LocalRateLimiter(settings.rate_limit_requests, settings.rate_limit_tokens)
+    if settings.rate_limit_backend == "redis":
+        from app.services.kv_backend import RedisKVBackend
+
+        return SharedRateLimiter(RedisKVBackend(settings.redis_url), settings.rate_limit_requests, settings.rate_limit_tokens,
+                                 key_prefix=settings.redis_key_prefix)
+    raise ValueError(f"Unknown rate limit backend: {settings.rate_limit_backend}. Supported: ['memory', 'redis']")
@@ -1,116 +1,335 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import time
 import uuid
+from collections.abc import AsyncIterator
+from contextlib import AbstractAsyncContextManager, aclosing, nullcontext
 from datetime import datetime, timezone
 from typing import Any, Optional
 
 from langchain_core.messages import AIMessage, HumanMessage
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import Overwrite
 
+from app.agent.direct_answer import DirectAnswer, direct_answer
+from app.agent.fake_llm import FAKE_MODEL_PREFIX
 from app.agent.graph import build_graph
-from app.agent.state import AgentState
+from app.agent.state import empty_usage
 from app.api.schemas.requests import AgentConfig
-from app.core.exceptions import ProviderError, SessionNotFoundError, SessionTerminatedError
+from app.config import get_settings
+from app.core.exceptions import (
+    AppError,
+    BudgetExceededError,
+    InvalidRequestError,
+    ProviderError,
+    SessionConflictError,
+    SessionNotFoundError,
+    SessionTerminatedError,
+    StreamNotFoundError,
+)
+from app.services.admission import AdmissionController
+from app.services.agent_metrics import AgentMetricsHandler
+from app.services.answer_cache import AnswerCache
+from app.services.budgets import Budget, create_usage_ledger
+from app.services.checkpoint_serde import create_checkpoint_serde
+from app.services.checkpoint_store import DeferredCheckpointSaver
+from app.services.jobs import JobQueue
+from app.services.kv_backend import LocalKVBackend
+from app.services.memory_accounting import MemoryAccounts, MeteredSerde
+from app.services.metrics import (
+    record_batch_item,
+    record_direct_answer,
+    record_stream_resume,
+    record_token_usage,
+    record_turn_abandoned,
+)
+from app.services.session_store import (
+    InMemorySessionStore,
+    SessionData,
+    SessionStore,
+    SharedSessionStore,
+    create_session_store,
+)
+from app.services.stream_buffer import StreamBuffers, TurnStream, parse_event_id
+from app.services.streaming import TurnOutput, detach, stream_turn
+from app.services.turn_queue import SessionLeases, TurnQueue
 
 logger = logging.getLogger(__name__)
 
+# "deferred" only holds within one worker: its queued write is flushed by the worker that queued it, and a
+# turn on another worker would read the checkpoint before it lands. With a shared store it runs as "exit".
+DURABILITY_MODES = ("sync", "async", "exit", "deferred")
 
-class SessionData:
-    def __init__(self, session_id: str, agent_config: AgentConfig):
-        self.session_id = session_id
-        self.agent_config = agent_config
-        self.created_at = datetime.now(timezone.utc)
-        self.status = "active"
-        self.message_counter = 0
-        self.history: list[dict] = []
+
+def turn_input(session_id: str, content: str, first_turn: bool = False) -> dict:
+    return {
+        "messages": [HumanMessage(content=content)],
+        "session_id": session_id,
+        "intent": "general_chat",
+        "tool_calls": [],
+        "needs_more_info": False,
+        "loop_count": 0,
+        "first_turn": first_turn,
+        # usage is summed by its reducer; a new turn starts it from zero rather than adding to the last one
+        "usage": Overwrite(empty_usage()),
+    }
+
+
+def turn_run_options(session_id: str, durability: str, answer_cache: bool = False, callbacks: list | None = None,
+                     budget: Budget | None = None) -> dict:
+    """`config` and `durability` kwargs for running one turn of `session_id` on its graph."""
+    config: dict = {"configurable": {"thread_id": session_id, "checkpoint_durability": durability, "answer_cache": answer_cache}}
+    if callbacks:
+        config["callbacks"] = callbacks
+    if budget is not None:
+        config["configurable"]["budget"] = budget
+    # "deferred" is "exit" with the final write handed to DeferredCheckpointSaver's background queue
+    return {"config": config, "durability": "exit" if durability == "deferred" else durability}
+
+
+def final_answer(result: dict) -> tuple[str, list[dict]]:
+    """The assistant's answer at the end of a graph run, and the tool calls it made."""
+    content = ""
+    for msg in reversed(result.get("messages", [])):
+        if isinstance(msg, AIMessage) and msg.content and not msg.tool_calls:
+            content = msg.content
+            break
+    if not content:
+        for msg in reversed(result.get("messages", [])):
+            if isinstance(msg, AIMessage) and msg.content:
+                content = msg.content
+                break
+    tool_calls = [{"tool_name": tc["tool_name"], "input": tc["input"], "output_summary": tc["output_summary"]} for tc in result.get("tool_calls", [])]
+    return content, tool_calls
 
 
 class SessionManager:
-    def __init__(self):
-        self.sessions: dict[str, SessionData] = {}
-        self.checkpointer = MemorySaver()
+    def __init__(self, store: SessionStore | None = None, rate_limiter: Any = None):
+        settings = get_settings()
+        self.store = store or create_session_store(settings)
+        # approximate bytes per session, charged as history and checkpoints are written (GET /admin/memory)
+        self.memory = MemoryAccounts(shared=not isinstance(self.store, InMemorySessionStore), max_sessions=settings.memory_accounting_max_sessions)
+        self.checkpointer = DeferredCheckpointSaver(self.store.create_checkpointer(serde=MeteredSerde(create_checkpoint_serde(settings), self.memory)))
+        if settings.checkpoint_durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown checkpoint durability: {settings.checkpoint_durability}. Supported: {list(DURABILITY_MODES)}")
+        self.durability = settings.checkpoint_durability
+        self.deferred_writes = isinstance(self.store, InMemorySessionStore)
+        if self.durability == "deferred" and not self.deferred_writes:
+            logger.warning("CHECKPOINT_DURABILITY=deferred needs a per-worker store; running turns with 'exit'")
+            self.durability = "exit"
+        self.fake_llm_enabled = settings.fake_llm_enabled
         self._graphs: dict[str, Any] = {}
+        self._callbacks = [AgentMetricsHandler()] if settings.agent_metrics_enabled else None
+        self.answer_cache = AnswerCache(max_entries=settings.answer_cache_max_entries, ttl_seconds=settings.answer_cache_ttl_seconds)
+        self.turns = TurnQueue(max_depth=settings.turn_queue_max_depth, supersede=settings.turn_queue_supersede)
+        # with a shared store, a session's turns also take a lease on the backend so workers take turns
+        self.leases = SessionLeases(
+            self.store.backend,
+            key_prefix=self.store.key_prefix,
+            ttl_seconds=settings.turn_lease_seconds,
+            wait_seconds=settings.turn_lease_wait_seconds,
+        ) if isinstance(self.store, SharedSessionStore) else None
+        self.admission = AdmissionController(
+            max_concurrent=settings.admission_max_concurrent_turns,
+            max_queue=settings.admission_max_queue,
+            queue_timeout=settings.admission_queue_timeout_seconds,
+        )
+        self.streams = StreamBuffers(
+            max_frames=settings.stream_resume_max_frames,
+            max_bytes=settings.stream_resume_max_bytes,
+            ttl_seconds=settings.stream_resume_ttl_seconds,
+            resume_grace_seconds=settings.stream_resume_grace_seconds,
+        )
+        # running average of tokens per completed turn, per model; prices what an abandoned turn didn't spend
+        self._turn_tokens: dict[str, float] = {}
+        # charged with each turn's actual token usage (see `app.services.rate_limiter`)
+        self.rate_limiter = rate_limiter
+        # per-session and per-client spend and budgets, on the session store's backend when it is shared
+        backend = getattr(self.store, "backend", None) or LocalKVBackend()
+        self.ledger = create_usage_ledger(settings, backend)
+        # turns submitted with ?async=true, polled from any worker through the same backend
+        self.jobs = JobQueue(
+            backend,
+            workers=settings.job_workers,
+            max_queue=settings.job_max_queue,
+            result_ttl_seconds=settings.job_result_ttl_seconds,
+            key_prefix=settings.redis_key_prefix,
+            callback_hosts=tuple(h.strip() for h in settings.job_callback_hosts.split(",") if h.strip()),
+            callback_timeout=settings.job_callback_timeout_seconds,
+        )
 
-    def _get_or_build_graph(self, config: AgentConfig) -> Any:
-        cache_key = f"{config.model}:{config.temperature}:{config.llm_api_key or 'default'}"
+    def _get_or_build_graph(self, config: AgentConfig, ephemeral: bool = False) -> Any:
+        """The graph for `config`; `ephemeral` ones have no checkpointer, for one-off turns that keep no state."""
+        cache_key = f"{'ephemeral:' if ephemeral else ''}{config.model}:{config.temperature}:{config.llm_api_key or 'default'}"
         if cache_key not in self._graphs:
-            self._graphs[cache_key] = build_graph(
+            self._graphs[cache_key] = self.memory.measure_graph(config.model, lambda: build_graph(
                 model=config.model,
                 temperature=config.temperature,
                 api_key=config.llm_api_key,
-                checkpointer=self.checkpointer,
-            )
+                checkpointer=False if ephemeral else self.checkpointer,
+                answer_cache=self.answer_cache,
+            ))
         return self._graphs[cache_key]
 
-    def create_session(self, agent_config: Optional[AgentConfig] = None) -> SessionData:
+    async def _append_history(self, session_id: str, *records: dict) -> None:
+        await self.store.append_history(session_id, *records)
+        self.memory.add_history(session_id, *records)
+
+    def run_options(self, session: SessionData, durability: str | None = None, budget: Budget | None = None) -> dict:
+        if durability == "deferred" and not self.deferred_writes:
+            durability = "exit"
+        return turn_run_options(session.session_id, durability or self.durability, session.agent_config.answer_cache, self._callbacks, budget)
+
+    async def check_budget(self, session: SessionData, client_id: str | None = None) -> Budget | None:
+        """What the session's next turn may spend; raises `BudgetExceededError` if nothing is left."""
+        return await self.ledger.budget(session.session_id, client_id, session.agent_config.model)
+
+    def _note_turn_tokens(self, model: str, total_tokens: int) -> None:
+        avg = self._turn_tokens.get(model)
+        self._turn_tokens[model] = total_tokens if avg is None else 0.9 * avg + 0.1 * total_tokens
+
+    async def _charge(self, client_id: str | None, total_tokens: int) -> None:
+        if self.rate_limiter is None or client_id is None:
+            return
+        try:
+            await self.rate_limiter.charge(client_id, total_tokens)
+        except Exception as e:
+            logger.warning(f"Could not charge {total_tokens} tokens to {client_id}: {e}")
+
+    async def _spend(self, session_id: str | None, model: str, client_id: str | None, usage: dict) -> None:
+        """Account a turn's usage: the client's rate limit, and the session's (unless ephemeral) and client's ledgers."""
+        await self._charge(client_id, usage.get("total_tokens", 0))
+        try:
+            await self.ledger.record(session_id, client_id, model, usage)
+        except Exception as e:
+            logger.warning(f"Could not record usage of {session_id or client_id}: {e}")
+
+    async def _abandon_turn(self, session: SessionData, graph: Any, options: dict, msg_id: str, output: TurnOutput | None, mode: str,
+                            client_id: str | None = None) -> None:
+        """Close a turn whose run was cancelled so the checkpoint and history agree on what was answered."""
+        model = session.agent_config.model
+        partial = output.content if output else ""
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "llm_calls": 0, **(output.usage if output else {})}
+        # tokens already streamed count as spent, roughly one per chunk
+        streamed = len(output.parts) if output else 0
+        spent = usage["total_tokens"] + streamed
+        saved = max(0, round(self._turn_tokens.get(model, 0) - spent))
+        record_turn_abandoned(model, mode, saved)
+        await self._spend(session.session_id, session.agent_config.model, client_id, {**usage, "completion_tokens": usage["completion_tokens"] + streamed, "total_tokens": spent})
+
+        try:
+            # the run stopped mid-graph; finish it as if the quality gate had passed whatever the client got
+            state = await graph.aget_state(options["config"])
+            if state.next:
+                messages = list(state.values.get("messages", []))
+                if partial and "synthesizer" in state.next:
+                    messages.append(AIMessage(content=partial))
+                await graph.aupdate_state(options["config"], {"messages": messages, "needs_more_info": False}, as_node="quality_gate")
+        except Exception as e:
+            logger.warning(f"Could not close checkpoint of abandoned turn: {e}")
+
+        await self._append_history(session.session_id, {
+            "message_id": msg_id, "role": "assistant", "content": partial, "created_at": datetime.now(timezone.utc),
+            "tool_calls": output.tool_calls if output else [], "usage": usage, "status": "abandoned",
+        })
+        logger.info(f"Turn abandoned: {session.session_id}, ~{saved} tokens saved")
+
+    @staticmethod
+    def _direct_answer(config: AgentConfig, content: str) -> DirectAnswer | None:
+        """The deterministic answer for sessions that opted in, when the parser is certain of one."""
+        if not config.direct_answers:
+            return None
+        direct = direct_answer(content)
+        record_direct_answer(direct.tool_call["tool_name"] if direct else "fallback")
+        return direct
+
+    @staticmethod
+    def _direct_state(session_id: str, content: str, direct: DirectAnswer) -> dict:
+        """The state a turn answered without the graph ends with."""
+        return {
+            "messages": [HumanMessage(content=content), AIMessage(content=direct.content)], "session_id": session_id,
+            "intent": "analysis", "tool_calls": [direct.tool_call], "needs_more_info": False, "loop_count": 0, "usage": empty_usage(),
+        }
+
+    async def _write_direct_turn(self, graph: Any, options: dict, session_id: str, content: str, direct: DirectAnswer) -> dict:
+        """Checkpoint a turn answered without the graph, as if it had run and the quality gate had passed it."""
+        state = self._direct_state(session_id, content, direct)
+        await graph.aupdate_state(options["config"], {**state, "usage": Overwrite(empty_usage())}, as_node="quality_gate")
+        return state
+
+    async def create_session(self, agent_config: Optional[AgentConfig] = None) -> SessionData:
         session_id = f"sess_{uuid.uuid4().hex[:12]}"
         config = agent_config or AgentConfig()
+        if config.model.startswith(FAKE_MODEL_PREFIX) and not self.fake_llm_enabled:
+            raise InvalidRequestError(f"Model {config.model} is not available on this server.")
         session = SessionData(session_id=session_id, agent_config=config)
-        self.sessions[session_id] = session
+        await self.store.create(session)
         logger.info(f"Session created: {session_id}, model={config.model}")
         return session
 
-    def _get_active_session(self, session_id: str) -> SessionData:
-        session = self.sessions.get(session_id)
+    async def _get_active_session(self, session_id: str) -> SessionData:
+        session = await self.store.get(session_id)
         if session is None:
             raise SessionNotFoundError(f"No active session found with ID '{session_id}'.")
         if session.status == "terminated":
             raise SessionTerminatedError(f"Session '{session_id}' has been terminated.")
         return session
 
-    async def send_message(self, session_id: str, content: str, metadata: dict | None = None) -> dict:
-        session = self._get_active_session(session_id)
+    def _lease(self, session_id: str) -> AbstractAsyncContextManager:
+        return self.leases.hold(session_id) if self.leases else nullcontext()
+
+    async def send_message(self, session_id: str, content: str, metadata: dict | None = None, supersede: bool | None = None,
+                           durability: str | None = None, client_id: str | None = None) -> dict:
+        await self._get_active_session(session_id)
+        self.admission.check_capacity()
+        async with self.turns.turn(session_id, supersede=supersede), self._lease(session_id), self.admission.slot():
+            return await self._run_turn(session_id, content, durability, client_id)
+
+    async def _run_turn(self, session_id: str, content: str, durability: str | None = None, client_id: str | None = None) -> dict:
+        # re-check: the session may have been terminated while this turn was queued
+        session = await self._get_active_session(session_id)
+        budget = await self.check_budget(session, client_id)
         graph = self._get_or_build_graph(session.agent_config)
 
-        session.message_counter += 1
+        first_turn = await self.store.increment_messages(session_id) == 1
         user_msg_id = f"msg_{uuid.uuid4().hex[:8]}"
         assistant_msg_id = f"msg_{uuid.uuid4().hex[:8]}"
         now = datetime.now(timezone.utc)
 
-        session.history.append({"message_id": user_msg_id, "role": "user", "content": content, "created_at": now})
+        await self._append_history(session_id, {"message_id": user_msg_id, "role": "user", "content": content, "created_at": now})
 
         start_time = time.time()
+        options = self.run_options(session, durability, budget)
+        direct = self._direct_answer(session.agent_config, content)
         try:
-            result = await graph.ainvoke(
-                {
-                    "messages": [HumanMessage(content=content)],
-                    "session_id": session_id,
-                    "intent": "general_chat",
-                    "tool_calls": [],
-                    "needs_more_info": False,
-                    "loop_count": 0,
-                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "llm_calls": 0},
-                },
-                config={"configurable": {"thread_id": session_id}},
-            )
+            if direct is not None:
+                result = await self._write_direct_turn(graph, options, session_id, content, direct)
+            else:
+                result = await graph.ainvoke(turn_input(session_id, content, first_turn), **options)
+        except asyncio.CancelledError:
+            await self._abandon_turn(session, graph, options, assistant_msg_id, None, "request", client_id)
+            raise
+        except BudgetExceededError as e:
+            # stopped before its next LLM call: what it used until then is still spent
+            await self._spend(session.session_id, session.agent_config.model, client_id, e.details.get("usage", {}))
+            raise
         except Exception as e:
             logger.error(f"Agent execution failed: {e}", exc_info=True)
             raise ProviderError(f"Agent execution failed: {str(e)}")
 
         latency_ms = (time.time() - start_time) * 1000
 
-        # grab the final assistant response
-        assistant_content = ""
-        for msg in reversed(result.get("messages", [])):
-            if isinstance(msg, AIMessage) and msg.content and not msg.tool_calls:
-                assistant_content = msg.content
-                break
-        if not assistant_content:
-            for msg in reversed(result.get("messages", [])):
-                if isinstance(msg, AIMessage) and msg.content:
-                    assistant_content = msg.content
-                    break
-
-        tool_calls = [{"tool_name": tc["tool_name"], "input": tc["input"], "output_summary": tc["output_summary"]} for tc in result.get("tool_calls", [])]
+        assistant_content, tool_calls = final_answer(result)
         usage = result.get("usage", {})
+        self._note_turn_tokens(session.agent_config.model, usage.get("total_tokens", 0))
+        await self._spend(session.session_id, session.agent_config.model, client_id, usage)
 
         assistant_record = {
             "message_id": assistant_msg_id, "role": "assistant", "content": assistant_content,
             "created_at": datetime.now(timezone.utc), "tool_calls": tool_calls, "usage": usage,
         }
-        session.history.append(assistant_record)
+        await self._append_history(session_id, assistant_record)
 
         logger.info(f"Message processed in {latency_ms:.0f}ms, tools={len(tool_calls)}")
 
@@ -120,19 +339,201 @@ class SessionManager:
             "latency_ms": round(latency_ms, 2), "created_at": assistant_record["created_at"],
         }
 
-    def get_history(self, session_id: str) -> dict:
-        session = self._get_active_session(session_id)
-        return {"session_id": session_id, "message_count": len(session.history), "messages": session.history}
+    async def stream_message(self, session_id: str, content: str, supersede: bool | None = None,
+                             durability: str | None = None, client_id: str | None = None) -> AsyncIterator[dict]:
+        """Payloads for one streamed turn (see `stream_turn`); API errors end it with an `error` payload.
+
+        The turn runs in its own task, so a consumer that goes away cancels the graph run and the
+        turn is closed (see `_abandon_turn`) before the next one for the session starts.
+        """
+        async with aclosing(detach(self._queued_stream_turn(session_id, content, supersede, durability, client_id=client_id))) as payloads:
+            async for payload in payloads:
+                yield payload
+
+    def open_stream(self, session_id: str, content: str, supersede: bool | None = None, durability: str | None = None,
+                    client_id: str | None = None) -> TurnStream:
+        """Start a streamed turn whose payloads are buffered so a dropped client can resume it (see `resume_stream`)."""
+        msg_id = f"msg_{uuid.uuid4().hex[:8]}"
+        return self.streams.open(session_id, msg_id, self._queued_stream_turn(session_id, content, supersede, durability, msg_id, client_id))
+
+    async def resume_stream(self, session_id: str, last_event_id: str) -> AsyncIterator[dict]:
+        """Payloads after `last_event_id`, live if the turn is still running on this worker."""
+        try:
+            msg_id, seq = parse_event_id(last_event_id)
+        except ValueError:
+            raise InvalidRequestError(f"Malformed Last-Event-ID '{last_event_id}'.")
+        stream = self.streams.get(msg_id)
+        if stream is not None and stream.session_id == session_id:
+            record_stream_resume("live" if not stream.done else "buffered")
+            return stream.subscribe(after=seq)
+
+        # buffer gone (expired, evicted or another worker's): a finished turn is still in the history
+        for record in reversed(await self.store.get_history(session_id)):
+            if record["message_id"] == msg_id and record["role"] == "assistant":
+                record_stream_resume("history")
+                return self._replay_record(record)
+        record_stream_resume("not_found")
+        raise StreamNotFoundError(f"No resumable stream '{msg_id}' for session '{session_id}'.")
 
-    def delete_session(self, session_id: str) -> dict:
-        session = self._get_active_session(session_id)
-        session.status = "terminated"
+    @staticmethod
+    async def _replay_record(record: dict) -> AsyncIterator[dict]:
+        yield {"event": "snapshot", "message_id": record["message_id"], "content": record["content"],
+               "tool_calls": [{"tool_name": tc["tool_name"], "output_summary": tc["output_summary"]} for tc in record.get("tool_calls", [])]}
+        yield {"event": "done", "message_id": record["message_id"], "usage": record.get("usage", {}), **({"status": record["status"]} if "status" in record else {})}
+
+    async def _queued_stream_turn(self, session_id: str, content: str, supersede: bool | None, durability: str | None,
+                                  msg_id: str | None = None, client_id: str | None = None) -> AsyncIterator[dict]:
+        try:
+            async with self.turns.turn(session_id, supersede=supersede), self._lease(session_id), self.admission.slot():
+                async with aclosing(self._stream_turn(session_id, content, durability, msg_id, client_id)) as payloads:
+                    async for payload in payloads:
+                        yield payload
+        except AppError as e:
+            yield {"event": "error", "code": e.error_code, "message": e.message,
+                   **({"retry_after": e.details["retry_after"]} if "retry_after" in e.details else {})}
+
+    async def _stream_turn(self, session_id: str, content: str, durability: str | None = None, msg_id: str | None = None,
+                           client_id: str | None = None) -> AsyncIterator[dict]:
+        session = await self._get_active_session(session_id)
+        budget = await self.check_budget(session, client_id)
+        graph = self._get_or_build_graph(session.agent_config)
+        start = time.time()
+        msg_id = msg_id or f"msg_{uuid.uuid4().hex[:8]}"
+        output = TurnOutput()
+
+        first_turn = await self.store.increment_messages(session_id) == 1
+        await self._append_history(session_id, {"message_id": f"msg_{uuid.uuid4().hex[:8]}", "role": "user", "content": content, "created_at": datetime.now(timezone.utc)})
+
+        options = self.run_options(session, durability, budget)
+        direct = self._direct_answer(session.agent_config, content)
+        try:
+            yield {"event": "start", "message_id": msg_id}
+            if direct is not None:
+                await self._write_direct_turn(graph, options, session_id, content, direct)
+                tool_call = direct.tool_call
+                output.tool_calls.append({"tool_name": tool_call["tool_name"], "input": tool_call["input"], "output_summary": tool_call["output_summary"]})
+                output.parts.append(direct.content)
+                yield {"event": "tool_end", "tool_name": tool_call["tool_name"], "output_summary": tool_call["output_summary"]}
+                yield {"event": "token", "content": direct.content}
+            else:
+                async with aclosing(stream_turn(graph, turn_input(session_id, content, first_turn), output, **options)) as payloads:
+                    async for payload in payloads:
+                        yield payload
+        except BudgetExceededError as e:
+            await self._spend(session.session_id, session.agent_config.model, client_id, {**empty_usage(), **output.usage})
+            yield {"event": "error", "code": e.error_code, "message": e.message}
+            return
+        except Exception as e:
+            logger.error(f"Streaming error: {e}", exc_info=True)
+            yield {"event": "error", "message": str(e)}
+            return
+        except (asyncio.CancelledError, GeneratorExit):
+            # cancelled inside the graph run, or closed while waiting for the consumer to read
+            await self._abandon_turn(session, graph, options, msg_id, output, "stream", client_id)
+            raise
+
+        latency_ms = (time.time() - start) * 1000
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "llm_calls": 0, **output.usage}
+        if usage["total_tokens"] > 0:
+            record_token_usage(session.agent_config.model, usage["prompt_tokens"], usage["completion_tokens"])
+        self._note_turn_tokens(session.agent_config.model, usage["total_tokens"])
+        await self._spend(session.session_id, session.agent_config.model, client_id, usage)
+        await self._append_history(session_id, {"message_id": msg_id, "role": "assistant", "content": output.content, "created_at": datetime.now(timezone.utc), "tool_calls": output.tool_calls, "usage": usage})
+        yield {"event": "done", "message_id": msg_id, "latency_ms": round(latency_ms, 2), "usage": usage}
+
+    async def run_batch(self, items: list[tuple[str, AgentConfig]], concurrency: int, client_id: str | None = None) -> AsyncIterator[dict]:
+        """Results of independent one-turn prompts as they complete, at most `concurrency` running at once.
+
+        Each item runs on an ephemeral session: nothing goes to the session store, and its graph has
+        no checkpointer, so nothing is left behind. Usage is charged to the client. A failed item
+        yields an error result and the others carry on.
+        """
+        pending = iter(enumerate(items))
+        results: asyncio.Queue[dict] = asyncio.Queue()
+
+        async def worker() -> None:
+            for index, (content, config) in pending:
+                results.put_nowait({"index": index, **await self._run_ephemeral_turn(content, config, client_id)})
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(items)))]
+        try:
+            for _ in items:
+                yield await results.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _run_ephemeral_turn(self, content: str, config: AgentConfig, client_id: str | None) -> dict:
+        session_id = f"eph_{uuid.uuid4().hex[:12]}"
+        start = time.time()
+        try:
+            if config.model.startswith(FAKE_MODEL_PREFIX) and not self.fake_llm_enabled:
+                raise InvalidRequestError(f"Model {config.model} is not available on this server.")
+            budget = await self.ledger.budget(session_id, client_id, config.model)
+            try:
+                graph = self._get_or_build_graph(config, ephemeral=True)
+            except ValueError as e:
+                # unknown model prefix or latency spec: batch items are not validated like session configs
+                raise InvalidRequestError(str(e))
+            # config only: without a checkpointer there is no durability to choose
+            options = turn_run_options(session_id, self.durability, config.answer_cache, self._callbacks, budget)
+            direct = self._direct_answer(config, content)
+            async with self.admission.slot():
+                try:
+                    if direct is not None:
+                        # no checkpoint to write for an ephemeral session
+                        result = self._direct_state(session_id, content, direct)
+                    else:
+                        result = await graph.ainvoke(turn_input(session_id, content, first_turn=True), config=options["config"])
+                except BudgetExceededError as e:
+                    await self._spend(None, config.model, client_id, e.details.get("usage", {}))
+                    raise
+                except AppError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Agent execution failed: {e}", exc_info=True)
+                    raise ProviderError(f"Agent execution failed: {str(e)}")
+        except AppError as e:
+            record_batch_item("error")
+            return {"status": "error", "error": {"code": e.error_code, "message": e.message}}
+        except Exception as e:
+            # anything else fails this item only; the batch still ends with a result per item
+            logger.error(f"Batch item failed: {e}", exc_info=True)
+            record_batch_item("error")
+            return {"status": "error", "error": {"code": AppError.error_code, "message": AppError.message}}
+
+        answer, tool_calls = final_answer(result)
+        usage = {**empty_usage(), **result.get("usage", {})}
+        if usage["total_tokens"] > 0:
+            record_token_usage(config.model, usage["prompt_tokens"], usage["completion_tokens"])
+        self._note_turn_tokens(config.model, usage["total_tokens"])
+        await self._spend(None, config.model, client_id, usage)
+        record_batch_item("ok")
+        return {"status": "ok", "content": answer, "tool_calls": tool_calls, "usage": usage, "latency_ms": round((time.time() - start) * 1000, 2)}
+
+    async def get_history(self, session_id: str) -> dict:
+        await self._get_active_session(session_id)
+        history = await self.store.get_history(session_id)
+        return {"session_id": session_id, "message_count": len(history), "messages": history}
+
+    async def delete_session(self, session_id: str) -> dict:
+        # optimistic update: re-read and retry if another worker changed the session meanwhile
+        for attempt in range(3):
+            session = await self._get_active_session(session_id)
+            try:
+                await self.store.update(session, status="terminated")
+                break
+            except SessionConflictError:
+                if attempt == 2:
+                    raise
         logger.info(f"Session terminated: {session_id}")
         return {"session_id": session_id, "status": "terminated", "deleted_at": datetime.now(timezone.utc)}
 
-    def get_session(self, session_id: str) -> SessionData:
-        return self._get_active_session(session_id)
+    async def get_session(self, session_id: str) -> SessionData:
+        return await self._get_active_session(session_id)
 
-    @property
-    def active_session_count(self) -> int:
-        return sum(1 for s in self.sessions.values() if s.status == "active")
+    async def close(self) -> None:
+        await self.jobs.close()
+        await self.checkpointer.flush()
+        await self.store.close()
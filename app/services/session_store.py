@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.api.schemas.requests import AgentConfig
+from app.core.exceptions import SessionConflictError, SessionNotFoundError
+from app.services.checkpoint_store import KVCheckpointSaver
+from app.services.kv_backend import KVBackend
+
+
+class SessionData:
+    def __init__(self, session_id: str, agent_config: AgentConfig):
+        self.session_id = session_id
+        self.agent_config = agent_config
+        self.created_at = datetime.now(timezone.utc)
+        self.status = "active"
+        self.message_counter = 0
+        self.version = 0
+        self.history: list[dict] = []
+
+
+class SessionStore(ABC):
+    """Where sessions, their history and their LangGraph checkpoints live."""
+
+    @abstractmethod
+    def create_checkpointer(self, serde: Any = None) -> Any: ...
+
+    @abstractmethod
+    async def create(self, session: SessionData) -> None: ...
+
+    @abstractmethod
+    async def get(self, session_id: str) -> SessionData | None: ...
+
+    @abstractmethod
+    async def update(self, session: SessionData, **changes: Any) -> SessionData:
+        """Apply `changes` if nobody else updated the session since it was read.
+
+        Raises `SessionConflictError` when the stored version moved on.
+        """
+
+    @abstractmethod
+    async def increment_messages(self, session_id: str) -> int: ...
+
+    @abstractmethod
+    async def append_history(self, session_id: str, *records: dict) -> None: ...
+
+    @abstractmethod
+    async def get_history(self, session_id: str) -> list[dict]: ...
+
+    async def ping(self) -> bool:
+        return True
+
+    async def close(self) -> None:
+        return None
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store; state is lost on restart and not shared between workers."""
+
+    def __init__(self):
+        self.sessions: dict[str, SessionData] = {}
+
+    def create_checkpointer(self, serde: Any = None) -> Any:
+        return MemorySaver(serde=serde)
+
+    async def create(self, session: SessionData) -> None:
+        self.sessions[session.session_id] = session
+
+    async def get(self, session_id: str) -> SessionData | None:
+        return self.sessions.get(session_id)
+
+    async def update(self, session: SessionData, **changes: Any) -> SessionData:
+        current = self.sessions.get(session.session_id)
+        if current is None or current.version != session.version:
+            raise SessionConflictError(f"Session '{session.session_id}' was modified concurrently.")
+        for name, value in changes.items():
+            setattr(current, name, value)
+        current.version += 1
+        return current
+
+    async def increment_messages(self, session_id: str) -> int:
+        session = self.sessions[session_id]
+        session.message_counter += 1
+        return session.message_counter
+
+    async def append_history(self, session_id: str, *records: dict) -> None:
+        self.sessions[session_id].history.extend(records)
+
+    async def get_history(self, session_id: str) -> list[dict]:
+        return self.sessions[session_id].history
+
+
+def _encode_record(record: dict) -> bytes:
+    return json.dumps({**record, "created_at": record["created_at"].isoformat()}).encode()
+
+
+def _decode_record(raw: bytes) -> dict:
+    record = json.loads(raw)
+    record["created_at"] = datetime.fromisoformat(record["created_at"])
+    return record
+
+
+class SharedSessionStore(SessionStore):
+    """Store backed by a `KVBackend` so any worker can serve any session.
+
+    Session metadata is a hash guarded by a `version` field (compare-and-set on update),
+    history is an append-only list, and checkpoints go through `KVCheckpointSaver` on the
+    same backend. Reads of session metadata are served from a small per-worker LRU for
+    `cache_ttl_seconds`; writes always go to the backend and refresh the local entry.
+    """
+
+    def __init__(self, backend: KVBackend, *, key_prefix: str = "cyndx:", ttl_seconds: int | None = None,
+                 cache_ttl_seconds: float = 2.0, cache_size: int = 1024):
+        self.backend = backend
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, tuple[float, SessionData]] = OrderedDict()
+
+    def create_checkpointer(self, serde: Any = None) -> Any:
+        return KVCheckpointSaver(self.backend, key_prefix=self.key_prefix, ttl_seconds=self.ttl_seconds, serde=serde)
+
+    def _session_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}session:{session_id}"
+
+    def _history_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}history:{session_id}"
+
+    def _cache_put(self, session: SessionData) -> None:
+        self._cache[session.session_id] = (time.monotonic() + self.cache_ttl_seconds, session)
+        self._cache.move_to_end(session.session_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _expire(self, *keys: str) -> None:
+        if self.ttl_seconds:
+            for key in keys:
+                await self.backend.expire(key, self.ttl_seconds)
+
+    @staticmethod
+    def _encode(session: SessionData) -> dict[str, bytes]:
+        return {
+            "agent_config": session.agent_config.model_dump_json().encode(),
+            "created_at": session.created_at.isoformat().encode(),
+            "status": session.status.encode(),
+            "message_counter": str(session.message_counter).encode(),
+            "version": str(session.version).encode(),
+        }
+
+    @staticmethod
+    def _decode(session_id: str, fields: dict[str, bytes]) -> SessionData:
+        session = SessionData(session_id, AgentConfig.model_validate_json(fields["agent_config"]))
+        session.created_at = datetime.fromisoformat(fields["created_at"].decode())
+        session.status = fields["status"].decode()
+        session.message_counter = int(fields.get("message_counter", b"0"))
+        session.version = int(fields["version"])
+        return session
+
+    async def create(self, session: SessionData) -> None:
+        key = self._session_key(session.session_id)
+        await self.backend.hset(key, self._encode(session))
+        await self._expire(key)
+        self._cache_put(session)
+
+    async def get(self, session_id: str) -> SessionData | None:
+        cached = self._cache.get(session_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        fields = await self.backend.hgetall(self._session_key(session_id))
+        if not fields:
+            self._cache.pop(session_id, None)
+            return None
+        session = self._decode(session_id, fields)
+        self._cache_put(session)
+        return session
+
+    async def update(self, session: SessionData, **changes: Any) -> SessionData:
+        updated = self._decode(session.session_id, self._encode(session))
+        for name, value in changes.items():
+            setattr(updated, name, value)
+        updated.version = session.version + 1
+
+        fields = {k: v for k, v in self._encode(updated).items() if k in (*changes, "version")}
+        ok = await self.backend.hcas(self._session_key(session.session_id), "version", str(session.version).encode(), fields)
+        if not ok:
+            self._cache.pop(session.session_id, None)
+            raise SessionConflictError(f"Session '{session.session_id}' was modified concurrently.")
+        self._cache_put(updated)
+        return updated
+
+    async def increment_messages(self, session_id: str) -> int:
+        # not part of the versioned state: compare-and-set on the counter itself, which also
+        # refuses to recreate a session hash that has expired (a bare HINCRBY would)
+        key = self._session_key(session_id)
+        while True:
+            current = await self.backend.hget(key, "message_counter")
+            if current is None:
+                self._cache.pop(session_id, None)
+                raise SessionNotFoundError(f"No active session found with ID '{session_id}'.")
+            count = int(current) + 1
+            if await self.backend.hcas(key, "message_counter", current, {"message_counter": str(count).encode()}):
+                break
+        cached = self._cache.get(session_id)
+        if cached:
+            session = self._decode(session_id, self._encode(cached[1]))
+            session.message_counter = count
+            self._cache_put(session)
+        return count
+
+    async def append_history(self, session_id: str, *records: dict) -> None:
+        key = self._history_key(session_id)
+        await self.backend.rpush(key, *(_encode_record(r) for r in records))
+        await self._expire(key, self._session_key(session_id))
+
+    async def get_history(self, session_id: str) -> list[dict]:
+        return [_decode_record(raw) for raw in await self.backend.lrange(self._history_key(session_id), 0, -1)]
+
+    async def ping(self) -> bool:
+        return await self.backend.ping()
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def create_session_store(settings: Any) -> SessionStore:
+    if settings.session_store_backend == "memory":
+        return InMemorySessionStore()
+    if settings.session_store_backend == "redis":
+        from app.services.kv_backend import RedisKVBackend
+
+        return SharedSessionStore(
+            RedisKVBackend(settings.redis_url),
+            key_prefix=settings.redis_key_prefix,
+            ttl_seconds=settings.session_ttl_seconds or None,
+            cache_ttl_seconds=settings.session_cache_ttl_seconds,
+        )
+    raise ValueError(f"Unknown session store backend: {settings.session_store_backend}. Supported: ['memory', 'redis']")
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+
+logger = logging.getLogger(__name__)
+
+_FRAME_OVERHEAD = 96  # rough per-frame cost of the dict and deque slot, in bytes
+
+
+def _frame_size(payload: dict) -> int:
+    content = payload.get("content")
+    return _FRAME_OVERHEAD + (len(content) if isinstance(content, str) else 0)
+
+
+def parse_event_id(event_id: str) -> tuple[str, int]:
+    """`msg_…:<seq>` → (message id, sequence number); ValueError if malformed."""
+    message_id, _, seq = event_id.strip().rpartition(":")
+    if not message_id:
+        raise ValueError(event_id)
+    return message_id, int(seq)
+
+
+class TurnStream:
+    """Payloads of one streamed turn, numbered and kept in a ring buffer so clients can reattach.
+
+    The turn runs in its own task and appends to the buffer whether or not anyone is reading.
+    Subscribers replay what they missed and then follow the live run; if their position already
+    fell out of the ring they get one `snapshot` payload with the answer so far instead.
+    """
+
+    def __init__(self, buffers: StreamBuffers, session_id: str, message_id: str):
+        self.buffers = buffers
+        self.session_id = session_id
+        self.message_id = message_id
+        self.frames: deque[tuple[int, dict]] = deque()
+        self.seq = 0
+        self.size = 0
+        self.parts: list[str] = []
+        self.tool_calls: list[dict] = []
+        self.done = False
+        self.finished_at = 0.0
+        self.subscribers = 0
+        self.task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+        self._abandon: asyncio.TimerHandle | None = None
+
+    def start(self, payloads: AsyncIterator[dict]) -> None:
+        self.task = asyncio.create_task(self._run(payloads))
+
+    async def _run(self, payloads: AsyncIterator[dict]) -> None:
+        try:
+            async with aclosing(payloads):
+                async for payload in payloads:
+                    self.append(payload)
+        except Exception as e:
+            logger.error(f"Stream for {self.message_id} failed: {e}", exc_info=True)
+            self.append({"event": "error", "message": str(e)})
+        finally:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._wake.set()
+
+    def append(self, payload: dict) -> None:
+        self.seq += 1
+        self.frames.append((self.seq, payload))
+        size = _frame_size(payload)
+        if payload.get("event") == "token":
+            self.parts.append(payload["content"])
+        elif payload.get("event") == "tool_end":
+            self.tool_calls.append({"tool_name": payload["tool_name"], "output_summary": payload["output_summary"]})
+        self.size += size
+        if len(self.frames) > self.buffers.max_frames:
+            self.drop_oldest()
+        self.buffers.grew(size)
+        self._wake.set()
+        self._wake = asyncio.Event()
+
+    def drop_oldest(self) -> int:
+        _, payload = self.frames.popleft()
+        size = _frame_size(payload)
+        self.size -= size
+        self.buffers.total_bytes -= size
+        return size
+
+    def snapshot(self) -> dict:
+        return {"event": "snapshot", "message_id": self.message_id, "content": "".join(self.parts), "tool_calls": list(self.tool_calls),
+                "event_id": f"{self.message_id}:{self.seq}"}
+
+    async def subscribe(self, after: int = 0) -> AsyncIterator[dict]:
+        """Payloads with a sequence number above `after`, tagged with their `event_id`, until the turn ends."""
+        self.subscribers += 1
+        if self._abandon is not None:
+            self._abandon.cancel()
+            self._abandon = None
+        try:
+            next_seq = after + 1
+            while True:
+                while next_seq <= self.seq:
+                    oldest = self.frames[0][0] if self.frames else self.seq + 1
+                    if next_seq < oldest:
+                        yield self.snapshot()
+                        next_seq = self.seq + 1
+                        continue
+                    seq, payload = self.frames[next_seq - oldest]
+                    next_seq += 1
+                    yield {**payload, "event_id": f"{self.message_id}:{seq}"}
+                if self.done:
+                    return
+                await self._wake.wait()
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers and not self.done:
+                self._schedule_abandon()
+
+    def _schedule_abandon(self) -> None:
+        # nobody is reading: give the client `resume_grace_seconds` to reconnect before the run is cancelled
+        grace = self.buffers.resume_grace_seconds
+        if grace <= 0:
+            self.cancel()
+        else:
+            self._abandon = asyncio.get_running_loop().call_later(grace, self.cancel)
+
+    def cancel(self) -> None:
+        self._abandon = None
+        if self.task is not None and not self.task.done():
+            logger.info(f"No subscriber came back for {self.message_id}; cancelling its turn")
+            self.task.cancel()
+
+
+class StreamBuffers:
+    """Per-worker registry of `TurnStream`s, bounded by age and total size.
+
+    A stream stays resumable for `ttl_seconds` after its turn ends. When the buffered bytes
+    across all streams exceed `max_bytes`, finished streams go first (oldest first), then the
+    oldest frames of running ones — those subscribers fall back to a snapshot.
+    """
+
+    def __init__(self, max_frames: int = 512, max_bytes: int = 16 * 1024 * 1024, ttl_seconds: float = 60.0,
+                 resume_grace_seconds: float = 30.0):
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.resume_grace_seconds = resume_grace_seconds
+        self.total_bytes = 0
+        self._streams: OrderedDict[str, TurnStream] = OrderedDict()
+
+    def open(self, session_id: str, message_id: str, payloads: AsyncIterator[dict]) -> TurnStream:
+        self.evict_expired()
+        stream = TurnStream(self, session_id, message_id)
+        self._streams[message_id] = stream
+        stream.start(payloads)
+        return stream
+
+    def get(self, message_id: str) -> TurnStream | None:
+        self.evict_expired()
+        return self._streams.get(message_id)
+
+    def grew(self, size: int) -> None:
+        self.total_bytes += size
+        if self.total_bytes > self.max_bytes:
+            self._shrink()
+
+    def _remove(self, message_id: str) -> None:
+        stream = self._streams.pop(message_id)
+        self.total_bytes -= stream.size
+
+    def evict_expired(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        for message_id in [m for m, s in self._streams.items() if s.done and s.finished_at < cutoff]:
+            self._remove(message_id)
+
+    def _shrink(self) -> None:
+        for message_id in [m for m, s in self._streams.items() if s.done]:
+            if self.total_bytes <= self.max_bytes:
+                return
+            self._remove(message_id)
+        for stream in list(self._streams.values()):
+            while stream.frames and self.total_bytes > self.max_bytes:
+                stream.drop_oldest()
+            if self.total_bytes <= self.max_bytes:
+                return
+
+    def bytes_by_session(self) -> dict[str, int]:
+        sizes: dict[str, int] = {}
+        for stream in self._streams.values():
+            sizes[stream.session_id] = sizes.get(stream.session_id, 0) + stream.size
+        return sizes
+
+    def stats(self) -> dict[str, int]:
+        return {"streams": len(self._streams), "live": sum(not s.done for s in self._streams.values()), "bytes": self.total_bytes}
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import zlib
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from typing import Any
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from app.agent.state import add_usage
+
+try:  # optional speedup, `pip install .[speedups]`
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+_END = object()
+
+# progress stage announced when each graph node starts
+NODE_STAGES = {"router": "routing", "tool_executor": "tools", "synthesizer": "synthesizing", "quality_gate": "checking"}
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def sse_frame(payload: dict) -> bytes:
+    if "event_id" in payload:
+        # resumable streams: the id goes on the SSE `id:` line, where clients pick it up for Last-Event-ID
+        data = {k: v for k, v in payload.items() if k != "event_id"}
+        return b"id: " + payload["event_id"].encode() + b"\ndata: " + dumps(data) + b"\n\n"
+    return b"data: " + dumps(payload) + b"\n\n"
+
+
+def resolve_stream_options(options: Any, settings: Any) -> tuple[float, int, bool]:
+    """(coalesce window ms, coalesce bytes, compress) from per-request `StreamOptions` over the settings defaults."""
+    window_ms = settings.stream_coalesce_ms if options is None or options.coalesce_ms is None else options.coalesce_ms
+    max_bytes = settings.stream_coalesce_bytes if options is None or options.coalesce_bytes is None else options.coalesce_bytes
+    compress = settings.stream_compression if options is None or options.compress is None else options.compress
+    return window_ms, max_bytes, compress
+
+
+def _is_plain_token(payload: dict) -> bool:
+    # tokens carrying extra fields (e.g. cached answers) are forwarded as-is
+    return payload.get("event") == "token" and len(payload) == (3 if "event_id" in payload else 2)
+
+
+async def coalesce_tokens(payloads: AsyncIterator[dict], window_ms: float = 0, max_bytes: int = 0) -> AsyncIterator[dict]:
+    """Merge consecutive `token` payloads into one.
+
+    A merged token is emitted once `window_ms` has passed since its first chunk (even if the
+    model stalls), once it reaches `max_bytes`, or right before any other payload. With both
+    limits at 0 every chunk is forwarded on its own.
+    """
+    if window_ms <= 0 and max_bytes <= 0:
+        async for payload in payloads:
+            yield payload
+        return
+
+    parts: list[str] = []
+    size = 0
+    event_id = None  # a merged token takes the id of its last chunk
+
+    def flush() -> dict:
+        nonlocal parts, size
+        merged = {"event": "token", "content": "".join(parts)}
+        if event_id is not None:
+            merged["event_id"] = event_id
+        parts, size = [], 0
+        return merged
+
+    if window_ms <= 0:
+        async for payload in payloads:
+            if _is_plain_token(payload):
+                parts.append(payload["content"])
+                size += len(payload["content"].encode())
+                event_id = payload.get("event_id")
+                if size >= max_bytes:
+                    yield flush()
+                continue
+            if parts:
+                yield flush()
+            yield payload
+        if parts:
+            yield flush()
+        return
+
+    # the source runs in its own task so a stalled model can't hold back a due flush; the
+    # consumer sleeps once per frame and then drains whatever queued up meanwhile
+    queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+
+    async def pump() -> None:
+        try:
+            async with aclosing(payloads):
+                async for payload in payloads:
+                    await queue.put(payload)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(_END)
+
+    pump_task = asyncio.create_task(pump())
+    loop = asyncio.get_running_loop()
+    window = window_ms / 1000
+    deadline = 0.0
+    try:
+        while True:
+            item = await queue.get()
+            while True:
+                if item is _END or isinstance(item, Exception):
+                    if parts:
+                        yield flush()
+                    if item is _END:
+                        return
+                    raise item
+                if not _is_plain_token(item):
+                    if parts:
+                        yield flush()
+                    yield item
+                    break
+                if not parts:
+                    deadline = loop.time() + window
+                parts.append(item["content"])
+                size += len(item["content"].encode())
+                event_id = item.get("event_id")
+                if max_bytes > 0 and size >= max_bytes:
+                    yield flush()
+                if queue.empty():
+                    if not parts:
+                        break
+                    delay = deadline - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    if queue.empty():
+                        yield flush()
+                        break
+                item = queue.get_nowait()
+    finally:
+        if not pump_task.done():
+            pump_task.cancel()
+
+
+async def encode_sse(payloads: AsyncIterator[dict], compress: bool = False) -> AsyncIterator[bytes]:
+    """SSE-encode payloads, optionally as one gzip stream flushed after every frame."""
+    if not compress:
+        async for payload in payloads:
+            yield sse_frame(payload)
+        return
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for payload in payloads:
+        yield gz.compress(sse_frame(payload)) + gz.flush(zlib.Z_SYNC_FLUSH)
+    yield gz.flush()
+
+
+async def detach(payloads: AsyncIterator[dict], maxsize: int = 256) -> AsyncIterator[dict]:
+    """Iterate `payloads` from its own task.
+
+    When the consumer goes away (a server cancelling the response on client disconnect, a closed
+    socket) the producer gets one plain cancellation and its cleanup runs to completion, instead
+    of being interrupted at every await by the server's cancel scope.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    async def pump() -> None:
+        try:
+            async with aclosing(payloads):
+                async for payload in payloads:
+                    await queue.put(payload)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(_END)
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+class TurnOutput:
+    """What a streamed turn produced, filled in while `stream_turn` runs."""
+
+    def __init__(self):
+        self.parts: list[str] = []
+        self.tool_calls: list[dict] = []
+        self.usage: dict = {}
+
+    @property
+    def content(self) -> str:
+        return "".join(self.parts)
+
+
+def message_text(message: Any) -> str:
+    """A message's text content; `.text` is a method before langchain-core 1.0 and a property after."""
+    text = message.text
+    return text if isinstance(text, str) else text()
+
+
+async def stream_turn(graph: Any, graph_input: dict, output: TurnOutput, **run_options: Any) -> AsyncIterator[dict]:
+    """Client payloads for one turn, from `graph.astream` instead of the callback event firehose.
+
+    Only synthesizer message chunks become `token` payloads; each node start becomes a
+    `progress` payload and tool events come from the tool executor's stream writer.
+    """
+    async with aclosing(graph.astream(graph_input, stream_mode=["tasks", "messages", "custom"], **run_options)) as events:
+        async for mode, data in events:
+            if mode == "messages":
+                message, meta = data
+                if meta.get("langgraph_node") != "synthesizer" or not isinstance(message, (AIMessageChunk, AIMessage)):
+                    continue
+                text = message_text(message)
+                if not text:
+                    continue
+                output.parts.append(text)
+                if message.response_metadata.get("answer_cache") == "hit":
+                    yield {"event": "token", "content": text, "cached": True}
+                else:
+                    yield {"event": "token", "content": text}
+            elif mode == "tasks":
+                if "result" not in data:
+                    if data["name"] in NODE_STAGES:
+                        yield {"event": "progress", "stage": NODE_STAGES[data["name"]]}
+                elif data.get("error") is None and isinstance(data["result"], dict) and "usage" in data["result"]:
+                    output.usage = add_usage(output.usage, data["result"]["usage"])
+            elif mode == "custom" and isinstance(data, dict) and "event" in data:
+                if data["event"] == "tool_end":
+                    output.tool_calls.append({"tool_name": data["tool_name"], "input": data.get("input", {}), "output_summary": data["output_summary"]})
+                    yield {"event": "tool_end", "tool_name": data["tool_name"], "output_summary": data["output_summary"]}
+                else:
+                    yield data
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import math
+from typing import Any
+
+from opentelemetry import metrics
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import Histogram, MetricReader, MetricsData, Sum
+from opentelemetry.sdk.resources import Resource
+
+try:  # optional, `pip install .[otlp]`
+    from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
+except ImportError:  # pragma: no cover - depends on the environment
+    OTLPMetricExporter = None
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_reader: SnapshotReader | None = None
+
+
+class SnapshotReader(MetricReader):
+    """Pull reader: collects cumulative data on demand, for `/metrics` scrapes and the OTLP pusher alike."""
+
+    def __init__(self):
+        super().__init__()
+        self._data: MetricsData | None = None
+
+    def _receive_metrics(self, metrics_data: MetricsData, timeout_millis: float = 10_000, **kwargs: Any) -> None:
+        self._data = metrics_data
+
+    def snapshot(self) -> MetricsData | None:
+        self.collect()
+        data, self._data = self._data, None
+        return data
+
+    def shutdown(self, timeout_millis: float = 30_000, **kwargs: Any) -> None:
+        pass
+
+
+def _number(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_pairs(attributes: Any) -> str:
+    return ",".join(f'{key.replace(".", "_")}="{_escape(value)}"' for key, value in attributes.items()) if attributes else ""
+
+
+@functools.lru_cache(maxsize=64)
+def _le_values(bounds: tuple[float, ...]) -> tuple[str, ...]:
+    return (*(f'le="{_number(float(b))}"' for b in bounds), 'le="+Inf"')
+
+
+def render_prometheus(data: MetricsData | None) -> str:
+    """Prometheus text exposition (0.0.4) of cumulative OpenTelemetry data, in one pass.
+
+    Histograms become `_bucket`/`_sum`/`_count` series, monotonic sums counters (named `_total`)
+    and up-down counters gauges. Labels are rendered once per series, not once per bucket.
+    """
+    lines: list[str] = []
+    seen: set[str] = set()
+    for resource_metrics in data.resource_metrics if data else ():
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                points, name = metric.data.data_points, metric.name.replace(".", "_").replace("-", "_")
+                if not points:
+                    continue
+                if isinstance(metric.data, Histogram):
+                    kind = "histogram"
+                elif isinstance(metric.data, Sum) and metric.data.is_monotonic:
+                    kind, name = "counter", name if name.endswith("_total") else f"{name}_total"
+                else:
+                    kind = "gauge"
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {metric.description.replace(chr(10), ' ')}")
+                    lines.append(f"# TYPE {name} {kind}")
+                for p in points:
+                    pairs = _label_pairs(p.attributes)
+                    labels = "{" + pairs + "}" if pairs else ""
+                    if kind != "histogram":
+                        lines.append(f"{name}{labels} {_number(p.value)}")
+                        continue
+                    bucket, cumulative = f"{name}_bucket{{{pairs}," if pairs else f"{name}_bucket{{", 0
+                    for le, count in zip(_le_values(tuple(p.explicit_bounds)), p.bucket_counts):
+                        cumulative += count
+                        lines.append(f"{bucket}{le}}} {cumulative}")
+                    lines.append(f"{name}_sum{labels} {_number(p.sum)}")
+                    lines.append(f"{name}_count{labels} {p.count}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def setup_metrics(settings: Any) -> SnapshotReader | None:
+    """Install the process-wide meter provider so the instruments in `metrics.py` start recording.
+
+    OpenTelemetry allows one global provider per process, so this is done once and later calls
+    (another app instance, as in tests) reuse it. Returns None when neither `/metrics` nor OTLP
+    export is enabled, leaving every instrument a no-op.
+    """
+    global _reader
+    if _reader is None and (settings.metrics_enabled or settings.otel_enabled):
+        _reader = SnapshotReader()
+        resource = Resource.create({"service.name": settings.otel_service_name, "service.version": settings.app_version})
+        metrics.set_meter_provider(MeterProvider(metric_readers=[_reader], resource=resource))
+    return _reader
+
+
+class OTLPPusher:
+    """Pushes a snapshot to an OTLP/HTTP collector every `interval` seconds, and once more on close.
+
+    The export (protobuf encoding and the HTTP call, with the exporter's retries) runs in a
+    worker thread; only collecting the snapshot happens on the event loop.
+    """
+
+    def __init__(self, reader: SnapshotReader, endpoint: str, interval: float = 60.0, exporter: Any = None):
+        if exporter is None:
+            if OTLPMetricExporter is None:
+                raise RuntimeError("OTLP export needs `opentelemetry-exporter-otlp-proto-http` (pip install .[otlp])")
+            # a bare collector address gets the standard OTLP/HTTP metrics path
+            if not endpoint.rstrip("/").endswith("/v1/metrics"):
+                endpoint = endpoint.rstrip("/") + "/v1/metrics"
+            exporter = OTLPMetricExporter(endpoint=endpoint)
+        self.reader, self.exporter, self.interval = reader, exporter, interval
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.push()
+
+    async def push(self) -> bool:
+        data = self.reader.snapshot()
+        if data is None:
+            return False
+        try:
+            result = await asyncio.to_thread(self.exporter.export, data)
+        except Exception as e:
+            logger.warning(f"OTLP metrics export failed: {e}")
+            return False
+        if getattr(result, "name", "SUCCESS") != "SUCCESS":
+            logger.warning(f"OTLP metrics export failed: {result}")
+            return False
+        return True
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.push()
+        await asyncio.to_thread(self.exporter.shutdown)
+
+
+def create_otlp_pusher(settings: Any, reader: SnapshotReader | None) -> OTLPPusher | None:
+    if not settings.otel_enabled or reader is None:
+        return None
+    if not settings.otel_exporter_endpoint:
+        logger.warning("OTEL_ENABLED is set without OTEL_EXPORTER_ENDPOINT; metrics are not pushed")
+        return None
+    return OTLPPusher(reader, settings.otel_exporter_endpoint, settings.otel_export_interval_seconds)
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from app.core.exceptions import SessionBusyError, TurnQueueFullError, TurnSupersededError
+from app.services.kv_backend import KVBackend
+from app.services.metrics import record_turn_queue_wait
+
+logger = logging.getLogger(__name__)
+
+
+class _Lane:
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.active: asyncio.Task | None = None
+        self.waiters: list[asyncio.Task] = []
+        self.superseded: set[asyncio.Task] = set()
+
+
+class TurnQueue:
+    """Runs turns for the same session one at a time, in arrival order.
+
+    Each session gets a lane with a FIFO lock. At most `max_depth` turns may wait behind the
+    running one; further turns are rejected. In supersede mode a new turn cancels the running
+    turn and everything queued ahead of it, so only the newest message gets an answer.
+    """
+
+    def __init__(self, max_depth: int = 4, supersede: bool = False):
+        self.max_depth = max_depth
+        self.supersede = supersede
+        self._lanes: dict[str, _Lane] = {}
+
+    def depth(self, session_id: str) -> int:
+        lane = self._lanes.get(session_id)
+        return len(lane.waiters) if lane else 0
+
+    def check_capacity(self, session_id: str, supersede: bool | None = None) -> None:
+        # a superseding turn never waits behind anything, so it is always admitted
+        supersede = self.supersede if supersede is None else supersede
+        lane = self._lanes.get(session_id)
+        if not supersede and lane and lane.lock.locked() and len(lane.waiters) >= self.max_depth:
+            raise TurnQueueFullError(
+                f"Session '{session_id}' already has {self.max_depth} queued messages.",
+                details={"max_queue_depth": self.max_depth},
+            )
+
+    @asynccontextmanager
+    async def turn(self, session_id: str, supersede: bool | None = None) -> AsyncIterator[None]:
+        self.check_capacity(session_id, supersede)
+        supersede = self.supersede if supersede is None else supersede
+
+        lane = self._lanes.setdefault(session_id, _Lane())
+        task = asyncio.current_task()
+
+        if supersede:
+            for older in [*lane.waiters, lane.active]:
+                if older is not None and older is not task:
+                    lane.superseded.add(older)
+                    older.cancel()
+
+        lane.waiters.append(task)
+        start = time.perf_counter()
+        try:
+            try:
+                await lane.lock.acquire()
+            finally:
+                lane.waiters.remove(task)
+            record_turn_queue_wait((time.perf_counter() - start) * 1000)
+
+            lane.active = task
+            try:
+                yield
+            finally:
+                lane.active = None
+                lane.lock.release()
+        except asyncio.CancelledError:
+            if task not in lane.superseded:
+                raise
+            task.uncancel()
+            logger.info(f"Turn superseded by a newer message: {session_id}")
+            raise TurnSupersededError(f"A newer message for session '{session_id}' superseded this one.")
+        finally:
+            lane.superseded.discard(task)
+            if not lane.waiters and lane.active is None and not lane.lock.locked():
+                self._lanes.pop(session_id, None)
+
+
+_FREE = b"0 -"
+
+
+class SessionLeases:
+    """Runs a session's turns one at a time across workers that share a `KVBackend`.
+
+    `TurnQueue` only orders turns within a worker. A turn also holds the session's lease, a hash
+    field `{deadline} {owner}` taken with set-if-absent, or compare-and-set once the holder has
+    released it or its deadline passed (a crashed worker). The holder renews the deadline every
+    third of `ttl_seconds` while the turn runs. Other workers poll for it for up to
+    `wait_seconds`, then answer 409 `SESSION_BUSY`. Turns are not interleaved, but which worker's
+    waiting turn goes next is not first-come first-served. Deadlines are wall-clock times, so
+    workers' clocks must roughly agree.
+    """
+
+    def __init__(self, backend: KVBackend, *, key_prefix: str = "cyndx:", ttl_seconds: float = 60.0, wait_seconds: float = 30.0,
+                 poll_seconds: float = 0.05):
+        self.backend = backend
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_seconds = poll_seconds
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.key_prefix}turn_lease:{session_id}"
+
+    def _token(self, owner: str) -> bytes:
+        return f"{time.time() + self.ttl_seconds:.3f} {owner}".encode()
+
+    async def _try_acquire(self, key: str, owner: str) -> bytes | None:
+        token = self._token(owner)
+        current = await self.backend.hget(key, "owner")
+        if current is None:
+            acquired = await self.backend.hsetnx(key, "owner", token)
+        elif float(current.split(b" ", 1)[0]) <= time.time():
+            acquired = await self.backend.hcas(key, "owner", current, {"owner": token})
+        else:
+            return None
+        if not acquired:
+            return None
+        await self.backend.expire(key, math.ceil(self.ttl_seconds * 2))
+        return token
+
+    async def _renew(self, key: str, owner: str, held: dict) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3)
+            token = self._token(owner)
+            if not await self.backend.hcas(key, "owner", held["token"], {"owner": token}):
+                logger.warning(f"Lost the turn lease {key}; another worker may run a turn alongside this one")
+                return
+            held["token"] = token
+            await self.backend.expire(key, math.ceil(self.ttl_seconds * 2))
+
+    @asynccontextmanager
+    async def hold(self, session_id: str) -> AsyncIterator[None]:
+        key, owner = self._key(session_id), uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_seconds
+        delay = self.poll_seconds
+        while (token := await self._try_acquire(key, owner)) is None:
+            if time.monotonic() >= deadline:
+                raise SessionBusyError(details={"retry_after": max(1, math.ceil(self.ttl_seconds / 3))})
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+        held = {"token": token}
+        renew = asyncio.create_task(self._renew(key, owner, held))
+        try:
+            yield
+        finally:
+            renew.cancel()
+            await asyncio.gather(renew, return_exceptions=True)
+            try:
+                await self.backend.hcas(key, "owner", held["token"], {"owner": _FREE})
+            except Exception as e:
+                # left to expire at its deadline
+                logger.warning(f"Could not release the turn lease {key}: {e}")
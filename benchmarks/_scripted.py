@@ -0,0 +1,77 @@
+"""Scripted chat model and inputs shared by the benchmarks (no network, no provider keys)."""
+from __future__ import annotations
+
+import json
+import re
+import sys
+from pathlib import Path
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk
+from langgraph.types import Overwrite
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+ANSWER = (
+    "Here is a summary of what I found. The fintech sector saw continued consolidation, with "
+    "payments infrastructure and embedded finance leading deal volume. Several incumbents acquired "
+    "smaller players to expand into cross-border payments and small-business lending. " * 3
+)
+
+
+def _ai(content: str, **kwargs) -> AIMessage:
+    return AIMessage(
+        content=content,
+        response_metadata={"token_usage": {"completion_tokens": 120, "prompt_tokens": 640, "total_tokens": 760},
+                           "model_name": "gpt-4o-mini-2024-07-18", "system_fingerprint": "fp_0ba0d124f1",
+                           "finish_reason": "tool_calls" if kwargs.get("tool_calls") else "stop", "logprobs": None},
+        usage_metadata={"input_tokens": 640, "output_tokens": 120, "total_tokens": 760},
+        **kwargs,
+    )
+
+
+def script(turns: int) -> list[AIMessage]:
+    """Model replies for `turns` turns, alternating plain chat and a calculator round-trip."""
+    replies = []
+    for i in range(turns):
+        if i % 2:
+            replies += [
+                _ai('{"intent": "analysis"}'),
+                _ai("", tool_calls=[{"name": "calculator", "args": {"expression": f"{i} * 1.175"}, "id": f"call_{i:024d}"}]),
+                _ai(ANSWER),
+                _ai('{"sufficient": true}'),
+            ]
+        else:
+            replies += [_ai('{"intent": "general_chat"}'), _ai(ANSWER)]
+    return replies
+
+
+class ScriptedModel(GenericFakeChatModel):
+    """Replays `script()`; when streamed, emits word chunks and then tool calls and usage like a provider."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        # native async stream: the base class would run the sync one in a thread per chunk
+        message = self._generate(messages, stop=stop, **kwargs).generations[0].message
+        for token in re.split(r"(\s)", message.content) if message.content else []:
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token, id=message.id))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="", id=message.id, response_metadata=message.response_metadata, usage_metadata=message.usage_metadata,
+            tool_call_chunks=[{"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+                              for i, tc in enumerate(message.tool_calls)],
+            chunk_position="last",
+        ))
+
+
+def turn_input(i: int, session_id: str = "bench") -> dict:
+    return {
+        "messages": [HumanMessage(content=f"Question {i}: what changed in fintech M&A this quarter?")],
+        "session_id": session_id, "intent": "general_chat", "tool_calls": [], "needs_more_info": False, "loop_count": 0,
+        "usage": Overwrite({"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "llm_calls": 0}),
+    }
@@ -0,0 +1,83 @@
+"""CPU per streamed turn with and without the agent metrics callback handler.
+
+Runs the real agent graph with a streaming scripted model (no network) through `stream_turn`,
+as the SSE route does. Histograms go to an OpenTelemetry SDK meter provider with an in-memory
+reader, so recording costs what it would with an exporter attached (minus the export). The
+handler is also measured dispatched through the default executor (`run_inline = False`), which
+is what langchain does for a sync handler that doesn't opt in to inline calls.
+
+Variants are interleaved over `--rounds` rounds and the median is reported, since the
+difference is small next to run-to-run noise.
+
+    python benchmarks/agent_metrics_overhead.py --turns 200 --rounds 7
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from unittest.mock import patch
+
+from _scripted import ScriptedModel, script, turn_input
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.checkpoint.memory import MemorySaver
+from opentelemetry import metrics
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+reader = InMemoryMetricReader()
+metrics.set_meter_provider(MeterProvider(metric_readers=[reader]))
+
+from app.agent.graph import build_graph  # noqa: E402 - instruments bind to the provider set above
+from app.services.agent_metrics import AgentMetricsHandler  # noqa: E402
+from app.services.session_manager import turn_run_options  # noqa: E402
+from app.services.streaming import TurnOutput, stream_turn  # noqa: E402
+
+
+class _ExecutorHandler(AgentMetricsHandler):
+    run_inline = False
+
+
+class _NoopHandler(BaseCallbackHandler):
+    # langchain's dispatch of every chain/LLM/token event to a handler, with nothing recorded
+    run_inline = True
+
+
+async def _run(callbacks, turns: int) -> tuple[float, float]:
+    with patch("app.agent.graph.get_llm", return_value=ScriptedModel(messages=iter(script(turns)))):
+        graph = build_graph(checkpointer=MemorySaver())
+    cpu, wall = time.process_time(), time.perf_counter()
+    for i in range(turns):
+        async for _ in stream_turn(graph, turn_input(i), TurnOutput(), **turn_run_options(f"s{i}", "async", callbacks=callbacks)):
+            pass
+    return (time.process_time() - cpu) / turns * 1000, (time.perf_counter() - wall) / turns * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+
+    variants = {"no callbacks": None, "no-op handler": [_NoopHandler()], "AgentMetricsHandler (inline)": [AgentMetricsHandler()],
+                "same handler via executor": [_ExecutorHandler()]}
+    asyncio.run(_run(None, 20))  # warm imports and caches
+    results: dict[str, list[tuple[float, float]]] = {name: [] for name in variants}
+    for _ in range(args.rounds):
+        for name, callbacks in variants.items():
+            results[name].append(asyncio.run(_run(callbacks, args.turns)))
+
+    print(f"{args.turns} turns x {args.rounds} rounds, half plain chat and half with a calculator call (medians)")
+    print("| variant | CPU ms/turn | wall ms/turn | overhead CPU µs/turn |")
+    print("|---------|-------------|--------------|----------------------|")
+    base = statistics.median(cpu for cpu, _ in results["no callbacks"])
+    for name, runs in results.items():
+        cpu, wall = statistics.median(c for c, _ in runs), statistics.median(w for _, w in runs)
+        print(f"| {name} | {cpu:.2f} | {wall:.2f} | {(cpu - base) * 1000:+.0f} |")
+    points = sum(len(m.data.data_points) for rm in reader.get_metrics_data().resource_metrics for sm in rm.scope_metrics for m in sm.metrics)
+    print(f"\n{points} metric series recorded")
+
+
+if __name__ == "__main__":
+    main()
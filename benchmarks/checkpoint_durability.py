@@ -0,0 +1,94 @@
+"""Checkpoint writes per turn and turn latency for each checkpoint durability mode.
+
+Runs the real agent graph with a scripted chat model against `KVCheckpointSaver` on an in-process
+backend that sleeps `--rtt-ms` per command, standing in for a networked Redis.
+
+    python benchmarks/checkpoint_durability.py --turns 20 --rtt-ms 1
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from unittest.mock import patch
+
+from _scripted import ScriptedModel, script, turn_input
+
+from app.agent.graph import build_graph
+from app.services.checkpoint_store import DeferredCheckpointSaver, KVCheckpointSaver
+from app.services.kv_backend import LocalKVBackend
+from app.services.session_manager import DURABILITY_MODES, turn_run_options
+
+
+class _RemoteBackend(LocalKVBackend):
+    """In-process backend with a fixed round-trip per command; counts commands."""
+
+    def __init__(self, rtt_ms: float):
+        super().__init__()
+        self.rtt = rtt_ms / 1000
+        self.commands = 0
+
+    def __getattribute__(self, name):
+        attr = super().__getattribute__(name)
+        if name.startswith("_") or name in ("rtt", "commands") or not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def remote(*args, **kwargs):
+            self.commands += 1
+            await asyncio.sleep(self.rtt)
+            return await attr(*args, **kwargs)
+
+        return remote
+
+
+class _CountingSaver(KVCheckpointSaver):
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.puts = self.put_writes_calls = 0
+
+    async def aput(self, *args, **kwargs):
+        self.puts += 1
+        return await super().aput(*args, **kwargs)
+
+    async def aput_writes(self, *args, **kwargs):
+        self.put_writes_calls += 1
+        return await super().aput_writes(*args, **kwargs)
+
+
+async def _run(mode: str, turns: int, rtt_ms: float) -> dict:
+    backend = _RemoteBackend(rtt_ms)
+    inner = _CountingSaver(backend)
+    saver = DeferredCheckpointSaver(inner)
+    with patch("app.agent.graph.get_llm", return_value=ScriptedModel(messages=iter(script(turns)))):
+        graph = build_graph(checkpointer=saver)
+
+    latencies, durable = [], []
+    options = turn_run_options("bench", mode)
+    for i in range(turns):
+        start = time.perf_counter()
+        await graph.ainvoke(turn_input(i), **options)
+        latencies.append((time.perf_counter() - start) * 1000)
+        await saver.flush("bench")
+        durable.append((time.perf_counter() - start) * 1000)
+    return {
+        "mode": mode, "puts": inner.puts / turns, "writes": inner.put_writes_calls / turns, "commands": backend.commands / turns,
+        "p50": statistics.median(latencies), "max": max(latencies), "durable": statistics.median(durable),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print("| durability | checkpoints/turn | put_writes/turn | store commands/turn | turn p50 ms | turn max ms | durable p50 ms |")
+    print("|------------|------------------|-----------------|---------------------|-------------|-------------|----------------|")
+    for mode in DURABILITY_MODES:
+        r = asyncio.run(_run(mode, args.turns, args.rtt_ms))
+        print(f"| {r['mode']} | {r['puts']:.1f} | {r['writes']:.1f} | {r['commands']:.0f} | {r['p50']:.1f} | {r['max']:.1f} | {r['durable']:.1f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Checkpoint serializer comparison on realistic multi-turn sessions.
+
+Runs the real agent graph with a scripted chat model (no network) for sessions of increasing
+length, records every object the checkpointer serializes during the session's last turn, then
+measures bytes per checkpoint and dumps/loads time for each serializer.
+
+    python benchmarks/checkpoint_serde.py --turns 1 10 30 --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from unittest.mock import patch
+
+from _scripted import ScriptedModel, script, turn_input
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.agent.graph import build_graph
+from app.services.checkpoint_serde import CompactSerializer
+
+
+class _Recorder(JsonPlusSerializer):
+    def __init__(self):
+        super().__init__()
+        self.objects: list = []
+        self.recording = False
+
+    def dumps_typed(self, obj):
+        if self.recording:
+            self.objects.append(obj)
+        return super().dumps_typed(obj)
+
+
+async def _record_last_turn(turns: int) -> tuple[list, int]:
+    recorder = _Recorder()
+    saver = MemorySaver(serde=recorder)
+    model = ScriptedModel(messages=iter(script(turns)))
+    with patch("app.agent.graph.get_llm", return_value=model):
+        graph = build_graph(checkpointer=saver)
+
+    puts = 0
+    original_put = saver.put
+
+    def counting_put(*args, **kwargs):
+        nonlocal puts
+        puts += recorder.recording
+        return original_put(*args, **kwargs)
+
+    saver.put = counting_put
+    config = {"configurable": {"thread_id": "bench"}}
+    for i in range(turns):
+        recorder.recording = i == turns - 1
+        await graph.ainvoke(turn_input(i), config)
+    return recorder.objects, puts
+
+
+def _measure(serde, objects: list, repeat: int) -> tuple[int, float, float]:
+    payloads = [serde.dumps_typed(o) for o in objects]
+    size = sum(len(p[1]) for p in payloads)
+    dumps, loads = [], []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for o in objects:
+            serde.dumps_typed(o)
+        dumps.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        for p in payloads:
+            serde.loads_typed(p)
+        loads.append(time.perf_counter() - t)
+    return size, statistics.median(dumps), statistics.median(loads)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, nargs="+", default=[1, 10, 30])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    serdes = {
+        "default (JsonPlus)": JsonPlusSerializer(),
+        "compact": CompactSerializer(compression=None),
+        "compact+zstd": CompactSerializer(compression="zstd"),
+    }
+    try:
+        serdes["compact+lz4"] = CompactSerializer(compression="lz4")
+    except ImportError:
+        pass
+
+    print("| turns | serializer | bytes/checkpoint | dumps µs/checkpoint | loads µs/checkpoint |")
+    print("|-------|------------|------------------|---------------------|---------------------|")
+    for turns in args.turns:
+        objects, puts = asyncio.run(_record_last_turn(turns))
+        for name, serde in serdes.items():
+            size, dumps, loads = _measure(serde, objects, args.repeat)
+            print(f"| {turns} | {name} | {size / puts:,.0f} | {dumps / puts * 1e6:,.0f} | {loads / puts * 1e6:,.0f} |")
+
+
+if __name__ == "__main__":
+    main()
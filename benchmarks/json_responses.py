@@ -0,0 +1,135 @@
+"""History rendering: nested response models vs direct orjson rendering, and br/gzip payload sizes.
+
+Fills a session with `--messages` history records (half of them assistant turns with tool
+calls and usage) and calls `GET /sessions/{id}/history` on the real app in-process, so routing
+and middleware are included. Compares the old route (models + FastAPI's pydantic-core
+`dump_json` path), the same models under a custom response class (what an app-wide
+`default_response_class` would do), and the direct path now used. Then reports body size and
+compression time per encoding.
+
+    python benchmarks/json_responses.py --messages 500 --requests 500
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+from _scripted import ANSWER
+from fastapi import Request
+
+from app.api.middleware.compression import _COMPRESSORS
+from app.api.responses import FastJSONResponse
+from app.api.schemas.responses import (
+    HistoryMessageResponse,
+    HistoryResponse,
+    ToolCallResponse,
+    UsageResponse,
+)
+from app.config import get_settings
+from app.main import create_app
+from app.services.session_manager import SessionManager
+
+# ── the route as it was: one model per message, tool call and usage ──
+
+async def _legacy_history(request: Request, session_id: str):
+    history = await request.app.state.session_manager.get_history(session_id)
+    messages = []
+    for msg in history["messages"]:
+        tool_calls = [ToolCallResponse(**tc) for tc in msg["tool_calls"]] if msg.get("tool_calls") else None
+        usage = UsageResponse(**msg["usage"]) if msg.get("usage") else None
+        messages.append(HistoryMessageResponse(
+            message_id=msg["message_id"], role=msg["role"], content=msg["content"],
+            created_at=msg["created_at"], tool_calls=tool_calls, usage=usage, status=msg.get("status"),
+        ))
+    return HistoryResponse(session_id=history["session_id"], message_count=history["message_count"], messages=messages)
+
+
+def _records(n: int) -> list[dict]:
+    # shuffled answers so the history doesn't compress unrealistically well
+    rng, words = random.Random(0), ANSWER.split()
+    records = []
+    for i in range(n):
+        now = datetime.now(timezone.utc)
+        if i % 2 == 0:
+            records.append({"message_id": f"msg_{uuid.uuid4().hex[:8]}", "role": "user", "content": "What are the latest trends in fintech?", "created_at": now})
+        else:
+            records.append({
+                "message_id": f"msg_{uuid.uuid4().hex[:8]}", "role": "assistant", "content": " ".join(rng.sample(words, len(words))), "created_at": now,
+                "tool_calls": [{"tool_name": "web_search", "input": {"query": f"fintech trends {i}"}, "output_summary": " ".join(rng.sample(words, 30))}],
+                "usage": {"prompt_tokens": 640, "completion_tokens": 120, "total_tokens": 760, "llm_calls": 3},
+            })
+    return records
+
+
+async def _call(app, path: str, accept: bytes = b"identity") -> bytes:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench"), (b"accept-encoding", accept)], "client": ("bench", 1), "server": ("bench", 80),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+async def _run(args) -> None:
+    settings = get_settings()
+    settings.rate_limit_enabled = False
+    app = create_app()
+    app.state.session_manager = sm = SessionManager()
+    app.add_api_route("/bench/models/{session_id}/history", _legacy_history, response_model=HistoryResponse)
+    app.add_api_route("/bench/models-custom-class/{session_id}/history", _legacy_history, response_model=HistoryResponse,
+                      response_class=FastJSONResponse)
+    sid = (await sm.create_session()).session_id
+    await sm.store.append_history(sid, *_records(args.messages))
+
+    routes = {
+        "models + dump_json (before)": (f"/bench/models/{sid}/history", b"identity"),
+        "models + custom response class": (f"/bench/models-custom-class/{sid}/history", b"identity"),
+        "direct orjson (after)": (f"/sessions/{sid}/history", b"identity"),
+        "direct orjson + br (after)": (f"/sessions/{sid}/history", b"gzip, br"),
+    }
+    print(f"| route ({args.messages} messages) | ms/request | requests/s | bytes sent |")
+    print("|-------|------------|------------|------------|")
+    for name, (path, accept) in routes.items():
+        for _ in range(20):
+            body = await _call(app, path, accept)
+        t = time.perf_counter()
+        for _ in range(args.requests):
+            await _call(app, path, accept)
+        per = (time.perf_counter() - t) / args.requests
+        print(f"| {name} | {per * 1000:.2f} | {1 / per:,.0f} | {len(body):,} |")
+
+    raw = await _call(app, routes["direct orjson (after)"][0])
+    print()
+    print("| encoding | bytes | ratio | compress ms |")
+    print("|----------|-------|-------|-------------|")
+    print(f"| identity | {len(raw):,} | 1.0x | 0 |")
+    for encoding, compress in _COMPRESSORS.items():
+        t = time.perf_counter()
+        for _ in range(20):
+            body = compress(raw)
+        print(f"| {encoding} | {len(body):,} | {len(raw) / len(body):.1f}x | {(time.perf_counter() - t) / 20 * 1000:.2f} |")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=500)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Event-loop time spent in logging: the old synchronous handler vs the queued listener, with and without sampling.
+
+Runs `--requests` simulated requests as concurrent tasks on one event loop, each emitting the
+lines a turn logs (request start/end, agent steps, tool calls; one warning in twenty) with a
+request id bound, and reports the time the loop thread spent inside logging calls per request.
+The sink is a real file, and optionally a slow one (`--sink-delay-ms` per write, like stdout
+piped to a stalled collector), which is where a synchronous handler stalls every request.
+
+    python benchmarks/logging_overhead.py --requests 5000 --sink-delay-ms 0.2
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+
+import structlog
+
+from app.core.logging import setup_logging, shutdown_logging
+
+
+class _SlowFile:
+    def __init__(self, f, delay: float):
+        self.f, self.delay = f, delay
+
+    def write(self, s: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        return self.f.write(s)
+
+    def flush(self) -> None:
+        self.f.flush()
+
+
+# ── logging as it was: structlog formatter on a StreamHandler, rendering and writing on the caller's thread ──
+
+def _legacy_setup(stream) -> None:
+    renderer = structlog.processors.JSONRenderer()
+    formatter = structlog.stdlib.ProcessorFormatter(
+        foreign_pre_chain=[structlog.contextvars.merge_contextvars, structlog.stdlib.add_logger_name, structlog.stdlib.add_log_level,
+                           structlog.processors.TimeStamper(fmt="iso"), structlog.stdlib.ExtraAdder()],
+        processors=[structlog.stdlib.ProcessorFormatter.remove_processors_meta, renderer],
+    )
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(formatter)
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+
+api, agent, tools = logging.getLogger("app.api.routes.messages"), logging.getLogger("app.agent.graph"), logging.getLogger("app.agent.tools")
+
+
+async def _request(i: int, spent: list[float]) -> None:
+    structlog.contextvars.bind_contextvars(request_id=f"req_{i}")
+    lines = [
+        (api.info, "POST /sessions/%s/messages", (f"sess_{i % 50}",), None),
+        (agent.info, "agent step %d: calling model", (1,), None),
+        (tools.info, "tool web_search started", (), {"query": "fintech trends"}),
+        (tools.info, "tool web_search finished in %.1f ms", (41.7,), {"results": 5}),
+        (agent.info, "agent step %d: final answer", (2,), None),
+        (api.info, "request finished in %.1f ms", (812.3,), {"status_code": 200}),
+    ]
+    if i % 20 == 0:
+        lines.append((agent.warning, "provider retry %d", (1,), {"status_code": 429}))
+    for log, msg, args, extra in lines:
+        t = time.perf_counter()
+        log(msg, *args, extra=extra)
+        spent.append(time.perf_counter() - t)
+        await asyncio.sleep(0)  # interleave with the other requests, as awaits on the provider would
+    structlog.contextvars.clear_contextvars()
+
+
+async def _drive(n: int) -> tuple[float, int]:
+    spent: list[float] = []
+    await asyncio.gather(*(_request(i, spent) for i in range(n)))
+    return sum(spent), len(spent)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--sink-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    variants = {
+        "sync handler (before)": None,
+        "queued listener": "",
+        "queued + sampling (agent 0.1, api 0.5)": "app.agent=0.1,app.api=0.5",
+    }
+    print(f"| variant ({args.requests} requests, sink delay {args.sink_delay_ms} ms) | loop µs/log call | loop µs/request | lines written |")
+    print("|---------|------------------|-----------------|---------------|")
+    for name, rates in variants.items():
+        with tempfile.TemporaryFile("w+") as f:
+            sink = _SlowFile(f, args.sink_delay_ms / 1000)
+            if rates is None:
+                _legacy_setup(sink)
+            else:
+                setup_logging(queue_size=1_000_000, sample_rates=rates, stream=sink)
+            total, calls = asyncio.run(_drive(args.requests))
+            shutdown_logging()
+            f.flush()
+            f.seek(0)
+            written = sum(1 for _ in f)
+        print(f"| {name} | {total / calls * 1e6:.1f} | {total / args.requests * 1e6:.1f} | {written:,} |")
+
+
+if __name__ == "__main__":
+    main()
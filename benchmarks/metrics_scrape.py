@@ -0,0 +1,79 @@
+"""Cost of one `/metrics` scrape: the direct text renderer vs the prometheus_client exporter.
+
+Records into the app's real instruments until there are about `--series` label sets spread
+over the request, node, LLM and tool histograms and the counters. Then it times a scrape, which
+is a collect from the OpenTelemetry SDK plus rendering. The comparison is with
+`opentelemetry-exporter-prometheus`, which bridges the same data through `prometheus_client`
+objects, when it is installed. Scrapes run on the event loop, so this is time other requests
+wait.
+
+    python benchmarks/metrics_scrape.py --series 500 --scrapes 200
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import time
+
+from opentelemetry import metrics
+from opentelemetry.sdk.metrics import MeterProvider
+
+from app.services import metrics as app_metrics
+from app.services.telemetry import SnapshotReader, render_prometheus
+
+try:
+    from opentelemetry.exporter.prometheus import PrometheusMetricReader
+    from prometheus_client import REGISTRY, generate_latest
+except ImportError:
+    PrometheusMetricReader = None
+
+
+def _populate(series: int) -> None:
+    endpoints = [f"/route/{i}" for i in range(max(1, series // 8))]
+    nodes, models = ["router", "tool_executor", "synthesizer", "quality_gate"], ["gpt-4o-mini", "claude-3-5-haiku", "gemini-2.0-flash"]
+    for i, (endpoint, status) in enumerate(itertools.product(endpoints, (200, 404, 429, 503))):
+        app_metrics.record_request_latency(endpoint, "POST", status, 10.0 + i % 700)
+    for node, model, status in itertools.product(nodes, models, ("ok", "error")):
+        app_metrics.record_node_duration(node, status, 120.0)
+        app_metrics.record_llm_call("openai", model, node, status, 900.0, 300.0, 55.0)
+    for tool in ("web_search", "calculator", "datetime"):
+        app_metrics.record_tool_call(tool, "ok", 40.0)
+        app_metrics.record_error("TimeoutError", f"tool:{tool}")
+    for model in models:
+        app_metrics.record_token_usage(model, 640, 120)
+
+
+def _time(scrape, n: int) -> tuple[float, int]:
+    body = scrape()
+    t = time.perf_counter()
+    for _ in range(n):
+        scrape()
+    return (time.perf_counter() - t) / n * 1000, len(body)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--series", type=int, default=500)
+    parser.add_argument("--scrapes", type=int, default=200)
+    args = parser.parse_args()
+
+    reader = SnapshotReader()
+    readers = [reader] + ([PrometheusMetricReader()] if PrometheusMetricReader else [])
+    metrics.set_meter_provider(MeterProvider(metric_readers=readers))
+    _populate(args.series)
+
+    variants = {"direct renderer (SnapshotReader)": lambda: render_prometheus(reader.snapshot()).encode()}
+    if PrometheusMetricReader:
+        variants["opentelemetry-exporter-prometheus + prometheus_client"] = lambda: generate_latest(REGISTRY)
+    sample = variants["direct renderer (SnapshotReader)"]().decode()
+    lines = [line for line in sample.splitlines() if line and not line.startswith("#")]
+    print(f"{len(lines):,} sample lines per scrape")
+    print("| scrape | ms/scrape | bytes |")
+    print("|--------|-----------|-------|")
+    for name, scrape in variants.items():
+        ms, size = _time(scrape, args.scrapes)
+        print(f"| {name} | {ms:.2f} | {size:,} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Per-request middleware overhead: the old BaseHTTPMiddleware stack vs the fused ASGI layer.
+
+Calls the real app in-process (no sockets, no HTTP client) so only the middleware differs:
+`/health` requests per second and µs per request, and SSE frames per second for a route that
+streams `--frames` small frames. Auth is enabled with a handful of keys, as in production.
+
+    python benchmarks/middleware_overhead.py --requests 5000 --frames 20000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+
+import structlog
+from fastapi.responses import StreamingResponse
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+
+from app.api.middleware.auth import PUBLIC_PATHS
+from app.api.middleware.request_context import RequestContextMiddleware
+from app.config import get_settings
+from app.main import create_app
+from app.services.metrics import record_request_latency
+from app.services.session_manager import SessionManager
+
+logger = logging.getLogger(__name__)
+KEYS = [f"key-{i:02d}-{uuid.uuid4().hex}" for i in range(8)]
+
+
+# ── the stack as it was: three BaseHTTPMiddleware layers ──
+
+class _LegacyLogging(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        start = time.time()
+        response = await call_next(request)
+        latency_ms = (time.time() - start) * 1000
+        logger.info("Request completed", extra={"method": request.method, "endpoint": request.url.path,
+                                                "status_code": response.status_code, "latency_ms": round(latency_ms, 2)})
+        record_request_latency(request.url.path, request.method, response.status_code, latency_ms)
+        return response
+
+
+class _LegacyAuth(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        settings = get_settings()
+        if not settings.api_key_enabled or request.url.path in PUBLIC_PATHS:
+            return await call_next(request)
+        api_key = request.headers.get("X-API-Key")
+        if not api_key or api_key not in settings.api_keys_list:
+            return JSONResponse(status_code=401, content={"error": {"code": "UNAUTHORIZED"}})
+        return await call_next(request)
+
+
+class _LegacyRequestID(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        request_id = request.headers.get("X-Request-ID", f"req_{uuid.uuid4().hex[:12]}")
+        request.state.request_id = request_id
+        structlog.contextvars.clear_contextvars()
+        structlog.contextvars.bind_contextvars(request_id=request_id)
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+STACKS = {
+    "none": [],
+    "BaseHTTPMiddleware x3 (before)": [Middleware(_LegacyRequestID), Middleware(_LegacyAuth), Middleware(_LegacyLogging)],
+    "fused ASGI (after)": [Middleware(RequestContextMiddleware)],
+}
+
+
+def _app(stack: list, frames: int):
+    app = create_app()
+    app.user_middleware = list(stack)
+    app.state.session_manager = SessionManager()
+    chunk = b'data: {"event":"token","content":"lorem ipsum "}\n\n'
+
+    @app.get("/bench/sse")
+    async def sse():
+        async def body():
+            for _ in range(frames):
+                yield chunk
+        return StreamingResponse(body(), media_type="text/event-stream")
+
+    return app
+
+
+async def _call(app, path: str) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench"), (b"x-api-key", KEYS[-1].encode())], "client": ("bench", 1), "server": ("bench", 80),
+    }
+    received = {"body": False}
+    done = asyncio.Event()
+    frames = 0
+
+    async def receive():
+        if not received["body"]:
+            received["body"] = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal frames
+        if message["type"] == "http.response.body":
+            frames += bool(message.get("body"))
+            if not message.get("more_body"):
+                done.set()
+
+    await app(scope, receive, send)
+    done.set()
+    return frames
+
+
+async def _measure(name: str, args) -> dict:
+    app = _app(STACKS[name], args.frames)
+    for _ in range(50):
+        await _call(app, "/health")
+
+    t = time.perf_counter()
+    for _ in range(args.requests):
+        await _call(app, "/health")
+    per_request = (time.perf_counter() - t) / args.requests
+
+    t = time.perf_counter()
+    frames = await _call(app, "/bench/sse")
+    return {"name": name, "rps": 1 / per_request, "us": per_request * 1e6, "fps": frames / (time.perf_counter() - t)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--frames", type=int, default=20000)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    settings.api_key_enabled, settings.api_keys = True, ",".join(KEYS)
+
+    results = [asyncio.run(_measure(name, args)) for name in STACKS]
+    base = results[0]["us"]
+    print("| middleware | /health req/s | µs/request | overhead µs | SSE frames/s |")
+    print("|------------|---------------|------------|-------------|--------------|")
+    for r in results:
+        print(f"| {r['name']} | {r['rps']:,.0f} | {r['us']:.0f} | {r['us'] - base:.0f} | {r['fps']:,.0f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""What profiling costs a request: disabled, installed but unused, continuous, and while sampling.
+
+Calls the real app in-process (no sockets) and reports the median µs per `/health` request over
+interleaved rounds for each setup:
+- profiling off (no middleware, no admin routes);
+- profiling on, but the request doesn't ask for a profile (header scan only);
+- continuous sampling at `--continuous-hz` running in the background;
+- a `/admin/profile` window sampling the loop at 5 ms while the requests run;
+- every request profiled by header (a sampler thread started and joined per request).
+
+    python benchmarks/profiler_overhead.py --requests 2000 --rounds 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.config import get_settings
+from app.main import create_app
+from app.services.session_manager import SessionManager
+
+ADMIN_KEY = "bench-admin"
+
+
+async def _call(app, headers: list[tuple[bytes, bytes]]) -> None:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/health", "raw_path": b"/health", "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench"), *headers], "client": ("bench", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+def _app(profiling: bool, continuous_hz: float = 0.0):
+    settings = get_settings()
+    settings.profiling_enabled, settings.admin_api_key, settings.profiling_continuous_hz = profiling, ADMIN_KEY, continuous_hz
+    app = create_app()
+    app.state.session_manager = SessionManager()
+    return app
+
+
+async def _run(app, n: int, headers: list[tuple[bytes, bytes]] = ()) -> float:
+    t = time.perf_counter()
+    for _ in range(n):
+        await _call(app, list(headers))
+    return (time.perf_counter() - t) / n * 1e6
+
+
+async def _round(apps: dict, n: int, flip: bool) -> dict[str, float]:
+    off, on, continuous = apps["off"], apps["on"], apps["continuous"]
+    results = {"profiling off": 0.0, "profiling on, not requested": 0.0}
+    pair = [("profiling off", off), ("profiling on, not requested", on)]
+    for name, app in pair[::-1] if flip else pair:  # alternate which goes first, the second one runs warmer
+        results[name] = await _run(app, n)
+
+    continuous.state.profiler.start_continuous()
+    results["continuous sampling"] = await _run(continuous, n)
+    continuous.state.profiler.close()
+
+    sampler = on.state.profiler.start(0.005)
+    results["inside a 5 ms window profile"] = await _run(on, n)
+    on.state.profiler.finish(sampler)
+
+    headers = [(b"x-profile", b"1"), (b"x-admin-key", ADMIN_KEY.encode())]
+    results["every request profiled (X-Profile)"] = await _run(on, max(1, n // 10), headers)
+    return results
+
+
+async def _main(args) -> None:
+    apps = {"off": _app(False), "on": _app(True), "continuous": _app(True, args.continuous_hz)}
+    for app in apps.values():
+        await _run(app, 500)
+
+    rounds = [await _round(apps, args.requests, i % 2 == 1) for i in range(args.rounds)]
+    base = statistics.median(r["profiling off"] for r in rounds)
+    print(f"| setup ({args.requests} /health requests, median of {args.rounds} rounds) | µs/request | overhead µs |")
+    print("|-------|------------|-------------|")
+    for name in rounds[0]:
+        us = statistics.median(r[name] for r in rounds)
+        print(f"| {name} | {us:.0f} | {us - base:+.0f} |")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--continuous-hz", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
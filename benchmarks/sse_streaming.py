@@ -0,0 +1,115 @@
+"""Per-chunk SSE frames vs coalesced frames: frames/s, CPU per token and added latency.
+
+Simulates `--streams` concurrent answers of `--tokens` chunks each, produced every
+`--interval-ms`, and pushes them through the legacy per-chunk encoder and the coalescing
+pipeline of `app.services.streaming` into a real socket per stream (one write per frame, as the
+ASGI server does for every `send`).
+
+    python benchmarks/sse_streaming.py --streams 200 --tokens 400 --interval-ms 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import time
+
+from _scripted import ANSWER
+
+from app.services import streaming
+from app.services.streaming import coalesce_tokens, encode_sse
+
+
+async def _model(tokens: int, interval: float, produced: list[float]):
+    words = ANSWER.split(" ")
+    yield {"event": "start", "message_id": "msg_bench"}
+    for i in range(tokens):
+        await asyncio.sleep(interval)
+        produced.append(time.perf_counter())
+        yield {"event": "token", "content": words[i % len(words)] + " "}
+    yield {"event": "done", "message_id": "msg_bench"}
+
+
+async def _legacy(payloads):
+    # what the route did before: json.dumps per chunk and str concatenation
+    full_content = ""
+    async for p in payloads:
+        if p["event"] == "token":
+            full_content += p["content"]
+        yield f"data: {json.dumps(p)}\n\n"
+
+
+async def _drain(frames, produced: list[float], delays: list[float], counts: dict) -> None:
+    a, b = socket.socketpair()
+    _, writer = await asyncio.open_connection(sock=a)
+    reader, _ = await asyncio.open_connection(sock=b)
+
+    async def discard():
+        while await reader.read(65536):
+            pass
+
+    sink = asyncio.create_task(discard())
+    seen = 0
+    async for frame in frames:
+        data = frame.encode() if isinstance(frame, str) else frame
+        writer.write(data)
+        await writer.drain()
+        now = time.perf_counter()
+        counts["frames"] += 1
+        counts["bytes"] += len(data)
+        # every produced-but-unsent token is delivered by this frame
+        for t in produced[seen:]:
+            delays.append(now - t)
+        seen = len(produced)
+    writer.close()
+    await sink
+
+
+async def _run(name: str, args) -> dict:
+    interval = args.interval_ms / 1000
+    delays: list[float] = []
+    counts = {"frames": 0, "bytes": 0}
+
+    def pipeline(produced):
+        source = _model(args.tokens, interval, produced)
+        if name == "per-chunk (legacy)":
+            return _legacy(source)
+        window, size = (0, 0) if name.startswith("per-chunk") else (args.window_ms, args.max_bytes)
+        return encode_sse(coalesce_tokens(source, window, size), compress=name.endswith("gzip"))
+
+    async def one():
+        produced: list[float] = []
+        await _drain(pipeline(produced), produced, delays, counts)
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.streams)))
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    delays.sort()
+    tokens = args.streams * args.tokens
+    return {
+        "name": name, "frames": counts["frames"], "fps": counts["frames"] / wall, "kb": counts["bytes"] / 1024,
+        "cpu_us": cpu / tokens * 1e6, "p50": statistics.median(delays) * 1000, "p99": delays[int(len(delays) * 0.99)] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--tokens", type=int, default=400)
+    parser.add_argument("--interval-ms", type=float, default=10)
+    parser.add_argument("--window-ms", type=float, default=20)
+    parser.add_argument("--max-bytes", type=int, default=1024)
+    args = parser.parse_args()
+
+    print(f"json encoder: {'orjson' if streaming.orjson else 'json'}; {args.streams} streams x {args.tokens} tokens every {args.interval_ms} ms")
+    print("| pipeline | frames | frames/s | KB sent | CPU µs/token | added latency p50 ms | p99 ms |")
+    print("|----------|--------|----------|---------|--------------|----------------------|--------|")
+    for name in ("per-chunk (legacy)", "per-chunk (fast json)", "coalesced", "coalesced + gzip"):
+        r = asyncio.run(_run(name, args))
+        print(f"| {r['name']} | {r['frames']:,} | {r['fps']:,.0f} | {r['kb']:,.0f} | {r['cpu_us']:.1f} | {r['p50']:.2f} | {r['p99']:.2f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""CPU per streamed turn: `astream_events(version="v2")` vs the node-aware `stream_turn`.
+
+Runs the real agent graph with a streaming scripted model (no network) and consumes each turn
+the way the SSE route does, up to the payload dicts (no encoding or socket writes).
+
+    python benchmarks/stream_pipeline.py --turns 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from unittest.mock import patch
+
+from _scripted import ScriptedModel, script, turn_input
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.agent.graph import build_graph
+from app.services.session_manager import turn_run_options
+from app.services.streaming import TurnOutput, stream_turn
+
+
+async def _events_v2(graph, i):
+    # the route's loop before this change: every callback event, tokens from every node
+    payloads = 0
+    async for event in graph.astream_events(turn_input(i), **turn_run_options(f"s{i}", "async"), version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_stream" and event["data"]["chunk"].content:
+            payloads += 1
+        elif kind in ("on_tool_start", "on_tool_end"):
+            payloads += 1
+    return payloads
+
+
+async def _stream_turn(graph, i):
+    payloads = 0
+    async for _ in stream_turn(graph, turn_input(i), TurnOutput(), **turn_run_options(f"s{i}", "async")):
+        payloads += 1
+    return payloads
+
+
+async def _run(consume, turns: int) -> tuple[float, float, float]:
+    with patch("app.agent.graph.get_llm", return_value=ScriptedModel(messages=iter(script(turns)))):
+        graph = build_graph(checkpointer=MemorySaver())
+    payloads = 0
+    cpu, wall = time.process_time(), time.perf_counter()
+    for i in range(turns):
+        # one turn per session, so every turn starts from an empty thread
+        payloads += await consume(graph, i)
+    return (time.process_time() - cpu) / turns * 1000, (time.perf_counter() - wall) / turns * 1000, payloads / turns
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{args.turns} turns, half plain chat and half with a calculator call")
+    print("| pipeline | CPU ms/turn | wall ms/turn | payloads/turn |")
+    print("|----------|-------------|--------------|---------------|")
+    for name, consume in (("astream_events v2", _events_v2), ("stream_turn", _stream_turn)):
+        cpu, wall, payloads = asyncio.run(_run(consume, args.turns))
+        print(f"| {name} | {cpu:.2f} | {wall:.2f} | {payloads:.1f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""Scenario benchmarks of our own overhead, on the fake provider (no network, no provider keys).
+
+Agent turns on `build_graph` (general chat, research with a tool, a quality-gate loop), a streamed
+turn through `SessionManager`, session creation and history retrieval through the app in-process,
+and turn cost as one session's checkpoint grows. Reports p50/p99 wall time, CPU per operation and
+allocations (tracemalloc peak and retained, on a separate pass since tracing slows everything down).
+
+    PYTHONPATH=. python benchmarks/suite.py                                     # every scenario, fake-instant
+    PYTHONPATH=. python benchmarks/suite.py --save benchmarks/baselines/main.json
+    PYTHONPATH=. python benchmarks/suite.py --compare benchmarks/baselines/main.json   # exits 1 on a regression
+    PYTHONPATH=. python benchmarks/suite.py --model fake-fast gate_loop         # simulated provider latency
+
+With `fake-instant` wall time is our own overhead; with a latency profile CPU per turn still is.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.agent.graph import build_graph
+from app.api.schemas.requests import AgentConfig
+from app.config import get_settings
+from app.main import create_app
+from app.services.checkpoint_serde import create_checkpoint_serde
+from app.services.session_manager import SessionManager, turn_input, turn_run_options
+
+QUESTIONS = {
+    "general_chat": "Hi! How are you doing today, and what can you help me with?",
+    "research_tools": "Find the latest fintech funding news for payments startups.",
+    "gate_loop": "Give me a thorough overview of neobank consolidation in Europe.",
+}
+# compared against the baseline; p99 is reported but too noisy to gate on
+GATED = ("p50_ms", "cpu_ms", "alloc_peak_kib")
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+
+async def _asgi(app, method: str, path: str, body: dict | None = None) -> dict:
+    """One request to the app in-process; returns the decoded JSON body."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+        "client": ("bench", 1), "server": ("bench", 80),
+    }
+    sent = False
+    chunks = []
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] >= 400:
+            raise RuntimeError(f"{method} {path} -> {message['status']}")
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return json.loads(b"".join(chunks))
+
+
+# ── scenarios: each returns an `op(i)` coroutine function, timed once per call ──
+
+def _graph(model: str):
+    return build_graph(model=model, checkpointer=MemorySaver(serde=create_checkpoint_serde(get_settings())))
+
+
+async def _turns(model: str, question: str):
+    graph = _graph(model)
+
+    async def op(i: int):
+        await graph.ainvoke(turn_input(f"bench-{i}", question), **turn_run_options(f"bench-{i}", "async"))
+    return op
+
+
+async def general_chat(model: str):
+    return await _turns(model, QUESTIONS["general_chat"])
+
+
+async def research_tools(model: str):
+    return await _turns(model, QUESTIONS["research_tools"])
+
+
+async def gate_loop(model: str):
+    return await _turns(model, QUESTIONS["gate_loop"])
+
+
+async def stream_turn(model: str):
+    sm = SessionManager()
+    session = await sm.create_session(AgentConfig(model=model))
+
+    async def op(i: int):
+        async for _ in sm.stream_message(session.session_id, QUESTIONS["research_tools"]):
+            pass
+    return op
+
+
+async def session_create(model: str):
+    app = _app()
+
+    async def op(i: int):
+        await _asgi(app, "POST", "/sessions", {"agent_config": {"model": model}})
+    return op
+
+
+async def history(model: str):
+    app = _app()
+    sid = (await _asgi(app, "POST", "/sessions", {"agent_config": {"model": model}}))["session_id"]
+    for i in range(20):
+        await _asgi(app, "POST", f"/sessions/{sid}/messages", {"content": QUESTIONS[("general_chat", "research_tools")[i % 2]]})
+
+    async def op(i: int):
+        await _asgi(app, "GET", f"/sessions/{sid}/history")
+    return op
+
+
+async def checkpoint_growth(model: str):
+    graph = _graph(model)
+    config = turn_run_options("growth", "async")
+    saver = graph.checkpointer
+
+    def size() -> int:
+        return len(saver.serde.dumps_typed(saver.get_tuple(config["config"]).checkpoint)[1])
+
+    async def op(i: int):
+        await graph.ainvoke(turn_input("growth", QUESTIONS[("general_chat", "research_tools")[i % 2]]), **config)
+        if i == 0 or op.sizes:
+            op.sizes.append(size())
+    op.sizes = []
+    return op
+
+
+SCENARIOS = {fn.__name__: fn for fn in (general_chat, research_tools, gate_loop, stream_turn, session_create, history, checkpoint_growth)}
+
+
+def _app():
+    app = create_app()
+    app.state.session_manager = SessionManager(rate_limiter=app.state.rate_limiter)
+    return app
+
+
+async def _measure(name: str, model: str, iterations: int, alloc_iterations: int) -> dict:
+    op = await SCENARIOS[name](model)
+    gc.collect()  # earlier scenarios' garbage would otherwise be collected on this one's time
+    for i in range(max(3, iterations // 10)):
+        await op(-i - 1)
+
+    walls, cpus = [], []
+    for i in range(iterations):
+        wall, cpu = time.perf_counter(), time.process_time()
+        await op(i)
+        cpus.append(time.process_time() - cpu)
+        walls.append(time.perf_counter() - wall)
+
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for i in range(iterations, iterations + alloc_iterations):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await op(i)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        "n": iterations,
+        "p50_ms": round(statistics.median(walls) * 1000, 3),
+        "p99_ms": round(_percentile(walls, 0.99) * 1000, 3),
+        "cpu_ms": round(statistics.mean(cpus) * 1000, 3),
+        "alloc_peak_kib": round(statistics.median(peaks) / 1024, 1),
+        "alloc_retained_kib": round(statistics.mean(retained) / 1024, 1),
+    }
+    if name == "checkpoint_growth":
+        # a turn late in the session against one early on, and the checkpoint it ends with
+        quarter = max(1, iterations // 4)
+        result["first_p50_ms"] = round(statistics.median(walls[:quarter]) * 1000, 3)
+        result["last_p50_ms"] = round(statistics.median(walls[-quarter:]) * 1000, 3)
+        result["checkpoint_kib"] = [round(op.sizes[0] / 1024, 1), round(op.sizes[-1] / 1024, 1)]
+    return result
+
+
+def _compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    print(f"\nagainst {baseline['meta']['saved_at']} ({baseline['meta']['model']}, threshold {threshold:.0%}):\n")
+    print("| scenario | metric | baseline | now | change |")
+    print("|----------|--------|----------|-----|--------|")
+    for name, result in results.items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        for metric in (*GATED, "p99_ms"):
+            old, new = before[metric], result[metric]
+            change = (new - old) / old if old else 0.0
+            flag = ""
+            # small absolute differences are noise however large relatively
+            if metric in GATED and change > threshold and new - old > (0.05 if metric.endswith("_ms") else 4):
+                flag = " ⚠"
+                regressions.append(f"{name} {metric}")
+            print(f"| {name} | {metric} | {old} | {new} | {change:+.1%}{flag} |")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--model", default="fake-instant", help="fake-<profile> (instant, fast, realistic, slow), optionally with overrides")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--alloc-iterations", type=int, default=30)
+    parser.add_argument("--save", type=Path, help="write the results here as a baseline")
+    parser.add_argument("--compare", type=Path, help="baseline to compare against; exits 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative slowdown counted as a regression (compare runs on the same machine)")
+    args = parser.parse_args()
+    if unknown := set(args.scenarios) - set(SCENARIOS):
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    settings = get_settings()
+    settings.fake_llm_enabled, settings.rate_limit_enabled, settings.api_key_enabled = True, False, False
+    # canned search results with no simulated round-trip: only our side of the tool call is timed
+    settings.web_search_backend, settings.web_search_local_latency_ms = "local", 0.0
+
+    results = {}
+    print(f"{args.model}, {args.iterations} iterations ({args.alloc_iterations} traced)\n")
+    print("| scenario | p50 ms | p99 ms | CPU ms/op | alloc peak KiB/op | retained KiB/op |")
+    print("|----------|--------|--------|-----------|-------------------|-----------------|")
+    for name in args.scenarios or SCENARIOS:
+        r = results[name] = asyncio.run(_measure(name, args.model, args.iterations, args.alloc_iterations))
+        print(f"| {name} | {r['p50_ms']:.2f} | {r['p99_ms']:.2f} | {r['cpu_ms']:.2f} | {r['alloc_peak_kib']:,.0f} | {r['alloc_retained_kib']:,.1f} |")
+    if "checkpoint_growth" in results:
+        r = results["checkpoint_growth"]
+        print(f"\ncheckpoint_growth: turn p50 {r['first_p50_ms']:.2f} ms early -> {r['last_p50_ms']:.2f} ms late, "
+              f"checkpoint {r['checkpoint_kib'][0]} -> {r['checkpoint_kib'][1]} KiB")
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"saved_at": datetime.now(timezone.utc).isoformat(timespec="seconds"), "model": args.model,
+                "iterations": args.iterations, "python": platform.python_version(), "machine": platform.machine()}
+        args.save.write_text(json.dumps({"meta": meta, "scenarios": results}, indent=2) + "\n")
+        print(f"\nbaseline saved to {args.save}")
+    if args.compare:
+        regressions = _compare(results, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            print(f"\nregressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,203 @@
-from locust import HttpUser, between, task
+"""Load-test scenarios. Sessions use `LOAD_MODEL`, by default the simulated provider (`fake-realistic`),
+so with the server from `load_tests/offline.py serve` a run needs no network and no provider keys.
 
+    locust -f load_tests/locustfile.py --host http://localhost:8080                  # the weighted mix
+    locust -f load_tests/locustfile.py --host http://localhost:8080 StreamingUser    # one scenario
 
-class ConversationUser(HttpUser):
+Turns shed by admission control or refused by the per-session turn queue are reported as failures
+named after the reason (`shed (queue_full)`, `turn queue full`, ...), apart from real errors.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+
+from locust import HttpUser, between, constant, task
+
+MODEL = os.environ.get("LOAD_MODEL", "fake-realistic")
+TURNS = int(os.environ.get("LOAD_TURNS", "20"))  # per MultiTurnUser session
+SHARERS = int(os.environ.get("LOAD_SHARERS", "4"))  # SharedSessionUsers per session
+
+# chat, analysis (calculator), research (search) and a quality-gate loop, as the fake provider reads them
+PROMPTS = [
+    "Hi! Can you help me understand the fintech market?",
+    "What is 1250 * 1.175?",
+    "Find the latest news on payments startup funding.",
+    "Thanks, can you summarize that in two sentences?",
+    "What day is it today?",
+    "Give me a thorough comparison of European neobanks.",
+]
+
+
+def _check_turn(resp) -> None:
+    """Name expected back-pressure failures by reason so they are told apart from errors."""
+    if resp.status_code == 200:
+        return
+    try:
+        error = resp.json()["error"]
+    except (ValueError, KeyError, TypeError):
+        resp.failure(f"HTTP {resp.status_code}")
+        return
+    if error["code"] == "OVERLOADED":
+        resp.failure(f"shed ({error['details'].get('reason')})")
+    elif error["code"] == "TURN_QUEUE_FULL":
+        resp.failure("turn queue full")
+    elif error["code"] == "TURN_SUPERSEDED":
+        resp.failure("superseded")
+    else:
+        resp.failure(f"{error['code']} ({resp.status_code})")
+
+
+class _SessionUser(HttpUser):
+    abstract = True
+    session_id: str | None = None
+
+    def _create_session(self, **agent_config) -> str | None:
+        resp = self.client.post("/sessions", json={"agent_config": {"model": MODEL, **agent_config}})
+        return resp.json()["session_id"] if resp.status_code == 201 else None
+
+    def _delete_session(self, session_id: str) -> None:
+        self.client.delete(f"/sessions/{session_id}", name="/sessions/[id]")
+
+    def _send(self, session_id: str, content: str) -> None:
+        with self.client.post(f"/sessions/{session_id}/messages", json={"content": content},
+                              name="/sessions/[id]/messages", catch_response=True) as resp:
+            _check_turn(resp)
+
+    def on_start(self):
+        self.session_id = self._create_session()
+
+    def on_stop(self):
+        if self.session_id:
+            self._delete_session(self.session_id)
+
+
+class MultiTurnUser(_SessionUser):
+    """A long conversation: `LOAD_TURNS` turns through the prompt mix, then a fresh session."""
+
+    weight = 4
+    wait_time = between(1, 3)
+    turn = 0
+
+    @task
+    def converse(self):
+        if not self.session_id:
+            return
+        if self.turn >= TURNS:
+            self._delete_session(self.session_id)
+            self.session_id, self.turn = self._create_session(), 0
+            return
+        self._send(self.session_id, PROMPTS[self.turn % len(PROMPTS)])
+        self.turn += 1
+
+
+class StreamingUser(_SessionUser):
+    """Reads `/messages/stream` to the end, like a browser tab.
+
+    The request entry is timed to the response headers; `SSE` entries time the first token and
+    the whole turn (its size column is frames per turn).
+    """
+
+    weight = 3
     wait_time = between(1, 3)
-    session_id = None
+    turn = 0
+
+    @task
+    def stream(self):
+        if not self.session_id:
+            return
+        prompt = PROMPTS[self.turn % len(PROMPTS)]
+        self.turn += 1
+        start, first_token, frames = time.perf_counter(), None, 0
+        with self.client.post(f"/sessions/{self.session_id}/messages/stream", json={"content": prompt}, stream=True,
+                              name="/sessions/[id]/messages/stream", catch_response=True) as resp:
+            if resp.status_code != 200:
+                _check_turn(resp)
+                return
+            for line in resp.iter_lines():
+                if not line.startswith(b"data:"):
+                    continue
+                frames += 1
+                event = json.loads(line[5:])
+                if event.get("event") == "token" and first_token is None:
+                    first_token = time.perf_counter() - start
+                elif event.get("event") == "error":
+                    resp.failure(f"error frame ({event.get('code')})")
+                    return
+        fire = self.environment.events.request.fire
+        if first_token is not None:
+            fire(request_type="SSE", name="time to first token", response_time=first_token * 1000, response_length=0, exception=None, context={})
+        fire(request_type="SSE", name="turn", response_time=(time.perf_counter() - start) * 1000, response_length=frames, exception=None, context={})
+
+
+class SharedSessionUser(_SessionUser):
+    """`LOAD_SHARERS` users post to one session at once, as tabs or retries of one client would.
+
+    Their turns go through the session's turn queue one at a time; what it refuses shows up as
+    `turn queue full`.
+    """
+
+    weight = 2
+    wait_time = between(0.5, 1.5)
+    _lock = threading.Lock()
+    _shared: dict[int, str] = {}
+    _joined = 0
 
     def on_start(self):
-        resp = self.client.post("/sessions", json={"agent_config": {"model": "gpt-4o-mini"}})
-        if resp.status_code == 201:
-            self.session_id = resp.json()["session_id"]
+        with SharedSessionUser._lock:
+            group = SharedSessionUser._joined // SHARERS
+            SharedSessionUser._joined += 1
+            if group not in SharedSessionUser._shared:
+                SharedSessionUser._shared[group] = self._create_session()
+            self.group, self.session_id = group, SharedSessionUser._shared[group]
 
     def on_stop(self):
+        with SharedSessionUser._lock:
+            if SharedSessionUser._shared.pop(self.group, None) and self.session_id:
+                self._delete_session(self.session_id)
+
+    @task
+    def post(self):
         if self.session_id:
-            self.client.delete(f"/sessions/{self.session_id}")
+            self._send(self.session_id, PROMPTS[int(time.time()) % len(PROMPTS)])
+
 
-    @task(5)
-    def send_message(self):
+class HistoryPollingUser(_SessionUser):
+    """A UI that polls its session's history every second and now and then sends a message."""
+
+    weight = 2
+    wait_time = constant(1)
+
+    @task(10)
+    def poll(self):
         if self.session_id:
-            self.client.post(f"/sessions/{self.session_id}/messages", json={"content": "What are the latest trends in fintech?"})
+            self.client.get(f"/sessions/{self.session_id}/history", name="/sessions/[id]/history")
 
-    @task(2)
-    def get_history(self):
+    @task(1)
+    def send(self):
         if self.session_id:
-            self.client.get(f"/sessions/{self.session_id}/history")
+            self._send(self.session_id, PROMPTS[0])
 
     @task(1)
     def health_check(self):
         self.client.get("/health")
+
+
+class BYOKeyChurnUser(_SessionUser):
+    """Short sessions, each with its own provider key: create, one turn, delete."""
+
+    weight = 1
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        pass
+
+    @task
+    def churn(self):
+        session_id = self._create_session(llm_api_key=f"sk-load-{uuid.uuid4().hex}")
+        if session_id:
+            self._send(session_id, PROMPTS[0])
+            self._delete_session(session_id)
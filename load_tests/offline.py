@@ -0,0 +1,168 @@
+"""Offline load tests: the API on the simulated provider and local search, driven by locust.
+
+`serve` starts the API with `fake-*` models enabled, web searches answered locally and rate limits
+off, for an interactive `locust -f load_tests/locustfile.py`. `run` also drives the locustfile
+headless against it and prints a summary: throughput, latency percentiles per endpoint and the
+resident memory of every worker over the run. Nothing leaves the machine.
+
+    python load_tests/offline.py serve --workers 1
+    python load_tests/offline.py run --users 100 --run-time 2m
+    python load_tests/offline.py run --profile slow --report out.json MultiTurnUser StreamingUser
+
+More than one worker shares sessions through `REDIS_URL` (a local redis-server is enough).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import psutil  # installed with locust
+from worker_scaling import ROOT, _wait_healthy
+
+
+def _server_env(args: argparse.Namespace) -> dict:
+    env = {
+        **os.environ, "FAKE_LLM_ENABLED": "true", "WEB_SEARCH_BACKEND": "local", "WEB_SEARCH_LOCAL_LATENCY_MS": str(args.search_ms),
+        "RATE_LIMIT_ENABLED": "false", "API_KEY_ENABLED": "false", "LOG_LEVEL": "WARNING",
+    }
+    if args.workers > 1:
+        env["SESSION_STORE_BACKEND"] = "redis"
+    return env
+
+
+def _serve(args: argparse.Namespace, **popen) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port), "--workers", str(args.workers)],
+        cwd=ROOT, env=_server_env(args), **popen,
+    )
+
+
+class _MemorySampler(threading.Thread):
+    """Resident memory of the server's workers (or the server itself with one), once a second."""
+
+    def __init__(self, pid: int):
+        super().__init__(daemon=True)
+        self.server = psutil.Process(pid)
+        self.samples: dict[int, list[int]] = {}
+        self.stopped = threading.Event()
+
+    def _workers(self) -> list[psutil.Process]:
+        children = [p for p in self.server.children() if "resource_tracker" not in " ".join(p.cmdline())]
+        return children or [self.server]
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            for proc in self._workers():
+                try:
+                    self.samples.setdefault(proc.pid, []).append(proc.memory_info().rss)
+                except psutil.Error:
+                    pass
+            self.stopped.wait(1.0)
+
+    def summary(self) -> list[dict]:
+        mib = 1024 * 1024
+        return [{"pid": pid, "start_mib": rss[0] / mib, "peak_mib": max(rss) / mib, "end_mib": rss[-1] / mib}
+                for pid, rss in sorted(self.samples.items())]
+
+
+def _stats(prefix: Path) -> list[dict]:
+    with open(f"{prefix}_stats.csv") as f:
+        return [{
+            "type": row["Type"], "name": row["Name"], "requests": int(row["Request Count"]), "failures": int(row["Failure Count"]),
+            "rps": float(row["Requests/s"]), "p50": float(row["50%"]), "p95": float(row["95%"]), "p99": float(row["99%"]),
+            "avg_size": float(row["Average Content Size"]),
+        } for row in csv.DictReader(f)]
+
+
+def _failures(prefix: Path) -> list[dict]:
+    with open(f"{prefix}_failures.csv") as f:
+        return [{"name": row["Name"], "error": row["Error"], "count": int(row["Occurrences"])} for row in csv.DictReader(f)]
+
+
+def _run(args: argparse.Namespace) -> dict:
+    url = f"http://127.0.0.1:{args.port}"
+    server = _serve(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_healthy(url)
+        sampler = _MemorySampler(server.pid)
+        sampler.start()
+        with tempfile.TemporaryDirectory() as tmp:
+            prefix = Path(tmp) / "offline"
+            started = time.time()
+            subprocess.run(
+                [sys.executable, "-m", "locust", "-f", str(ROOT / "load_tests" / "locustfile.py"), "--headless",
+                 "-u", str(args.users), "-r", str(args.spawn_rate), "-t", args.run_time, "--host", url,
+                 "--csv", str(prefix), "--only-summary", *args.user_classes],
+                cwd=ROOT, env={**os.environ, "LOAD_MODEL": f"fake-{args.profile}"}, check=False,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            sampler.stopped.set()
+            sampler.join()
+            return {
+                "profile": args.profile, "workers": args.workers, "users": args.users, "seconds": round(time.time() - started),
+                "stats": _stats(prefix), "failures": _failures(prefix), "memory": sampler.summary(),
+            }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def _print(report: dict) -> None:
+    print(f"fake-{report['profile']}, {report['users']} users, {report['workers']} worker(s), {report['seconds']} s\n")
+    print("| request | count | failures | req/s | p50 ms | p95 ms | p99 ms |")
+    print("|---------|-------|----------|-------|--------|--------|--------|")
+    for s in report["stats"]:
+        name = "**total**" if s["name"] == "Aggregated" else f"{s['type']} {s['name']}"
+        print(f"| {name} | {s['requests']:,} | {s['failures']:,} | {s['rps']:.1f} | {s['p50']:.0f} | {s['p95']:.0f} | {s['p99']:.0f} |")
+    sse = next((s for s in report["stats"] if s["type"] == "SSE" and s["name"] == "turn"), None)
+    if sse:
+        print(f"\nSSE: {sse['avg_size']:.0f} frames per streamed turn")
+    if report["failures"]:
+        print("\n| failure | count |\n|---------|-------|")
+        for f in sorted(report["failures"], key=lambda f: -f["count"]):
+            print(f"| {f['name']}: {f['error']} | {f['count']:,} |")
+    print("\n| worker | RSS start MiB | peak MiB | end MiB |\n|--------|---------------|----------|---------|")
+    for m in report["memory"]:
+        print(f"| {m['pid']} | {m['start_mib']:.0f} | {m['peak_mib']:.0f} | {m['end_mib']:.0f} |")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("mode", choices=["serve", "run"])
+    parser.add_argument("user_classes", nargs="*", help="locust user classes to run (default: the weighted mix)")
+    parser.add_argument("--profile", default="realistic", help="fake provider latency profile: instant, fast, realistic, slow, or with overrides")
+    parser.add_argument("--search-ms", type=float, default=300.0, help="median simulated web search round-trip")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--spawn-rate", type=float, default=10)
+    parser.add_argument("--run-time", default="60s")
+    parser.add_argument("--report", type=Path, help="also write the summary here as JSON")
+    args = parser.parse_args()
+
+    if args.mode == "serve":
+        print(f"serving on http://127.0.0.1:{args.port}; run locust with LOAD_MODEL=fake-{args.profile}")
+        server = _serve(args)
+        try:
+            server.wait()
+        except KeyboardInterrupt:
+            server.terminate()
+            server.wait(timeout=30)
+        return
+
+    report = _run(args)
+    _print(report)
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Throughput scaling across uvicorn worker counts with the shared session store.
+
+Starts the API with `--workers N` for each N, runs the locust scenario headless against it and
+prints a table of requests/s and latency percentiles. Requires a reachable Redis-protocol server
+(`REDIS_URL`). Sessions use the simulated provider and local search unless `LOAD_MODEL` names a
+real model, which then needs its provider key.
+
+    python load_tests/worker_scaling.py --workers 1 2 4 8 --users 50 --run-time 60s
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _wait_healthy(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"API at {url} did not become healthy")
+
+
+def _run(workers: int, args: argparse.Namespace, out_dir: Path) -> dict:
+    url = f"http://127.0.0.1:{args.port}"
+    env = {**os.environ, "SESSION_STORE_BACKEND": "redis", "LOG_LEVEL": "WARNING", "FAKE_LLM_ENABLED": "true", "WEB_SEARCH_BACKEND": "local"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port), "--workers", str(workers)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_healthy(url)
+        prefix = out_dir / f"workers_{workers}"
+        subprocess.run(
+            [sys.executable, "-m", "locust", "-f", str(ROOT / "load_tests" / "locustfile.py"), "--headless",
+             "-u", str(args.users), "-r", str(args.spawn_rate), "-t", args.run_time, "--host", url,
+             "--csv", str(prefix), "--only-summary"],
+            cwd=ROOT, check=False, stdout=subprocess.DEVNULL,
+        )
+        with open(f"{prefix}_stats.csv") as f:
+            total = next(row for row in csv.DictReader(f) if row["Name"] == "Aggregated")
+        return {
+            "workers": workers,
+            "rps": float(total["Requests/s"]),
+            "p50": float(total["50%"]),
+            "p99": float(total["99%"]),
+            "failures": int(total["Failure Count"]),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--spawn-rate", type=float, default=10)
+    parser.add_argument("--run-time", default="60s")
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [_run(n, args, Path(tmp)) for n in args.workers]
+
+    base = results[0]["rps"] or 1.0
+    print("| workers | req/s | speedup | p50 ms | p99 ms | failures |")
+    print("|---------|-------|---------|--------|--------|----------|")
+    for r in results:
+        print(f"| {r['workers']} | {r['rps']:.1f} | {r['rps'] / base:.2f}x | {r['p50']:.0f} | {r['p99']:.0f} | {r['failures']} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Concurrent-session streaming over SSE vs one multiplexed WebSocket per user.
+
+Every simulated user owns `--sessions` sessions and, each round, sends one message to all of
+them at once. Over SSE each in-flight turn holds its own HTTP/1.1 connection; over WebSocket
+all of a user's turns share a single socket. Prints peak open connections and turn latency
+(send → `done`) for both transports against a running API.
+
+    python load_tests/ws_vs_sse.py --url http://127.0.0.1:8080 --users 50 --sessions 4 --rounds 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+import websockets
+
+PROMPT = "What are the latest trends in fintech?"
+
+
+class _Gauge:
+    def __init__(self):
+        self.open = 0
+        self.peak = 0
+
+    def __enter__(self):
+        self.open += 1
+        self.peak = max(self.peak, self.open)
+
+    def __exit__(self, *exc):
+        self.open -= 1
+
+
+async def _sessions(http: httpx.AsyncClient, n: int) -> list[str]:
+    return [(await http.post("/sessions", json={})).json()["session_id"] for _ in range(n)]
+
+
+async def _sse_user(http: httpx.AsyncClient, args, gauge: _Gauge, latencies: list[float]) -> None:
+    sessions = await _sessions(http, args.sessions)
+
+    async def turn(session_id: str) -> None:
+        t = time.perf_counter()
+        with gauge:
+            async with http.stream("POST", f"/sessions/{session_id}/messages/stream", json={"content": PROMPT}) as resp:
+                async for line in resp.aiter_lines():
+                    if line.startswith("data:") and json.loads(line[5:]).get("event") in ("done", "error"):
+                        break
+        latencies.append(time.perf_counter() - t)
+
+    for _ in range(args.rounds):
+        await asyncio.gather(*(turn(s) for s in sessions))
+
+
+async def _ws_user(http: httpx.AsyncClient, args, gauge: _Gauge, latencies: list[float]) -> None:
+    sessions = await _sessions(http, args.sessions)
+    url = args.url.replace("http", "ws", 1) + "/ws"
+    headers = {"x-api-key": args.api_key} if args.api_key else {}
+    async with websockets.connect(url, additional_headers=headers, max_queue=None) as ws:
+        with gauge:
+            for r in range(args.rounds):
+                started = {f"{r}-{i}": time.perf_counter() for i in range(len(sessions))}
+                for i, s in enumerate(sessions):
+                    await ws.send(json.dumps({"type": "send", "id": f"{r}-{i}", "session_id": s, "content": PROMPT}))
+                while started:
+                    event = json.loads(await ws.recv())
+                    if event.get("event") in ("done", "error") and event.get("id") in started:
+                        latencies.append(time.perf_counter() - started.pop(event["id"]))
+
+
+async def _run(transport: str, args) -> dict:
+    gauge, latencies = _Gauge(), []
+    user = _sse_user if transport == "sse" else _ws_user
+    headers = {"x-api-key": args.api_key} if args.api_key else {}
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, limits=limits, timeout=120.0) as http:
+        t = time.perf_counter()
+        await asyncio.gather(*(user(http, args, gauge, latencies) for _ in range(args.users)))
+        elapsed = time.perf_counter() - t
+    latencies.sort()
+    return {
+        "transport": transport,
+        "connections": gauge.peak,
+        "turns_per_s": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--api-key", default="")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=4, help="sessions per user, streamed concurrently")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [asyncio.run(_run(t, args)) for t in ("sse", "ws")]
+    print("| transport | peak connections | turns/s | p50 ms | p99 ms |")
+    print("|-----------|------------------|---------|--------|--------|")
+    for r in results:
+        print(f"| {r['transport']} | {r['connections']} | {r['turns_per_s']:.1f} | {r['p50']:.0f} | {r['p99']:.0f} |")
+
+
+if __name__ == "__main__":
+    main()
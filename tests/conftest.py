@@ -1,19 +1,22 @@
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, AIMessageChunk
 
+from app.config import get_settings
 from app.main import create_app
 from app.services.session_manager import SessionManager
+from app.services.telemetry import setup_metrics
 
 
 def make_mock_graph():
     mock = AsyncMock()
 
-    async def mock_ainvoke(input_dict, config=None):
+    async def mock_ainvoke(input_dict, config=None, **kwargs):
         user_msg = input_dict["messages"][-1].content if input_dict["messages"] else ""
         return {
             "messages": [*input_dict["messages"], AIMessage(content=f"Mock response to: {user_msg}")],
@@ -25,19 +28,26 @@ def make_mock_graph():
 
     mock.ainvoke = mock_ainvoke
 
-    async def mock_astream_events(input_dict, config=None, version=None):
-        yield {"event": "on_chat_model_stream", "data": {"chunk": MagicMock(content="Mock ")}}
-        yield {"event": "on_chat_model_stream", "data": {"chunk": MagicMock(content="streamed ")}}
-        yield {"event": "on_chat_model_stream", "data": {"chunk": MagicMock(content="response")}}
+    async def mock_astream(input_dict, config=None, stream_mode=None, **kwargs):
+        yield "tasks", {"id": "t1", "name": "synthesizer", "input": input_dict, "triggers": ()}
+        for text in ("Mock ", "streamed ", "response"):
+            yield "messages", (AIMessageChunk(content=text), {"langgraph_node": "synthesizer"})
+        yield "tasks", {"id": "t1", "name": "synthesizer", "error": None, "interrupts": [],
+                        "result": {"usage": {"prompt_tokens": 50, "completion_tokens": 30, "total_tokens": 80, "llm_calls": 1}}}
 
-    mock.astream_events = mock_astream_events
+    mock.astream = mock_astream
+
+    async def mock_aget_state(config):
+        return SimpleNamespace(values={}, next=())
+
+    mock.aget_state = mock_aget_state
     return mock
 
 
 def make_mock_graph_with_tools():
     mock = AsyncMock()
 
-    async def mock_ainvoke(input_dict, config=None):
+    async def mock_ainvoke(input_dict, config=None, **kwargs):
         user_msg = input_dict["messages"][-1].content if input_dict["messages"] else ""
         return {
             "messages": [*input_dict["messages"], AIMessage(content=f"Research result for: {user_msg}")],
@@ -66,7 +76,8 @@ def mock_graph_with_tools():
 def app(mock_graph):
     application = create_app()
     with patch("app.services.session_manager.build_graph", return_value=mock_graph):
-        application.state.session_manager = SessionManager()
+        application.state.session_manager = SessionManager(rate_limiter=application.state.rate_limiter)
+        application.state.metrics_reader = setup_metrics(get_settings())
         yield application
 
 
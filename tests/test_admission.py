@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.core.exceptions import OverloadedError
+from app.services.admission import AdmissionController
+
+
+async def _hold(admission: AdmissionController, release: asyncio.Event, order: list | None = None, name: str = ""):
+    async with admission.slot():
+        if order is not None:
+            order.append(name)
+        await release.wait()
+
+
+class TestAdmissionController:
+    async def test_queue_is_fifo_and_bounded(self):
+        admission = AdmissionController(max_concurrent=1, max_queue=2, queue_timeout=5)
+        release, order = asyncio.Event(), []
+        tasks = [asyncio.create_task(_hold(admission, release, order, name)) for name in "abc"]
+        await asyncio.sleep(0)
+        assert (admission.active, admission.depth) == (1, 2)
+
+        with pytest.raises(OverloadedError) as exc:
+            async with admission.slot():
+                pass
+        assert exc.value.details["reason"] == "queue_full"
+        assert exc.value.details["retry_after"] >= 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert order == ["a", "b", "c"]
+        assert (admission.active, admission.depth) == (0, 0)
+
+    async def test_deadline_sheds_waiter(self):
+        admission = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.02)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(admission, release))
+        await asyncio.sleep(0)
+        with pytest.raises(OverloadedError) as exc:
+            async with admission.slot():
+                pass
+        assert exc.value.details["reason"] == "deadline"
+        release.set()
+        await holder
+        assert (admission.active, admission.depth) == (0, 0)
+
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        admission = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(admission, release))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(_hold(admission, release))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        release.set()
+        await holder
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert (admission.active, admission.depth) == (0, 0)
+
+
+class TestLoadShedding:
+    def test_overloaded_turn_gets_503_but_reads_pass(self, app, client, session_id):
+        app.state.session_manager.admission = AdmissionController(max_concurrent=1, max_queue=0)
+        app.state.session_manager.admission.active = 1  # the only slot is taken
+
+        for path in (f"/sessions/{session_id}/messages", f"/sessions/{session_id}/messages/stream"):
+            resp = client.post(path, json={"content": "Hi"})
+            assert resp.status_code == 503
+            assert resp.json()["error"]["code"] == "OVERLOADED"
+            assert resp.headers["Retry-After"] == str(resp.json()["error"]["details"]["retry_after"])
+
+        assert client.get(f"/sessions/{session_id}/history").status_code == 200
+        health = client.get("/health").json()
+        assert health["admission"]["running"] == 1
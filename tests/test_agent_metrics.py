@@ -0,0 +1,79 @@
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.agent.graph import build_graph
+from app.services import agent_metrics
+from app.services.agent_metrics import AgentMetricsHandler
+from app.services.session_manager import turn_run_options
+
+USAGE = {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+
+
+class _Model(GenericFakeChatModel):
+    disable_streaming: bool = True
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class _Failing(_Model):
+    def _generate(self, *args, **kwargs):
+        raise ConnectionError("provider down")
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    calls = {"node": [], "llm": [], "tool": [], "error": []}
+    monkeypatch.setattr(agent_metrics, "record_node_duration", lambda *a: calls["node"].append(a))
+    monkeypatch.setattr(agent_metrics, "record_llm_call", lambda *a: calls["llm"].append(a))
+    monkeypatch.setattr(agent_metrics, "record_tool_call", lambda *a: calls["tool"].append(a))
+    monkeypatch.setattr(agent_metrics, "record_error", lambda *a: calls["error"].append(a))
+    return calls
+
+
+def _input(content: str) -> dict:
+    return {"messages": [HumanMessage(content=content)], "intent": "general_chat", "tool_calls": [], "needs_more_info": False,
+            "loop_count": 0, "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "llm_calls": 0}}
+
+
+class TestAgentMetricsHandler:
+    async def test_nodes_llm_calls_and_tools(self, recorded):
+        replies = iter([
+            AIMessage(content='{"intent": "analysis"}', usage_metadata=USAGE),
+            AIMessage(content="", tool_calls=[{"name": "calculator", "args": {"expression": "2+2"}, "id": "call_1"}], usage_metadata=USAGE),
+            AIMessage(content="It is 4.", usage_metadata=USAGE),
+            AIMessage(content='{"sufficient": true}', usage_metadata=USAGE),
+        ])
+        with patch("app.agent.graph.get_llm", return_value=_Model(messages=replies)):
+            graph = build_graph(checkpointer=MemorySaver())
+        handler = AgentMetricsHandler()
+        await graph.ainvoke(_input("2+2?"), **turn_run_options("s1", "sync", callbacks=[handler]))
+
+        assert [(node, status) for node, status, _ in recorded["node"]] == [
+            ("router", "ok"), ("tool_executor", "ok"), ("synthesizer", "ok"), ("quality_gate", "ok")]
+        assert [call[2] for call in recorded["llm"]] == ["router", "tool_executor", "synthesizer", "quality_gate"]
+        provider, model, node, status, duration_ms, ttft_ms, rate = recorded["llm"][0]
+        assert status == "ok" and duration_ms > 0 and ttft_ms is None and rate > 0  # not streamed: no first token
+        assert [call[:2] for call in recorded["tool"]] == [("calculator", "ok")]
+        assert recorded["error"] == []
+        assert not (handler._nodes or handler._llm or handler._tools)
+
+    async def test_time_to_first_token_when_streamed(self, recorded):
+        model = GenericFakeChatModel(messages=iter([AIMessage(content="one two three")]))
+        async for _ in model.astream("hi", config={"callbacks": [AgentMetricsHandler()], "metadata": {"langgraph_node": "synthesizer"}}):
+            pass
+        (_, _, node, status, duration_ms, ttft_ms, _), = recorded["llm"]
+        assert node == "synthesizer" and status == "ok" and 0 < ttft_ms <= duration_ms
+
+    async def test_llm_error_counted_once(self, recorded):
+        with patch("app.agent.graph.get_llm", return_value=_Failing(messages=iter([]))):
+            graph = build_graph(checkpointer=MemorySaver())
+        with pytest.raises(ConnectionError):
+            await graph.ainvoke(_input("Hi"), **turn_run_options("s1", "sync", callbacks=[AgentMetricsHandler()]))
+        assert [call[3] for call in recorded["llm"]] == ["error"]
+        assert recorded["node"][0][:2] == ("router", "error")
+        assert recorded["error"] == [("ConnectionError", "llm:_failing")]
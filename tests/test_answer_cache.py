@@ -0,0 +1,98 @@
+from unittest.mock import patch
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.agent.graph import build_graph
+from app.api.schemas.requests import AgentConfig
+from app.services.answer_cache import AnswerCache
+from app.services.session_manager import SessionManager, turn_run_options
+from app.services.streaming import TurnOutput, stream_turn
+
+
+class _Model(GenericFakeChatModel):
+    calls: int = 0
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    async def _agenerate(self, *args, **kwargs):
+        self.calls += 1
+        return await super()._agenerate(*args, **kwargs)
+
+
+def _chat_replies(n):
+    for i in range(n):
+        yield AIMessage(content='{"intent": "general_chat"}')
+        yield AIMessage(content=f"Hello! (answer {i})")
+
+
+def _input(content):
+    return {"messages": [HumanMessage(content=content)], "intent": "general_chat", "tool_calls": [], "needs_more_info": False,
+            "loop_count": 0, "first_turn": True, "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "llm_calls": 0}}
+
+
+def _graph(cache, model):
+    with patch("app.agent.graph.get_llm", return_value=model):
+        return build_graph(checkpointer=MemorySaver(), answer_cache=cache)
+
+
+class TestAnswerCache:
+    def test_lru_and_ttl(self):
+        cache = AnswerCache(max_entries=2)
+        keys = [cache.key("m", "v1", f"q{i}") for i in range(3)]
+        for key in keys:
+            cache.put(key, "a")
+        assert cache.get(keys[0]) is None
+        assert cache.get(cache.key("m", "v1", "  Q2 ")) == "a"
+        cache.ttl_seconds = 0
+        cache.put(keys[1], "b")
+        assert cache.get(keys[1]) is None
+        assert cache.stats()["hit_rate"] == round(1 / 3, 4)
+
+    async def test_first_turn_hit_skips_synthesizer_and_is_checkpointed(self):
+        cache, model = AnswerCache(), _Model(messages=_chat_replies(3))
+        graph = _graph(cache, model)
+        await graph.ainvoke(_input("Hi there!"), **turn_run_options("s1", "sync", answer_cache=True))
+        calls = model.calls
+
+        result = await graph.ainvoke(_input("hi   THERE!"), **turn_run_options("s2", "sync", answer_cache=True))
+        assert model.calls == calls + 1  # router only
+        assert result["messages"][-1].content == "Hello! (answer 0)"
+        saved = await graph.checkpointer.aget_tuple({"configurable": {"thread_id": "s2"}})
+        assert saved.checkpoint["channel_values"]["messages"][-1].content == "Hello! (answer 0)"
+        assert cache.hits == 1
+
+    async def test_context_and_opted_out_sessions_bypass_cache(self):
+        cache, model = AnswerCache(), _Model(messages=_chat_replies(3))
+        graph = _graph(cache, model)
+        await graph.ainvoke(_input("Hi"), **turn_run_options("s1", "sync", answer_cache=True))
+        with_context = _input("Hi")
+        with_context["messages"] = [HumanMessage(content="I'm Sam"), AIMessage(content="Hi Sam"), HumanMessage(content="Hi")]
+        follow_up = await graph.ainvoke(with_context, **turn_run_options("s2", "sync", answer_cache=True))
+        opted_out = await graph.ainvoke(_input("Hi"), **turn_run_options("s3", "sync"))
+        assert follow_up["messages"][-1].content == "Hello! (answer 1)"
+        assert opted_out["messages"][-1].content == "Hello! (answer 2)"
+        assert cache.hits == 0
+
+    async def test_follow_up_turn_in_a_session_is_not_cached(self):
+        model = _Model(messages=_chat_replies(3))
+        with patch("app.agent.graph.get_llm", return_value=model):
+            sm = SessionManager()
+            first = await sm.create_session(AgentConfig(answer_cache=True))
+            await sm.send_message(first.session_id, "And what about last year?")
+            other = await sm.create_session(AgentConfig(answer_cache=True))
+            await sm.send_message(other.session_id, "Hi")
+            follow_up = await sm.send_message(other.session_id, "And what about last year?")
+        assert follow_up["content"] == "Hello! (answer 2)"
+        assert sm.answer_cache.hits == 0
+
+    async def test_hit_is_streamed_as_cached_token(self):
+        cache, model = AnswerCache(), _Model(messages=_chat_replies(2))
+        graph = _graph(cache, model)
+        await graph.ainvoke(_input("Hi"), **turn_run_options("s1", "sync", answer_cache=True))
+        output = TurnOutput()
+        payloads = [p async for p in stream_turn(graph, _input("Hi"), output, **turn_run_options("s2", "sync", answer_cache=True))]
+        assert [p for p in payloads if p["event"] == "token"] == [{"event": "token", "content": "Hello! (answer 0)", "cached": True}]
+        assert output.content == "Hello! (answer 0)"
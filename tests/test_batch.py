@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import pytest
+
+from app.api.schemas.requests import AgentConfig
+from app.config import get_settings
+from app.services.session_manager import SessionManager
+
+
+def _lines(resp) -> list[dict]:
+    return [json.loads(line) for line in resp.text.splitlines()]
+
+
+async def _collect(results) -> list[dict]:
+    return [r async for r in results]
+
+
+class TestBatchEndpoint:
+    def test_streams_ndjson_results_without_sessions(self, client):
+        sm = client.app.state.session_manager
+        items = [{"id": "a", "content": "first"}, {"id": "b", "content": "second", "agent_config": {"model": "fake-instant"}}, {"content": "third"}]
+        resp = client.post("/batch/messages", json={"items": items, "concurrency": 2})
+        assert resp.status_code == 200 and resp.headers["content-type"] == "application/x-ndjson"
+
+        *results, done = _lines(resp)
+        by_index = {r["index"]: r for r in results}
+        assert by_index[0]["id"] == "a" and by_index[0]["content"] == "Mock response to: first" and by_index[0]["usage"]["total_tokens"] == 80
+        # fake models are off on this server: the item fails, the rest don't
+        assert by_index[1]["status"] == "error" and by_index[1]["error"]["code"] == "INVALID_REQUEST"
+        assert by_index[2]["id"] is None and by_index[2]["status"] == "ok"
+        assert done == {"event": "done", "items": 3, "succeeded": 2, "failed": 1}
+        assert sm.store.sessions == {} and len(sm.memory) == 0
+
+    def test_item_limit(self, client, monkeypatch):
+        monkeypatch.setattr(get_settings(), "batch_max_items", 2)
+        resp = client.post("/batch/messages", json={"items": [{"content": "x"}] * 3})
+        assert resp.status_code == 400
+        assert client.post("/batch/messages", json={"items": []}).status_code == 422
+
+
+class TestRunBatch:
+    async def test_bounded_concurrency_leaves_no_state(self):
+        sm = SessionManager()
+        sm.fake_llm_enabled = True
+        config = AgentConfig(model="fake-ttft=20,tps=5000,words=10")
+        running = peak = 0
+        graph = sm._get_or_build_graph(config, ephemeral=True)
+        ainvoke = graph.ainvoke
+
+        async def counted(*args, **kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            try:
+                return await ainvoke(*args, **kwargs)
+            finally:
+                running -= 1
+
+        graph.ainvoke = counted
+        results = [r async for r in sm.run_batch([(f"What is {i} * 3?", config) for i in range(6)], concurrency=2)]
+        assert sorted(r["index"] for r in results) == list(range(6)) and all(r["status"] == "ok" for r in results)
+        assert peak == 2 and "= 15" in next(r for r in results if r["index"] == 5)["tool_calls"][0]["output_summary"]
+
+        await sm.checkpointer.flush()
+        assert sm.checkpointer.inner.storage == {} and sm.store.sessions == {} and len(sm.memory) == 0
+
+    async def test_item_errors_never_stall_the_batch(self, monkeypatch):
+        sm = SessionManager()
+        sm.fake_llm_enabled = True
+        items = [("hi", AgentConfig(model="fake-instant")), ("hi", AgentConfig(model="unknown-model"))]
+        results = await asyncio.wait_for(_collect(sm.run_batch(items, 2)), timeout=3)
+        failed = [r for r in results if r["status"] == "error"]
+        assert len(results) == 2 and len(failed) == 1 and failed[0]["index"] == 1 and failed[0]["error"]["code"] == "INVALID_REQUEST"
+
+        async def broken(*args, **kwargs):
+            raise RuntimeError("ledger unavailable")
+
+        monkeypatch.setattr(sm.ledger, "budget", broken)
+        results = await asyncio.wait_for(_collect(sm.run_batch(items[:1], 1)), timeout=3)
+        assert results[0]["status"] == "error" and results[0]["error"]["code"] == "INTERNAL_ERROR"
+
+    async def test_closing_cancels_running_items(self):
+        sm = SessionManager()
+        sm.fake_llm_enabled = True
+        results = sm.run_batch([("Hi", AgentConfig(model="fake-ttft=5000"))] * 4, concurrency=2)
+        pending = asyncio.ensure_future(results.__anext__())
+        await asyncio.sleep(0.05)
+        assert sm.admission.active == 2
+        # a client that goes away cancels the response's read of the next result
+        pending.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        assert sm.admission.active == 0
@@ -0,0 +1,97 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.agent.graph import build_graph
+from app.config import get_settings
+from app.core.exceptions import BudgetExceededError
+from app.main import create_app
+from app.services.budgets import PriceTable, UsageLedger
+from app.services.kv_backend import LocalKVBackend
+from app.services.session_manager import SessionManager, turn_input, turn_run_options
+
+USAGE = {"input_tokens": 600, "output_tokens": 100, "total_tokens": 700}
+
+
+class _Model(GenericFakeChatModel):
+    disable_streaming: bool = True
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def _research_turn(sufficient: str = "false") -> list[AIMessage]:
+    return [
+        AIMessage(content='{"intent": "analysis"}', usage_metadata=USAGE),
+        AIMessage(content="", tool_calls=[{"name": "calculator", "args": {"expression": "2+2"}, "id": "call_1"}], usage_metadata=USAGE),
+        AIMessage(content="It is 4.", usage_metadata=USAGE),
+        AIMessage(content=f'{{"sufficient": {sufficient}}}', usage_metadata=USAGE),
+    ]
+
+
+@pytest.fixture
+def budgeted_client(mock_graph, monkeypatch):
+    monkeypatch.setattr(get_settings(), "budget_session_tokens", 100)
+    application = create_app()
+    with patch("app.services.session_manager.build_graph", return_value=mock_graph):
+        application.state.session_manager = SessionManager(rate_limiter=application.state.rate_limiter)
+        yield TestClient(application)
+
+
+class TestUsageReducer:
+    async def test_summed_per_turn_and_reset_by_the_next(self):
+        replies = iter([*_research_turn("true"), AIMessage(content='{"intent": "general_chat"}', usage_metadata=USAGE),
+                        AIMessage(content="Hi!", usage_metadata=USAGE)])
+        with patch("app.agent.graph.get_llm", return_value=_Model(messages=replies)):
+            graph = build_graph(checkpointer=MemorySaver())
+
+        first = await graph.ainvoke(turn_input("s1", "2+2?"), **turn_run_options("s1", "sync"))
+        second = await graph.ainvoke(turn_input("s1", "hi"), **turn_run_options("s1", "sync"))
+        assert first["usage"] == {"prompt_tokens": 2400, "completion_tokens": 400, "total_tokens": 2800, "llm_calls": 4}
+        assert second["usage"] == {"prompt_tokens": 1200, "completion_tokens": 200, "total_tokens": 1400, "llm_calls": 2}
+
+
+class TestBudgets:
+    async def test_graph_stops_before_next_llm_call(self):
+        ledger = UsageLedger(LocalKVBackend(), PriceTable(), session_tokens=2500)
+        replies = iter([*_research_turn(), *_research_turn()])
+        with patch("app.agent.graph.get_llm", return_value=_Model(messages=replies)):
+            graph = build_graph(checkpointer=MemorySaver())
+
+        # the gate asks for another tool round, but the budget is spent by then: the turn ends with its answer
+        result = await graph.ainvoke(turn_input("s1", "2+2?"), **turn_run_options("s1", "sync", budget=await ledger.budget("s1", None, "gpt-4o-mini")))
+        assert result["usage"]["llm_calls"] == 4 and result["loop_count"] == 1
+        await ledger.record("s1", None, "gpt-4o-mini", result["usage"])
+        with pytest.raises(BudgetExceededError):
+            await ledger.budget("s1", None, "gpt-4o-mini")
+
+        # 500 tokens left: the router's call uses them up and the turn stops before the tool executor's
+        await ledger.record("s2", None, "gpt-4o-mini", {"prompt_tokens": 2000, "total_tokens": 2000})
+        with pytest.raises(BudgetExceededError) as exc:
+            await graph.ainvoke(turn_input("s2", "2+2?"), **turn_run_options("s2", "sync", budget=await ledger.budget("s2", None, "gpt-4o-mini")))
+        assert exc.value.details == {"scope": "session", "usage": {"prompt_tokens": 600, "completion_tokens": 100, "total_tokens": 700, "llm_calls": 1}}
+
+    def test_session_budget_and_spend_endpoints(self, budgeted_client):
+        sid = budgeted_client.post("/sessions", json={}).json()["session_id"]
+        for _ in range(2):
+            assert budgeted_client.post(f"/sessions/{sid}/messages", json={"content": "Hi"}).status_code == 200
+
+        resp = budgeted_client.post(f"/sessions/{sid}/messages", json={"content": "Hi"})
+        assert resp.status_code == 402 and resp.json()["error"]["code"] == "BUDGET_EXCEEDED"
+        assert budgeted_client.post(f"/sessions/{sid}/messages/stream", json={"content": "Hi"}).status_code == 402
+
+        spend = budgeted_client.get(f"/sessions/{sid}/usage").json()
+        assert spend["total_tokens"] == 160 and spend["turns"] == 2
+        assert spend["cost_usd"] == pytest.approx(2 * (50 * 0.15 + 30 * 0.60) / 1e6, abs=2e-6)  # gpt-4o-mini list price
+        assert spend["budget"] == {"tokens": 100, "cost_usd": None} and spend["remaining"]["tokens"] == 0
+
+        # another session still has its own budget; the client ledger counts both
+        other = budgeted_client.post("/sessions", json={}).json()["session_id"]
+        assert budgeted_client.post(f"/sessions/{other}/messages/stream", json={"content": "Hi"}).status_code == 200
+        client = budgeted_client.get("/usage").json()
+        assert client["scope"] == "client" and client["total_tokens"] == 240 and client["turns"] == 3
+        assert client["budget"] == {"tokens": None, "cost_usd": None} and client["resets_in_seconds"] > 0
@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+from typing import Annotated, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.graph import END, START, StateGraph, add_messages
+
+from app.agent.nodes.synthesizer import SYNTH_PROMPT
+from app.services.checkpoint_serde import CompactSerializer
+
+MESSAGES = [
+    HumanMessage(content="What is 2+2?", id="msg-human-0001"),
+    AIMessage(content="", id="run-0001", tool_calls=[{"name": "calculator", "args": {"expression": "2+2"}, "id": "call_0001"}],
+              response_metadata={"model_name": "gpt-4o-mini", "finish_reason": "tool_calls"}),
+    ToolMessage(content="2+2 = 4", tool_call_id="call_0001", id="tool-0001"),
+    AIMessage(content="It is 4.", id="run-0002", response_metadata={"model_name": "gpt-4o-mini", "finish_reason": "stop"}),
+]
+
+
+class _State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def _echo_graph(checkpointer):
+    graph = StateGraph(_State)
+    graph.add_node("echo", lambda state: {"messages": [AIMessage(content=f"echo: {state['messages'][-1].content}")]})
+    graph.add_edge(START, "echo")
+    graph.add_edge("echo", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+class TestCompactSerializer:
+    def test_round_trip(self):
+        serde = CompactSerializer(compression=None)
+        state = {"messages": MESSAGES, "pair": (1, "two"), "usage": {"total_tokens": 12}, 3: "int key",
+                 "at": datetime.now(timezone.utc), "raw": b"\x00\x01", "none": None}
+        type_, payload = serde.dumps_typed(state)
+        assert type_ == "compact"
+        assert serde.loads_typed((type_, payload)) == state
+
+    def test_smaller_than_default(self):
+        state = {"messages": MESSAGES * 3, "system": SYNTH_PROMPT}
+        assert len(CompactSerializer(compression=None).dumps_typed(state)[1]) < len(JsonPlusSerializer().dumps_typed(state)[1]) / 2
+
+    def test_compresses_over_threshold(self):
+        serde = CompactSerializer(compression="zstd", compression_threshold=64)
+        big = {"messages": [HumanMessage(content="word " * 200)]}
+        assert serde.dumps_typed({"small": 1})[0] == "compact"
+        type_, payload = serde.dumps_typed(big)
+        assert type_ == "compact+zstd"
+        assert CompactSerializer(compression=None).loads_typed((type_, payload)) == big
+
+    def test_loads_default_payloads(self):
+        state = {"messages": MESSAGES}
+        assert CompactSerializer().loads_typed(JsonPlusSerializer().dumps_typed(state)) == state
+
+    async def test_graph_with_compact_checkpoints(self):
+        graph = _echo_graph(MemorySaver(serde=CompactSerializer(compression_threshold=16)))
+        config = {"configurable": {"thread_id": "sess_1"}}
+        await graph.ainvoke({"messages": [HumanMessage(content="one")]}, config)
+        result = await graph.ainvoke({"messages": [HumanMessage(content="two")]}, config)
+        assert [m.content for m in result["messages"]] == ["one", "echo: one", "two", "echo: two"]
@@ -0,0 +1,68 @@
+import re
+
+import pytest
+
+from app.agent.direct_answer import direct_answer
+from app.api.schemas.requests import AgentConfig
+from app.services.session_manager import SessionManager
+
+
+class TestParser:
+    @pytest.mark.parametrize("message, answer, expression", [
+        ("What is 17.5% of 2380?", "17.5% of 2380 = 416.5", "17.5 / 100.0 * 2380.0"),
+        ("(12 + 4) * 3", "(12 + 4) * 3 = 48", "(12.0 + 4.0) * 3.0"),
+        ("calculate 10 divided by 4", "10 divided by 4 = 2.5", "10.0 / 4.0"),
+        ("What's 1,250 x 2^3", "1,250 x 2^3 = 10,000", "1250.0 * 2.0 ** 3.0"),
+        ("what is 200 * 15%", "200 * 15% = 30", "200.0 * (15.0 / 100.0)"),
+        ("what is 2^60", "2^60 = 1,152,921,504,606,846,976", "2.0 ** 60.0"),
+    ])
+    def test_arithmetic(self, message, answer, expression):
+        direct = direct_answer(message)
+        assert direct.content == answer and direct.tool_call["input"] == {"expression": expression}
+        assert direct.tool_call["tool_name"] == "calculator"
+
+    def test_datetime(self):
+        assert re.fullmatch(r"Today is \w+day, \d{4}-\d\d-\d\d \(UTC\)\.", direct_answer("What day is it today?").content)
+        assert re.fullmatch(r"It is \d\d:\d\d:\d\d UTC\.", direct_answer("what time is it").content)
+        assert direct_answer("What is the date today?").tool_call["tool_name"] == "datetime"
+
+    @pytest.mark.parametrize("message", [
+        "what is 42", "what is 1/0", "what is 2^1000", "what time is it in Tokyo?", "what is 5 apples + 3",
+        "Hi! Can you help me?", "what is 17.5% of revenue", "1.2.3 + 4", "", "what is 50%", "what is (50%)",
+    ])
+    def test_falls_back_when_not_certain(self, message):
+        assert direct_answer(message) is None
+
+
+class TestDirectLane:
+    async def test_turns_skip_the_llm_but_are_checkpointed(self):
+        sm = SessionManager()
+        sm.fake_llm_enabled = True
+        session = await sm.create_session(AgentConfig(model="fake-instant", direct_answers=True))
+        sid = session.session_id
+
+        result = await sm.send_message(sid, "What is 17.5% of 2380?")
+        assert result["content"] == "17.5% of 2380 = 416.5" and result["usage"]["llm_calls"] == 0
+        assert result["tool_calls"][0]["output_summary"] == "17.5 / 100.0 * 2380.0 = 416.5"
+
+        graph = sm._get_or_build_graph(session.agent_config)
+        state = await graph.aget_state({"configurable": {"thread_id": sid}})
+        assert state.next == () and state.values["messages"][-1].content == "17.5% of 2380 = 416.5"
+        assert state.values["usage"]["llm_calls"] == 0
+
+        # anything the parser is unsure of goes through the graph, which picks up after the direct turn
+        chat = await sm.send_message(sid, "Thanks! What else can you do?")
+        assert chat["usage"]["llm_calls"] == 2
+
+        events = [p async for p in sm.stream_message(sid, "what day is it")]
+        assert [e["event"] for e in events] == ["start", "tool_end", "token", "done"] and events[-1]["usage"]["llm_calls"] == 0
+        history = (await sm.get_history(sid))["messages"]
+        assert [m["role"] for m in history] == ["user", "assistant"] * 3 and history[-1]["content"].startswith("Today is")
+        await sm.close()
+
+    def test_off_unless_opted_in(self, client):
+        resp = client.post("/sessions", json={"agent_config": {"direct_answers": True}})
+        assert resp.json()["agent_config"]["direct_answers"] is True
+        sid = client.post("/sessions", json={}).json()["session_id"]
+        # the mock graph answers: the lane was not taken
+        assert client.post(f"/sessions/{sid}/messages", json={"content": "What is 2 + 2?"}).json()["content"] == "Mock response to: What is 2 + 2?"
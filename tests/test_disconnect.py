@@ -0,0 +1,152 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.services.session_manager import SessionManager
+
+HANG = None
+
+
+class _Model(GenericFakeChatModel):
+    # replies arrive whole; a HANG entry blocks that call until it is cancelled
+    disable_streaming: bool = True
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        reply = next(self.messages)
+        if reply is HANG:
+            await asyncio.Event().wait()
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+
+async def _until(predicate, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if await predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+async def _post(app, path: str, body: dict, disconnect: asyncio.Event, sent: list | None = None) -> list[dict]:
+    """Drive one request through the ASGI app, with the client going away once `disconnect` is set."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"test"), (b"content-type", b"application/json")], "client": ("test", 1), "server": ("test", 80),
+    }
+    sent = [] if sent is None else sent
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent
+
+
+class TestAbandonedTurns:
+    async def test_cancelled_stream_closes_checkpoint_and_history(self):
+        replies = iter([AIMessage(content='{"intent": "general_chat"}'), HANG,
+                        AIMessage(content='{"intent": "general_chat"}'), AIMessage(content="Hello!"), AIMessage(content='{"sufficient": true}')])
+        with patch("app.agent.graph.get_llm", return_value=_Model(messages=replies)):
+            sm = SessionManager()
+            session = await sm.create_session()
+            sid = session.session_id
+
+            async def consume():
+                async for payload in sm.stream_message(sid, "Hi"):
+                    if payload.get("stage") == "synthesizing":
+                        reached.set()
+
+            reached = asyncio.Event()
+            consumer = asyncio.create_task(consume())
+            await reached.wait()
+            consumer.cancel()
+
+            async def closed():
+                return len((await sm.get_history(sid))["messages"]) == 2
+
+            await _until(closed)
+            history = (await sm.get_history(sid))["messages"]
+            assert history[-1]["status"] == "abandoned"
+            state = await next(iter(sm._graphs.values())).aget_state({"configurable": {"thread_id": sid}})
+            assert state.next == ()
+            assert [m.content for m in state.values["messages"]] == ["Hi"]
+
+            result = await sm.send_message(sid, "Hi again")
+            assert result["content"] == "Hello!"
+
+    async def test_stream_disconnect_cancels_graph_run(self, app, mock_graph):
+        cancelled = asyncio.Event()
+
+        async def hanging_astream(input_dict, config=None, stream_mode=None, **kwargs):
+            yield "tasks", {"id": "t1", "name": "synthesizer", "input": input_dict, "triggers": ()}
+            yield "messages", (AIMessageChunk(content="Partial"), {"langgraph_node": "synthesizer"})
+            try:
+                await asyncio.Event().wait()
+            finally:
+                cancelled.set()
+
+        mock_graph.astream = hanging_astream
+        sm = app.state.session_manager
+        sm.streams.resume_grace_seconds = 0
+        sid = (await sm.create_session()).session_id
+        disconnect = asyncio.Event()
+
+        sent = []
+        request = asyncio.create_task(_post(app, f"/sessions/{sid}/messages/stream", {"content": "Hi"}, disconnect, sent))
+
+        async def token_sent():
+            return any(b"Partial" in m.get("body", b"") for m in sent)
+
+        await _until(token_sent)
+        disconnect.set()
+        await asyncio.wait_for(cancelled.wait(), 2)
+        await request
+
+        async def closed():
+            return len((await sm.get_history(sid))["messages"]) == 2
+
+        await _until(closed)
+        assistant = (await sm.get_history(sid))["messages"][-1]
+        assert assistant["status"] == "abandoned"
+        assert assistant["content"] == "Partial"
+
+    async def test_request_disconnect_cancels_graph_run(self, app, mock_graph):
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def hanging_ainvoke(input_dict, config=None, **kwargs):
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            finally:
+                cancelled.set()
+
+        mock_graph.ainvoke = hanging_ainvoke
+        sm = app.state.session_manager
+        sid = (await sm.create_session()).session_id
+        disconnect = asyncio.Event()
+        request = asyncio.create_task(_post(app, f"/sessions/{sid}/messages", {"content": "Hi"}, disconnect))
+        await started.wait()
+        disconnect.set()
+        sent = await asyncio.wait_for(request, 2)
+
+        assert cancelled.is_set()
+        assert sent[0]["status"] == 499
+        history = (await sm.get_history(sid))["messages"]
+        assert [m["role"] for m in history] == ["user", "assistant"]
+        assert history[-1]["status"] == "abandoned"
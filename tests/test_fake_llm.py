@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from app.agent.fake_llm import LATENCY_PROFILES, FakeChatModel, parse_latency
+from app.agent.graph import build_graph
+from app.agent.providers import detect_provider, get_llm
+from app.agent.tools import web_search_tool
+from app.agent.tools.web_search import LocalSearch
+from app.config import get_settings
+from app.services.session_manager import turn_input, turn_run_options
+
+
+@pytest.fixture
+def local_search(monkeypatch):
+    monkeypatch.setattr(web_search_tool, "_search", LocalSearch())
+
+
+async def _turn(graph, sid: str, content: str) -> dict:
+    return await graph.ainvoke(turn_input(sid, content), **turn_run_options(sid, "sync"))
+
+
+class TestFakeProvider:
+    def test_selected_by_prefix_with_latency_profiles(self):
+        assert detect_provider("fake-instant") == "fake"
+        assert isinstance(get_llm("fake-realistic"), FakeChatModel)
+        assert parse_latency("fake-realistic") == LATENCY_PROFILES["realistic"]
+        assert parse_latency("fake-fast,ttft=10,words=5")[:3] == (10.0, 0.2, 400)
+        assert parse_latency("fake-ttft=20,tps=100") == LATENCY_PROFILES["instant"]._replace(ttft_ms=20, tokens_per_second=100)
+        with pytest.raises(ValueError):
+            parse_latency("fake-warp")
+
+    async def test_plays_every_node_deterministically(self, local_search):
+        graph = build_graph(model="fake-instant")
+        chat = await _turn(graph, "s1", "Hi there!")
+        assert chat["intent"] == "general_chat" and chat["usage"]["llm_calls"] == 2
+
+        calc = await _turn(graph, "s2", "What is 12 * 7.5?")
+        assert calc["intent"] == "analysis" and calc["tool_calls"][0]["output_summary"] == "12 * 7.5 = 90.0"
+
+        # "thorough" questions make the gate ask for a second tool round
+        loop = await _turn(graph, "s3", "Give me a thorough overview of neobanks")
+        assert [t["tool_name"] for t in loop["tool_calls"]] == ["web_search", "web_search"]
+        assert loop["loop_count"] == 2 and loop["usage"]["llm_calls"] == 7
+
+        again = await _turn(build_graph(model="fake-instant"), "s4", "Give me a thorough overview of neobanks")
+        assert again["messages"][-1].content == loop["messages"][-1].content and again["usage"] == loop["usage"]
+
+    async def test_streams_tokens_at_the_profile_rate(self):
+        graph = build_graph(model="fake-ttft=30,tps=2000,words=40")
+        start = time.perf_counter()
+        chunks = [chunk async for chunk, meta in graph.astream(turn_input("s1", "Hi"), stream_mode="messages", **turn_run_options("s1", "sync"))
+                  if meta["langgraph_node"] == "synthesizer"]
+        # two calls, each at least the 30 ms to first token; the answer arrives word by word with usage last
+        assert time.perf_counter() - start >= 0.06
+        assert len(chunks) == 41 and chunks[-1].usage_metadata["output_tokens"] > 0
+
+    def test_sessions_only_when_enabled(self, client, monkeypatch):
+        body = {"agent_config": {"model": "fake-instant"}}
+        assert client.post("/sessions", json=body).status_code == 400
+        monkeypatch.setattr(client.app.state.session_manager, "fake_llm_enabled", True)
+        assert client.post("/sessions", json=body).status_code == 201
+
+
+class TestLocalSearch:
+    async def test_selected_by_setting(self, monkeypatch):
+        monkeypatch.setattr(get_settings(), "web_search_backend", "local")
+        monkeypatch.setattr(get_settings(), "web_search_local_latency_ms", 20.0)
+        monkeypatch.setattr(web_search_tool, "_search", None)
+        start = time.perf_counter()
+        result = await web_search_tool.ainvoke({"query": "neobank funding"})
+        assert time.perf_counter() - start >= 0.005 and "Result 3 for 'neobank funding'" in str(result)
@@ -17,6 +17,9 @@ class TestHealthCheck:
         assert checks["llm_provider"] == "ok"
         assert checks["checkpoint_store"] == "ok"
 
+    def test_reports_answer_cache_hit_rate(self, client):
+        assert client.get("/health").json()["answer_cache"]["hit_rate"] == 0.0
+
     def test_correct_version(self, client):
         assert client.get("/health").json()["version"] == get_settings().app_version
 
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core.exceptions import OverloadedError
+from app.services.jobs import JobQueue
+from app.services.kv_backend import LocalKVBackend
+
+
+@pytest.fixture
+async def aclient(app):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    await app.state.session_manager.jobs.close()
+
+
+async def _wait(client: httpx.AsyncClient, job_id: str) -> dict:
+    for _ in range(200):
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+class TestAsyncMessages:
+    async def test_job_is_polled_to_its_result(self, aclient):
+        sid = (await aclient.post("/sessions", json={})).json()["session_id"]
+        resp = await aclient.post(f"/sessions/{sid}/messages", params={"async": "true"}, json={"content": "Hello"})
+        assert resp.status_code == 202 and resp.headers["location"] == f"/jobs/{resp.json()['job_id']}"
+        assert resp.json()["status"] == "queued"
+
+        job = await _wait(aclient, resp.json()["job_id"])
+        assert job["status"] == "succeeded" and job["result"]["content"] == "Mock response to: Hello"
+        assert job["result"]["usage"]["total_tokens"] == 80 and job["started_at"] <= job["finished_at"]
+        history = (await aclient.get(f"/sessions/{sid}/history")).json()
+        assert [m["role"] for m in history["messages"]] == ["user", "assistant"]
+        assert (await aclient.get("/health")).json()["jobs"]["queued"] == 0
+
+    async def test_refusals_and_failures(self, aclient):
+        assert (await aclient.post("/sessions/sess_missing/messages", params={"async": "true"}, json={"content": "x"})).status_code == 404
+        assert (await aclient.get("/jobs/job_missing")).json()["error"]["code"] == "JOB_NOT_FOUND"
+        sid = (await aclient.post("/sessions", json={})).json()["session_id"]
+        body = {"content": "x", "callback_url": "http://example.com/hook"}
+        assert (await aclient.post(f"/sessions/{sid}/messages", params={"async": "true"}, json=body)).status_code == 400
+
+        # the session is gone by the time the job runs: the job fails, with the error it would have answered
+        job_id = (await aclient.post(f"/sessions/{sid}/messages", params={"async": "true"}, json={"content": "x"})).json()["job_id"]
+        await aclient.delete(f"/sessions/{sid}")
+        job = await _wait(aclient, job_id)
+        assert job["status"] == "failed" and job["error"]["code"] == "SESSION_TERMINATED"
+
+    async def test_jobs_are_visible_only_to_their_client(self, app, aclient):
+        sid = (await aclient.post("/sessions", json={})).json()["session_id"]
+        resp = await aclient.post(f"/sessions/{sid}/messages", params={"async": "true"}, json={"content": "Hello"})
+        assert "client_id" not in resp.json()
+        job = await _wait(aclient, resp.json()["job_id"])
+        assert job["status"] == "succeeded" and "client_id" not in job
+
+        transport = httpx.ASGITransport(app=app, client=("10.0.0.9", 123))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as other:
+            resp = await other.get(f"/jobs/{job['job_id']}")
+        assert resp.status_code == 404 and resp.json()["error"]["code"] == "JOB_NOT_FOUND"
+
+
+class TestJobQueue:
+    async def test_bounded_pool_callbacks_and_shutdown(self):
+        jobs = JobQueue(LocalKVBackend(), workers=2, max_queue=2)
+        delivered = []
+        jobs._http = httpx.AsyncClient(transport=httpx.MockTransport(lambda req: delivered.append(json.loads(req.content)) or httpx.Response(204)))
+        release, running = asyncio.Event(), []
+
+        async def turn(n: int) -> dict:
+            running.append(n)
+            await release.wait()
+            return {"n": n}
+
+        submitted = []
+        for n in range(4):
+            submitted.append(await jobs.submit("s", lambda n=n: turn(n), callback_url="http://localhost:9000/hook" if n == 0 else None))
+            await asyncio.sleep(0)
+        assert running == [0, 1] and jobs.stats()["queued"] == 2
+        with pytest.raises(OverloadedError) as exc:
+            await jobs.submit("s", lambda: turn(9))
+        assert exc.value.details["reason"] == "job_queue_full"
+
+        release.set()
+        await asyncio.sleep(0.01)
+        first = await jobs.get(submitted[0]["job_id"])
+        assert first["status"] == "succeeded" and first["result"] == {"n": 0} and first["callback"] == "delivered"
+        assert delivered[0]["job_id"] == first["job_id"] and delivered[0]["result"] == {"n": 0}
+        assert "client_id" not in delivered[0]
+
+        release.clear()
+        late = await jobs.submit("s", lambda: turn(5))
+        await asyncio.sleep(0.01)
+        await jobs.close()
+        assert (await jobs.get(late["job_id"]))["error"]["code"] == "WORKER_SHUTDOWN"
@@ -0,0 +1,75 @@
+import io
+import json
+import logging
+import queue
+
+import pytest
+import structlog
+
+from app.core.logging import (
+    LogSampler,
+    NonBlockingQueueHandler,
+    parse_sample_rates,
+    setup_logging,
+    shutdown_logging,
+)
+
+
+@pytest.fixture
+def output():
+    stream = io.StringIO()
+    setup_logging(stream=stream)
+    yield stream
+    shutdown_logging()
+
+
+def _record(name: str, level: int) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, "msg", None, None)
+
+
+def _lines(stream: io.StringIO) -> list[dict]:
+    shutdown_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class TestQueuedLogging:
+    def test_records_render_with_level_context_and_extras(self, output):
+        structlog.contextvars.bind_contextvars(request_id="req_123")
+        try:
+            logging.getLogger("app.test").info("turn %s done", "t1", extra={"latency_ms": 12})
+        finally:
+            structlog.contextvars.clear_contextvars()
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("app.test").exception("failed")
+
+        done, failed = _lines(output)
+        assert done["event"] == "turn t1 done" and done["level"] == "info" and done["logger"] == "app.test"
+        assert done["request_id"] == "req_123" and done["latency_ms"] == 12 and done["timestamp"]
+        assert "request_id" not in failed and "ValueError: boom" in failed["exception"]
+        assert "structlog_context" not in done
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+        logger = logging.getLogger("app.test.drops")
+        logger.addHandler(handler)
+        logger.propagate = False
+        try:
+            for _ in range(5):
+                logger.warning("x")
+        finally:
+            logger.removeHandler(handler)
+            logger.propagate = True
+        assert handler.queue.qsize() == 2 and handler.dropped == 3
+
+
+class TestSampling:
+    def test_longest_prefix_wins_and_warnings_are_kept(self):
+        sampler = LogSampler(parse_sample_rates("app=1, app.agent=0, app.agent.tools=0.5"))
+        assert sampler.filter(_record("app.api", logging.INFO))
+        assert not sampler.filter(_record("app.agent.graph", logging.INFO))
+        assert sampler.filter(_record("app.agent.graph", logging.WARNING))
+        assert sampler.filter(_record("app.agentx", logging.INFO))  # "app" applies, not "app.agent"
+        kept = sum(sampler.filter(_record("app.agent.tools.search", logging.INFO)) for _ in range(2000))
+        assert 800 < kept < 1200
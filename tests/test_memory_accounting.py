@@ -0,0 +1,68 @@
+import pytest
+
+from app.api.schemas.requests import AgentConfig
+from app.config import get_settings
+from app.services.memory_accounting import AllocationSnapshots, MemoryAccounts
+from app.services.session_manager import SessionManager
+
+ADMIN = {"X-Admin-Key": "admin-secret"}
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(get_settings(), "admin_api_key", "admin-secret")
+
+
+class TestMemoryAccounts:
+    async def test_sessions_grow_with_history_and_checkpoints(self):
+        sm = SessionManager()
+        sm.fake_llm_enabled = True
+        session = await sm.create_session(AgentConfig(model="fake-instant"))
+        await sm.send_message(session.session_id, "Hi there!")
+        await sm.checkpointer.flush()
+        first = dict(sm.memory.get(session.session_id))
+        assert first["history"] > 0 and first["checkpoints"] > 0
+
+        await sm.send_message(session.session_id, "Hi again!")
+        await sm.checkpointer.flush()
+        second = sm.memory.get(session.session_id)
+        assert second["history"] > first["history"] and second["checkpoints"] > first["checkpoints"]
+        assert sm.memory.totals == second and sm.memory.graphs["fake-instant"]["count"] == 1
+        await sm.close()
+
+    def test_least_recently_grown_sessions_are_dropped(self):
+        accounts = MemoryAccounts(max_sessions=2)
+        for sid, size in (("a", 100), ("b", 10), ("a", 1), ("c", 50)):
+            accounts.add(sid, "checkpoints", size)
+        assert len(accounts) == 2 and accounts.get("b") is None
+        assert [sid for sid, _ in accounts.top(5)] == ["a", "c"] and accounts.totals["checkpoints"] == 151
+
+
+class TestMemoryEndpoint:
+    def test_top_sessions_by_footprint(self, client, admin):
+        sids = [client.post("/sessions", json={}).json()["session_id"] for _ in range(3)]
+        for i, sid in enumerate(sids):
+            for _ in range(i + 1):
+                client.post(f"/sessions/{sid}/messages", json={"content": "Hello there"})
+        client.delete(f"/sessions/{sids[2]}")
+
+        assert client.get("/admin/memory").status_code == 401
+        report = client.get("/admin/memory", params={"limit": 2}, headers=ADMIN).json()
+        assert report["location"] == "worker" and report["sessions_tracked"] == 3
+        assert [s["session_id"] for s in report["top_sessions"]] == [sids[2], sids[1]]
+        assert report["top_sessions"][0]["status"] == "terminated"
+        assert report["totals"]["total"] >= report["totals"]["history"] > 0 and report["peak_rss_bytes"] > 0
+
+    def test_snapshot_diff(self, client, admin):
+        assert client.post("/admin/memory/snapshot", headers=ADMIN).json()["error"]["code"] == "SNAPSHOT_NOT_FOUND"
+        client.app.state.memory_snapshots = snapshots = AllocationSnapshots(frames=5)
+        try:
+            assert client.get("/admin/memory/snapshot/diff", headers=ADMIN).status_code == 404
+            assert client.post("/admin/memory/snapshot", headers=ADMIN).json()["frames"] == 5
+            held = [bytearray(64 * 1024) for _ in range(4)]  # noqa: F841
+            diff = client.get("/admin/memory/snapshot/diff", params={"limit": 5}, headers=ADMIN).json()
+            assert diff["size_diff"] >= 256 * 1024
+            assert any("test_memory_accounting.py" in tb for s in diff["top"] for tb in s["traceback"])
+            assert client.delete("/admin/memory/snapshot", headers=ADMIN).status_code == 204
+        finally:
+            snapshots.stop()
@@ -0,0 +1,87 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from opentelemetry.sdk.metrics import MeterProvider
+
+from app.services.telemetry import OTLPPusher, SnapshotReader, render_prometheus
+
+
+@pytest.fixture
+def meter():
+    # a private provider, so these tests don't depend on what the app recorded globally
+    reader = SnapshotReader()
+    provider = MeterProvider(metric_readers=[reader])
+    yield provider.get_meter("test"), reader
+    provider.shutdown()
+
+
+@pytest.fixture
+def collector():
+    """Local OTLP/HTTP collector stand-in: keeps every request path and body it receives."""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append((self.path, self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", received
+    server.shutdown()
+
+
+class TestPrometheusRendering:
+    def test_counters_gauges_and_histograms(self, meter):
+        m, reader = meter
+        m.create_counter("llm_token_usage", description="tokens").add(5, {"model": 'gpt "4o"'})
+        m.create_up_down_counter("active_sessions").add(2)
+        latency = m.create_histogram("request_latency_ms")
+        for value in (3, 30, 3000):
+            latency.record(value, {"endpoint": "/health"})
+
+        text = render_prometheus(reader.snapshot())
+        assert "# TYPE llm_token_usage_total counter" in text
+        assert 'llm_token_usage_total{model="gpt \\"4o\\""} 5' in text
+        assert "# TYPE active_sessions gauge" in text and "active_sessions 2" in text
+        assert 'request_latency_ms_bucket{endpoint="/health",le="5.0"} 1' in text
+        assert 'request_latency_ms_bucket{endpoint="/health",le="50.0"} 2' in text
+        assert 'request_latency_ms_bucket{endpoint="/health",le="+Inf"} 3' in text
+        assert 'request_latency_ms_sum{endpoint="/health"} 3033' in text
+        assert 'request_latency_ms_count{endpoint="/health"} 3' in text
+
+    def test_endpoint_labels_route_templates(self, client, session_id):
+        client.post(f"/sessions/{session_id}/messages", json={"content": "Hi"})
+        resp = client.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'endpoint="/sessions/{session_id}/messages"' in resp.text
+        assert session_id not in resp.text
+        assert "# TYPE active_sessions gauge" in resp.text
+
+
+class TestOTLPPush:
+    async def test_pushes_to_collector(self, meter, collector):
+        pytest.importorskip("opentelemetry.exporter.otlp.proto.http")
+        from opentelemetry.proto.collector.metrics.v1.metrics_service_pb2 import (
+            ExportMetricsServiceRequest,
+        )
+
+        m, reader = meter
+        endpoint, received = collector
+        m.create_counter("turns_shed_total").add(1, {"reason": "deadline"})
+        pusher = OTLPPusher(reader, endpoint, interval=3600)
+        pusher.start()
+        await pusher.close()  # final push on shutdown
+
+        (path, body), = received
+        assert path == "/v1/metrics"
+        request = ExportMetricsServiceRequest.FromString(body)
+        names = [metric.name for rm in request.resource_metrics for sm in rm.scope_metrics for metric in sm.metrics]
+        assert names == ["turns_shed_total"]
@@ -0,0 +1,49 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import create_app
+from app.services.session_manager import SessionManager
+from app.services.telemetry import setup_metrics
+
+
+@pytest.fixture
+def secured_client(mock_graph, monkeypatch):
+    monkeypatch.setattr(get_settings(), "api_key_enabled", True)
+    monkeypatch.setattr(get_settings(), "api_keys", "key-one, key-two")
+    application = create_app()
+    with patch("app.services.session_manager.build_graph", return_value=mock_graph):
+        application.state.session_manager = SessionManager()
+        yield TestClient(application)
+
+
+class TestRequestContext:
+    def test_request_id_propagated(self, client):
+        assert client.get("/health", headers={"X-Request-ID": "req_from_client"}).headers["X-Request-ID"] == "req_from_client"
+
+    def test_missing_key_rejected(self, secured_client):
+        resp = secured_client.post("/sessions", json={})
+        assert resp.status_code == 401
+        assert resp.json()["error"]["code"] == "UNAUTHORIZED"
+        assert resp.json()["error"]["request_id"] == resp.headers["X-Request-ID"]
+
+    def test_wrong_key_rejected(self, secured_client):
+        assert secured_client.post("/sessions", json={}, headers={"X-API-Key": "key-three"}).status_code == 401
+
+    def test_any_configured_key_accepted(self, secured_client):
+        for key in ("key-one", "key-two"):
+            assert secured_client.post("/sessions", json={}, headers={"X-API-Key": key}).status_code == 201
+
+    def test_public_paths_open(self, secured_client):
+        assert secured_client.get("/health").status_code == 200
+
+    def test_metrics_need_a_key(self, secured_client, monkeypatch):
+        secured_client.app.state.metrics_reader = setup_metrics(get_settings())
+        assert secured_client.get("/metrics").status_code == 401
+        assert secured_client.get("/metrics", headers={"X-API-Key": "key-one"}).status_code == 200
+        monkeypatch.setattr(get_settings(), "metrics_public", True)
+        application = create_app()
+        application.state.metrics_reader = secured_client.app.state.metrics_reader
+        assert TestClient(application).get("/metrics").status_code == 200
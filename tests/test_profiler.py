@@ -0,0 +1,87 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.core.exceptions import ProfilerBusyError
+from app.main import create_app
+from app.services.profiler import IDLE, Profile, ProfilerService
+from app.services.session_manager import SessionManager
+
+ADMIN = {"X-Admin-Key": "admin-secret"}
+
+
+@pytest.fixture
+def profiled_client(mock_graph, monkeypatch):
+    monkeypatch.setattr(get_settings(), "profiling_enabled", True)
+    monkeypatch.setattr(get_settings(), "admin_api_key", "admin-secret")
+    monkeypatch.setattr(get_settings(), "profiling_interval_ms", 1.0)
+    application = create_app()
+    with patch("app.services.session_manager.build_graph", return_value=mock_graph):
+        application.state.session_manager = SessionManager(rate_limiter=application.state.rate_limiter)
+        yield TestClient(application)
+
+
+def _busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestProfilerService:
+    async def test_samples_code_and_idle_loop(self):
+        profiler = ProfilerService(interval_ms=1)
+        sampler = profiler.start()
+        _busy(0.05)
+        await asyncio.sleep(0.05)
+        profile = profiler.finish(sampler)
+
+        assert profile.samples > 10
+        assert any(stack[-1].startswith("_busy (test_profiler.py") for stack in profile.stacks)
+        assert profile.stacks[(IDLE,)] > 0
+        line = profile.folded().splitlines()[0]
+        frames, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and frames
+        assert profiler.get(profile.id) is profile
+
+    def test_bounded(self):
+        profile = Profile(0.01, max_stacks=2)
+        for i in range(5):
+            profile.add((f"f{i}",))
+        assert len(profile.stacks) == 3 and profile.samples == 5  # two stacks plus the overflow bucket
+
+        profiler = ProfilerService(max_active=1)
+        sampler = profiler.start()
+        with pytest.raises(ProfilerBusyError):
+            profiler.start()
+        profiler.finish(sampler)
+
+
+class TestProfilingEndpoints:
+    def test_disabled_by_default(self, client):
+        assert client.post("/admin/profile", params={"seconds": 0.01}).status_code == 404
+        assert "x-profile-id" not in client.get("/health", headers={"X-Profile": "1"}).headers
+
+    def test_profile_a_request_by_header(self, profiled_client):
+        assert profiled_client.get("/health", headers={"X-Profile": "1"}).status_code == 401
+
+        resp = profiled_client.post("/sessions", json={}, headers={"X-Profile": "1", **ADMIN})
+        assert resp.status_code == 201
+        profile_id = resp.headers["x-profile-id"]
+
+        profile = profiled_client.get(f"/admin/profiles/{profile_id}", headers=ADMIN)
+        assert profile.status_code == 200 and profile.headers["x-profile-id"] == profile_id
+        listed = profiled_client.get("/admin/profiles", headers=ADMIN).json()["profiles"]
+        assert [p["profile_id"] for p in listed] == [profile_id]
+        assert profiled_client.get("/admin/profiles/prof_missing", headers=ADMIN).json()["error"]["code"] == "PROFILE_NOT_FOUND"
+
+    def test_window_profile(self, profiled_client):
+        assert profiled_client.post("/admin/profile", params={"seconds": 0.05}).status_code == 401
+        assert profiled_client.post("/admin/profile", params={"seconds": 3600}, headers=ADMIN).status_code == 400
+        resp = profiled_client.post("/admin/profile", params={"seconds": 0.05}, headers=ADMIN)
+        assert resp.status_code == 200
+        assert int(resp.headers["x-profile-samples"]) > 0
+        assert IDLE in resp.text
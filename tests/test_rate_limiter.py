@@ -0,0 +1,120 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import create_app
+from app.services.kv_backend import LocalKVBackend
+from app.services.rate_limiter import LocalRateLimiter, SharedRateLimiter, client_id
+from app.services.session_manager import SessionManager
+
+
+@pytest.fixture
+def limited_client(mock_graph, monkeypatch):
+    monkeypatch.setattr(get_settings(), "rate_limit_requests", 3)
+    monkeypatch.setattr(get_settings(), "rate_limit_tokens", 100)
+    application = create_app()
+    with patch("app.services.session_manager.build_graph", return_value=mock_graph):
+        application.state.session_manager = SessionManager(rate_limiter=application.state.rate_limiter)
+        yield TestClient(application)
+
+
+class TestLocalRateLimiter:
+    async def test_request_bucket(self):
+        limiter = LocalRateLimiter(requests_per_minute=2)
+        assert [(await limiter.check("a")).allowed for _ in range(3)] == [True, True, False]
+        denied = await limiter.check("a")
+        assert denied.remaining == 0 and denied.retry_after >= 1
+        assert (await limiter.check("b")).allowed
+
+    async def test_token_usage_holds_next_request(self):
+        limiter = LocalRateLimiter(requests_per_minute=100, tokens_per_minute=100)
+        assert (await limiter.check("a")).allowed
+        await limiter.charge("a", 150)
+        denied = await limiter.check("a")
+        assert not denied.allowed
+        assert 29 <= denied.retry_after <= 31
+
+    async def test_zero_request_limit_is_unlimited(self):
+        limiter = LocalRateLimiter(0, 0)
+        assert all([(await limiter.check("c")).allowed for _ in range(100)])
+        limiter = LocalRateLimiter(0, 100)
+        await limiter.charge("c", 150)
+        assert not (await limiter.check("c")).allowed
+
+    async def test_client_buckets_are_capped(self):
+        limiter = LocalRateLimiter(requests_per_minute=1)
+        limiter.max_clients = 3
+        for client in ("a", "b", "c", "a", "d"):
+            await limiter.check(client)
+        assert list(limiter._buckets) == ["c", "a", "d"]
+        assert not (await limiter.check("a")).allowed
+
+    def test_client_id_hashes_keys(self):
+        assert client_id("secret", "1.2.3.4").startswith("key:")
+        assert "secret" not in client_id("secret", "1.2.3.4")
+        assert client_id(None, "1.2.3.4") == "ip:1.2.3.4"
+
+
+class TestSharedRateLimiter:
+    async def test_limits_shared_through_backend(self):
+        backend = LocalKVBackend()
+        worker_a, worker_b = SharedRateLimiter(backend, 2, 100), SharedRateLimiter(backend, 2, 100)
+        assert (await worker_a.check("a")).allowed
+        assert (await worker_b.check("a")).allowed
+        assert not (await worker_a.check("a")).allowed
+
+    async def test_tokens_charged_across_workers(self):
+        backend = LocalKVBackend()
+        worker_a, worker_b = SharedRateLimiter(backend, 10, 100), SharedRateLimiter(backend, 10, 100)
+        await worker_a.charge("a", 120)
+        decision = await worker_b.check("a")
+        assert not decision.allowed and decision.retry_after > 0
+
+    async def test_zero_request_limit_is_unlimited(self):
+        limiter = SharedRateLimiter(LocalKVBackend(), 0, 0)
+        assert all([(await limiter.check("c")).allowed for _ in range(100)])
+
+
+class TestRateLimitMiddleware:
+    def test_headers_and_429(self, limited_client):
+        for remaining in (2, 1, 0):
+            resp = limited_client.post("/sessions", json={})
+            assert resp.status_code == 201
+            assert resp.headers["RateLimit-Limit"] == "3"
+            assert resp.headers["RateLimit-Remaining"] == str(remaining)
+        resp = limited_client.post("/sessions", json={})
+        assert resp.status_code == 429
+        assert resp.json()["error"]["code"] == "RATE_LIMITED"
+        assert int(resp.headers["Retry-After"]) == resp.json()["error"]["details"]["retry_after"] >= 1
+        assert limited_client.get("/health").status_code == 200
+
+    def test_zero_request_limit_passes_without_headers(self, mock_graph, monkeypatch):
+        monkeypatch.setattr(get_settings(), "rate_limit_requests", 0)
+        application = create_app()
+        with patch("app.services.session_manager.build_graph", return_value=mock_graph):
+            application.state.session_manager = SessionManager(rate_limiter=application.state.rate_limiter)
+        client = TestClient(application)
+        for _ in range(5):
+            resp = client.post("/sessions", json={})
+            assert resp.status_code == 201
+            assert "RateLimit-Limit" not in resp.headers
+
+    def test_turn_usage_charged(self, limited_client):
+        # the mock graph reports 80 tokens per turn against a 100 tokens/min budget
+        sid = limited_client.post("/sessions", json={}).json()["session_id"]
+        assert limited_client.post(f"/sessions/{sid}/messages", json={"content": "Hi"}).status_code == 200
+        assert limited_client.post(f"/sessions/{sid}/messages/stream", json={"content": "Hi"}).status_code == 200
+        resp = limited_client.get(f"/sessions/{sid}/history")
+        assert resp.status_code == 429
+        assert resp.json()["error"]["details"]["retry_after"] > 1
+
+    def test_websocket_turns_limited(self, limited_client):
+        sid = limited_client.post("/sessions", json={}).json()["session_id"]
+        with limited_client.websocket_connect("/ws") as ws:
+            for i in range(3):
+                ws.send_json({"type": "send", "id": f"m{i}", "session_id": sid, "content": "Hi"})
+                while (event := ws.receive_json())["event"] not in ("done", "error"):
+                    pass
+        assert event["code"] == "RATE_LIMITED" and event["id"] == "m2"
@@ -0,0 +1,62 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.api import responses
+from app.api.middleware.compression import accepted_encodings
+from app.api.responses import render_json, tool_calls_content, usage_content
+from app.api.schemas.responses import HistoryMessageResponse, MessageResponse
+
+RECORD = {
+    "message_id": "msg_1", "role": "assistant", "content": "Résumé ✓", "created_at": datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+    "tool_calls": [{"tool_name": "web_search", "input": {"query": "q"}, "output_summary": "3 results"}],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 7, "total_tokens": 12, "llm_calls": 1},
+}
+
+
+class TestDirectRendering:
+    @pytest.mark.parametrize("fast", [True, False])
+    def test_matches_response_models(self, fast, monkeypatch):
+        if not fast:
+            monkeypatch.setattr(responses, "orjson", None)
+        direct = {**RECORD, "tool_calls": tool_calls_content(RECORD["tool_calls"]), "usage": usage_content(RECORD["usage"]), "status": None}
+        model = HistoryMessageResponse(**RECORD)
+        assert json.loads(render_json(direct)) == json.loads(model.model_dump_json())
+
+        message = {**direct, "session_id": "sess_1", "latency_ms": 12.5}
+        del message["status"]
+        assert json.loads(render_json(message)) == json.loads(MessageResponse(**message).model_dump_json())
+
+    def test_history_route_shape(self, client, session_id):
+        client.post(f"/sessions/{session_id}/messages", json={"content": "Hi"})
+        data = client.get(f"/sessions/{session_id}/history").json()
+        user, assistant = data["messages"]
+        assert user["tool_calls"] is None and user["usage"] is None and user["status"] is None
+        assert assistant["usage"] == {"prompt_tokens": 50, "completion_tokens": 30, "total_tokens": 80, "llm_calls": 1}
+        assert assistant["created_at"].endswith("Z")
+
+
+class TestCompression:
+    @pytest.fixture
+    def long_session(self, client, session_id):
+        for i in range(10):
+            client.post(f"/sessions/{session_id}/messages", json={"content": f"Question number {i} about fintech trends"})
+        return session_id
+
+    @pytest.mark.parametrize("accept, encoding", [("gzip, deflate, br", "br"), ("gzip", "gzip"), ("br;q=0, gzip", "gzip"), ("identity", None)])
+    def test_negotiated(self, client, long_session, accept, encoding):
+        resp = client.get(f"/sessions/{long_session}/history", headers={"Accept-Encoding": accept})
+        assert resp.headers.get("content-encoding") == encoding
+        assert resp.json()["message_count"] == 20
+        if encoding:
+            assert resp.headers["vary"] == "Accept-Encoding"
+            assert int(resp.headers["content-length"]) < len(resp.content)
+
+    def test_small_and_streaming_bodies_untouched(self, client, session_id):
+        assert "content-encoding" not in client.get("/health", headers={"Accept-Encoding": "br"}).headers
+        resp = client.post(f"/sessions/{session_id}/messages/stream", json={"content": "Hi " * 400}, headers={"Accept-Encoding": "br"})
+        assert "content-encoding" not in resp.headers
+
+    def test_accepted_encodings(self):
+        assert accepted_encodings("gzip;q=1.0, br; q=0, deflate;q=0.5") == {"gzip", "deflate"}
@@ -0,0 +1,196 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Annotated, TypedDict
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph, add_messages
+
+from app.api.schemas.requests import AgentConfig
+from app.config import get_settings
+from app.core.exceptions import SessionConflictError, SessionNotFoundError, SessionTerminatedError
+from app.services.checkpoint_store import DeferredCheckpointSaver
+from app.services.kv_backend import LocalKVBackend
+from app.services.session_manager import SessionManager, turn_run_options
+from app.services.session_store import SessionData, SharedSessionStore
+
+
+def _worker_pair(**kwargs):
+    backend = LocalKVBackend()
+    return SharedSessionStore(backend, **kwargs), SharedSessionStore(backend, **kwargs)
+
+
+class TestSharedSessionStore:
+    async def test_session_visible_from_other_worker(self):
+        a, b = _worker_pair()
+        await a.create(SessionData("sess_1", AgentConfig(model="claude-3-5-haiku-20241022", temperature=0.3)))
+        session = await b.get("sess_1")
+        assert session.agent_config.model == "claude-3-5-haiku-20241022"
+        assert session.status == "active"
+        assert await b.get("sess_missing") is None
+
+    async def test_history_round_trip(self):
+        a, b = _worker_pair()
+        await a.create(SessionData("sess_1", AgentConfig()))
+        now = datetime.now(timezone.utc)
+        await a.append_history("sess_1", {"message_id": "msg_1", "role": "user", "content": "hi", "created_at": now})
+        await b.append_history("sess_1", {"message_id": "msg_2", "role": "assistant", "content": "hello", "created_at": now,
+                                          "tool_calls": [], "usage": {"total_tokens": 3}})
+        history = await a.get_history("sess_1")
+        assert [m["message_id"] for m in history] == ["msg_1", "msg_2"]
+        assert history[0]["created_at"] == now
+
+    async def test_stale_update_conflicts(self):
+        a, b = _worker_pair(cache_ttl_seconds=0)
+        await a.create(SessionData("sess_1", AgentConfig()))
+        seen_by_a = await a.get("sess_1")
+        await b.update(await b.get("sess_1"), status="terminated")
+        with pytest.raises(SessionConflictError):
+            await a.update(seen_by_a, status="terminated")
+        assert (await a.get("sess_1")).version == 1
+
+    async def test_read_cache_serves_within_ttl(self):
+        a, b = _worker_pair(cache_ttl_seconds=60)
+        await a.create(SessionData("sess_1", AgentConfig()))
+        await b.update(await b.get("sess_1"), status="terminated")
+        assert (await a.get("sess_1")).status == "active"
+        a.cache_ttl_seconds = 0
+        a._cache.clear()
+        assert (await a.get("sess_1")).status == "terminated"
+
+    async def test_message_counter_refreshes_cache_and_skips_expired_sessions(self):
+        a, _ = _worker_pair(cache_ttl_seconds=60)
+        await a.create(SessionData("sess_1", AgentConfig()))
+        assert await a.increment_messages("sess_1") == 1
+        assert (await a.get("sess_1")).message_counter == 1
+
+        await a.backend.delete(a._session_key("sess_1"))  # the session's TTL ran out
+        with pytest.raises(SessionNotFoundError):
+            await a.increment_messages("sess_1")
+        assert await a.backend.hgetall(a._session_key("sess_1")) == {}
+        assert await a.get("sess_1") is None
+
+
+class _State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def _echo_graph(checkpointer):
+    graph = StateGraph(_State)
+    graph.add_node("echo", lambda state: {"messages": [AIMessage(content=f"echo: {state['messages'][-1].content}")]})
+    graph.add_edge(START, "echo")
+    graph.add_edge("echo", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+class TestKVCheckpointSaver:
+    async def test_checkpoints_shared_between_workers(self):
+        a, b = _worker_pair()
+        config = {"configurable": {"thread_id": "sess_1"}}
+        await _echo_graph(a.create_checkpointer()).ainvoke({"messages": [HumanMessage(content="one")]}, config)
+        result = await _echo_graph(b.create_checkpointer()).ainvoke({"messages": [HumanMessage(content="two")]}, config)
+        assert [m.content for m in result["messages"]] == ["one", "echo: one", "two", "echo: two"]
+
+    async def test_list_and_delete_thread(self):
+        a, _ = _worker_pair()
+        saver = a.create_checkpointer()
+        config = {"configurable": {"thread_id": "sess_1"}}
+        await _echo_graph(saver).ainvoke({"messages": [HumanMessage(content="one")]}, config)
+        checkpoints = [c async for c in saver.alist(config)]
+        assert len(checkpoints) >= 2
+        assert checkpoints[0].checkpoint["id"] > checkpoints[-1].checkpoint["id"]
+
+        await saver.adelete_thread("sess_1")
+        assert await saver.aget_tuple(config) is None
+        assert not a.backend._data
+
+
+class TestCheckpointDurability:
+    async def _puts_per_turn(self, mode):
+        a, _ = _worker_pair()
+        saver = a.create_checkpointer()
+        puts = []
+        original = saver.aput
+        saver.aput = lambda *args: puts.append(1) or original(*args)
+        await _echo_graph(saver).ainvoke({"messages": [HumanMessage(content="one")]}, **turn_run_options("sess_1", mode))
+        return len(puts)
+
+    async def test_exit_writes_once_per_turn(self):
+        assert await self._puts_per_turn("sync") > 1
+        assert await self._puts_per_turn("exit") == 1
+
+    async def test_deferred_write_lands_before_next_read(self):
+        a, _ = _worker_pair()
+        inner = a.create_checkpointer()
+        release = asyncio.Event()
+        original = inner.aput
+
+        async def slow_aput(*args):
+            await release.wait()
+            return await original(*args)
+
+        inner.aput = slow_aput
+        saver = DeferredCheckpointSaver(inner)
+        graph = _echo_graph(saver)
+        # the turn returns while its checkpoint write is still blocked
+        await graph.ainvoke({"messages": [HumanMessage(content="one")]}, **turn_run_options("sess_1", "deferred"))
+        assert await inner.aget_tuple({"configurable": {"thread_id": "sess_1"}}) is None
+
+        release.set()
+        result = await graph.ainvoke({"messages": [HumanMessage(content="two")]}, **turn_run_options("sess_1", "deferred"))
+        assert [m.content for m in result["messages"]] == ["one", "echo: one", "two", "echo: two"]
+        await saver.flush()
+        assert (await inner.aget_tuple({"configurable": {"thread_id": "sess_1"}})).checkpoint["channel_values"]["messages"][-1].content == "echo: two"
+
+
+class TestSharedSessionManager:
+    async def test_any_worker_serves_any_session(self, mock_graph):
+        a, b = _worker_pair(cache_ttl_seconds=0)
+        with patch("app.services.session_manager.build_graph", return_value=mock_graph):
+            worker_a, worker_b = SessionManager(store=a), SessionManager(store=b)
+            session = await worker_a.create_session()
+            await worker_b.send_message(session.session_id, "Hello")
+            history = await worker_a.get_history(session.session_id)
+            assert history["message_count"] == 2
+            await worker_b.delete_session(session.session_id)
+            with pytest.raises(SessionTerminatedError):
+                await worker_a.get_session(session.session_id)
+
+    async def test_deferred_durability_runs_as_exit(self, monkeypatch):
+        # a deferred write is flushed only by the worker that queued it, so other workers could miss it
+        monkeypatch.setattr(get_settings(), "checkpoint_durability", "deferred")
+        a, _ = _worker_pair()
+        shared, local = SessionManager(store=a), SessionManager()
+        assert shared.durability == "exit" and local.durability == "deferred"
+        session = await shared.create_session()
+        for durability in (None, "deferred"):
+            options = shared.run_options(session, durability)
+            assert options["durability"] == "exit"
+            assert options["config"]["configurable"]["checkpoint_durability"] == "exit"
+        assert shared.run_options(session, "sync")["durability"] == "sync"
+
+    async def test_turns_of_a_session_never_overlap_across_workers(self, mock_graph):
+        a, b = _worker_pair(cache_ttl_seconds=0)
+        running, overlaps = [], []
+        original = mock_graph.ainvoke
+
+        async def slow_ainvoke(*args, **kwargs):
+            running.append(1)
+            overlaps.append(len(running) > 1)
+            await asyncio.sleep(0.02)
+            running.pop()
+            return await original(*args, **kwargs)
+
+        mock_graph.ainvoke = slow_ainvoke
+        with patch("app.services.session_manager.build_graph", return_value=mock_graph):
+            worker_a, worker_b = SessionManager(store=a), SessionManager(store=b)
+            worker_a.leases.poll_seconds = worker_b.leases.poll_seconds = 0.005
+            session = await worker_a.create_session()
+            await asyncio.gather(*(
+                (worker_a if n % 2 else worker_b).send_message(session.session_id, f"m{n}") for n in range(4)
+            ))
+            assert overlaps == [False] * 4
+            history = (await worker_a.get_history(session.session_id))["messages"]
+            assert [m["role"] for m in history] == ["user", "assistant"] * 4
+            assert all(h["content"].endswith(u["content"]) for u, h in zip(history[::2], history[1::2]))
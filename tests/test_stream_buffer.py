@@ -0,0 +1,84 @@
+import asyncio
+
+from app.services.stream_buffer import StreamBuffers, _frame_size
+
+
+async def _feed(queue: asyncio.Queue):
+    while (item := await queue.get()) is not None:
+        yield item
+
+
+def _queue(*items) -> asyncio.Queue:
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    return queue
+
+
+def _token(text):
+    return {"event": "token", "content": text}
+
+
+async def _drain(stream, after=0):
+    return [p async for p in stream.subscribe(after=after)]
+
+
+class TestTurnStream:
+    async def test_reconnect_replays_then_follows_live_run(self):
+        buffers = StreamBuffers()
+        queue = asyncio.Queue()
+        stream = buffers.open("sess_1", "msg_1", _feed(queue))
+        for t in ("a", "b"):
+            queue.put_nowait(_token(t))
+
+        first = stream.subscribe()
+        assert (await anext(first))["event_id"] == "msg_1:1"
+        await first.aclose()
+
+        resumed = asyncio.create_task(_drain(stream, after=1))
+        await asyncio.sleep(0)
+        queue.put_nowait(_token("c"))
+        queue.put_nowait(None)
+        assert [(p["content"], p["event_id"]) for p in await resumed] == [("b", "msg_1:2"), ("c", "msg_1:3")]
+
+    async def test_position_outside_ring_gets_snapshot(self):
+        buffers = StreamBuffers(max_frames=2)
+        stream = buffers.open("sess_1", "msg_1", _feed(_queue(*map(_token, "abcde"), None)))
+        await stream.task
+        assert await _drain(stream) == [{"event": "snapshot", "message_id": "msg_1", "content": "abcde", "tool_calls": [], "event_id": "msg_1:5"}]
+        assert [p["content"] for p in await _drain(stream, after=3)] == ["d", "e"]
+
+    async def test_size_tracks_retained_frames(self):
+        buffers = StreamBuffers(max_frames=2)
+        stream = buffers.open("sess_1", "msg_1", _feed(_queue(*(_token("x" * 100) for _ in range(10)), None)))
+        await stream.task
+        assert stream.size == sum(_frame_size(p) for _, p in stream.frames) == buffers.total_bytes
+
+    async def test_run_cancelled_when_nobody_reconnects(self):
+        buffers = StreamBuffers(resume_grace_seconds=0.01)
+        stream = buffers.open("sess_1", "msg_1", _feed(_queue(_token("a"))))
+        sub = stream.subscribe()
+        await anext(sub)
+        await sub.aclose()
+        await asyncio.sleep(0.05)
+        assert stream.task.cancelled()
+
+
+class TestStreamBuffers:
+    async def test_finished_streams_expire(self):
+        buffers = StreamBuffers(ttl_seconds=0)
+        stream = buffers.open("sess_1", "msg_1", _feed(_queue(_token("a"), None)))
+        await stream.task
+        assert buffers.get("msg_1") is None
+        assert buffers.total_bytes == 0
+
+    async def test_memory_cap_evicts_finished_streams_first(self):
+        buffers = StreamBuffers(max_bytes=1000)
+        done = buffers.open("sess_1", "msg_1", _feed(_queue(_token("x" * 500), None)))
+        await done.task
+        live = buffers.open("sess_2", "msg_2", _feed(_queue(_token("y" * 500))))
+        await asyncio.sleep(0)
+        assert buffers.get("msg_1") is None
+        assert buffers.get("msg_2") is live
+        assert buffers.total_bytes <= 1000
+        live.task.cancel()
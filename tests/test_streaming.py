@@ -0,0 +1,168 @@
+import asyncio
+import json
+import zlib
+from unittest.mock import patch
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.agent.graph import build_graph
+from app.services.session_manager import turn_run_options
+from app.services.streaming import (
+    TurnOutput,
+    coalesce_tokens,
+    encode_sse,
+    message_text,
+    stream_turn,
+)
+
+
+async def _source(*items, delay=0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+def _tokens(*texts):
+    return [{"event": "token", "content": t} for t in texts]
+
+
+def _events(body: bytes) -> list[dict[str, str]]:
+    # each SSE event as its field -> value lines
+    return [dict(line.split(": ", 1) for line in block.split("\n")) for block in body.decode().split("\n\n") if block]
+
+
+def _frames(body: bytes) -> list[dict]:
+    return [json.loads(e["data"]) for e in _events(body)]
+
+
+class TestCoalesceTokens:
+    async def test_passthrough_when_disabled(self):
+        out = [p async for p in coalesce_tokens(_source(*_tokens("a", "b")))]
+        assert out == _tokens("a", "b")
+
+    async def test_merges_until_other_event(self):
+        items = [{"event": "start"}, *_tokens("Hel", "lo"), {"event": "tool_start", "tool_name": "x"}, *_tokens("!")]
+        out = [p async for p in coalesce_tokens(_source(*items), window_ms=1000)]
+        assert out == [{"event": "start"}, *_tokens("Hello"), {"event": "tool_start", "tool_name": "x"}, *_tokens("!")]
+
+    async def test_flushes_on_size(self):
+        out = [p async for p in coalesce_tokens(_source(*_tokens("ab", "cd", "e")), window_ms=1000, max_bytes=4)]
+        assert out == _tokens("abcd", "e")
+
+    async def test_flushes_when_window_elapses_during_stall(self):
+        out = [p async for p in coalesce_tokens(_source(*_tokens("a", "b"), delay=0.05), window_ms=10)]
+        assert out == _tokens("a", "b")
+
+    async def test_source_error_is_raised_after_buffered_tokens(self):
+        async def failing():
+            yield _tokens("a")[0]
+            raise RuntimeError("boom")
+
+        out = []
+        try:
+            async for p in coalesce_tokens(failing(), window_ms=1000):
+                out.append(p)
+        except RuntimeError:
+            pass
+        assert out == _tokens("a")
+
+
+class TestEncodeSSE:
+    async def test_gzip_stream_decodes_incrementally(self):
+        chunks = [c async for c in encode_sse(_source(*_tokens("a", "b")), compress=True)]
+        d = zlib.decompressobj(31)
+        # every frame is decodable as soon as it arrives
+        assert _frames(d.decompress(chunks[0])) == _tokens("a")
+        assert _frames(d.decompress(b"".join(chunks[1:]))) == _tokens("b")
+
+
+class _Model(GenericFakeChatModel):
+    # the fake's token stream drops tool calls and usage, so replies arrive whole
+    disable_streaming: bool = True
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class TestStreamTurn:
+    def test_message_text_reads_method_or_property(self):
+        class _MethodText:
+            def text(self):
+                return "hi"
+
+        assert message_text(_MethodText()) == "hi"
+        assert message_text(AIMessage(content="hi")) == "hi"
+
+    async def test_only_synthesizer_tokens_with_progress_tools_and_usage(self):
+        usage = {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+        replies = iter([
+            AIMessage(content='{"intent": "analysis"}', usage_metadata=usage),
+            AIMessage(content="", tool_calls=[{"name": "calculator", "args": {"expression": "2+2"}, "id": "call_1"}], usage_metadata=usage),
+            AIMessage(content="It is 4.", usage_metadata=usage),
+            AIMessage(content='{"sufficient": true}', usage_metadata=usage),
+        ])
+        with patch("app.agent.graph.get_llm", return_value=_Model(messages=replies)):
+            graph = build_graph(checkpointer=MemorySaver())
+        graph_input = {"messages": [HumanMessage(content="2+2?")], "intent": "general_chat", "tool_calls": [], "needs_more_info": False,
+                       "loop_count": 0, "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "llm_calls": 0}}
+        output = TurnOutput()
+        payloads = [p async for p in stream_turn(graph, graph_input, output, **turn_run_options("s1", "sync"))]
+
+        assert [p["stage"] for p in payloads if p["event"] == "progress"] == ["routing", "tools", "synthesizing", "checking"]
+        assert [p["tool_name"] for p in payloads if p["event"] in ("tool_start", "tool_end")] == ["calculator", "calculator"]
+        assert "".join(p["content"] for p in payloads if p["event"] == "token") == "It is 4."
+        assert output.content == "It is 4."
+        assert output.tool_calls[0]["input"] == {"expression": "2+2"}
+        assert output.usage["llm_calls"] == 4
+        assert output.usage["total_tokens"] == 60
+
+
+class TestStreamEndpoint:
+    def test_tokens_coalesced_by_default(self, client, session_id):
+        resp = client.post(f"/sessions/{session_id}/messages/stream", json={"content": "Hi"})
+        frames = _frames(resp.content)
+        assert [f["event"] for f in frames] == ["start", "progress", "token", "done"]
+        assert frames[2]["content"] == "Mock streamed response"
+        assert frames[-1]["usage"]["total_tokens"] == 80
+
+    def test_per_chunk_frames_on_request(self, client, session_id):
+        resp = client.post(f"/sessions/{session_id}/messages/stream",
+                           json={"content": "Hi", "stream": {"coalesce_ms": 0, "coalesce_bytes": 0}})
+        assert [f["content"] for f in _frames(resp.content) if f["event"] == "token"] == ["Mock ", "streamed ", "response"]
+        history = client.get(f"/sessions/{session_id}/history").json()
+        assert history["messages"][-1]["content"] == "Mock streamed response"
+
+    def test_gzip_when_accepted(self, client, session_id):
+        resp = client.post(f"/sessions/{session_id}/messages/stream", json={"content": "Hi", "stream": {"compress": True}},
+                           headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+        assert _frames(resp.content)[-1]["event"] == "done"
+
+    def test_frames_carry_sequence_ids(self, client, session_id):
+        events = _events(client.post(f"/sessions/{session_id}/messages/stream", json={"content": "Hi"}).content)
+        ids = [e["id"].rsplit(":", 1) for e in events]
+        assert {msg_id for msg_id, _ in ids} == {json.loads(events[0]["data"])["message_id"]}
+        assert [int(n) for _, n in ids] == sorted(int(n) for _, n in ids)
+
+    def test_resume_replays_missed_frames(self, client, session_id):
+        first = _events(client.post(f"/sessions/{session_id}/messages/stream", json={"content": "Hi"}).content)
+        resumed = client.post(f"/sessions/{session_id}/messages/stream", json={"content": "Hi"}, headers={"Last-Event-ID": first[0]["id"]})
+        assert [f["event"] for f in _frames(resumed.content)] == ["progress", "token", "done"]
+        # nothing re-ran: still one user and one assistant message
+        assert client.get(f"/sessions/{session_id}/history").json()["message_count"] == 2
+
+    def test_resume_from_history_once_buffer_is_gone(self, client, app, session_id):
+        first = _events(client.post(f"/sessions/{session_id}/messages/stream", json={"content": "Hi"}).content)
+        app.state.session_manager.streams._streams.clear()
+        frames = _frames(client.post(f"/sessions/{session_id}/messages/stream", json={"content": "Hi"},
+                                     headers={"Last-Event-ID": first[1]["id"]}).content)
+        assert [f["event"] for f in frames] == ["snapshot", "done"]
+        assert frames[0]["content"] == "Mock streamed response"
+
+    def test_resume_unknown_stream(self, client, session_id):
+        resp = client.post(f"/sessions/{session_id}/messages/stream", json={"content": "Hi"}, headers={"Last-Event-ID": "msg_gone:3"})
+        assert resp.status_code == 404
+        assert resp.json()["error"]["code"] == "STREAM_NOT_FOUND"
@@ -0,0 +1,132 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.core.exceptions import SessionBusyError, TurnQueueFullError, TurnSupersededError
+from app.services.kv_backend import LocalKVBackend
+from app.services.turn_queue import SessionLeases, TurnQueue
+
+
+class TestTurnQueue:
+    async def test_serializes_in_arrival_order(self):
+        queue = TurnQueue(max_depth=4)
+        order = []
+
+        async def turn(n):
+            async with queue.turn("sess_a"):
+                order.append(f"start{n}")
+                await asyncio.sleep(0.01)
+                order.append(f"end{n}")
+
+        await asyncio.gather(turn(1), turn(2), turn(3))
+        assert order == ["start1", "end1", "start2", "end2", "start3", "end3"]
+
+    async def test_sessions_run_independently(self):
+        queue = TurnQueue(max_depth=4)
+        running = []
+
+        async def turn(sid):
+            async with queue.turn(sid):
+                running.append(sid)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(turn("sess_a"), turn("sess_b"))
+        assert sorted(running) == ["sess_a", "sess_b"]
+        assert not queue._lanes
+
+    async def test_full_queue_rejected(self):
+        queue = TurnQueue(max_depth=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with queue.turn("sess_a"):
+                await release.wait()
+
+        tasks = [asyncio.create_task(hold()), asyncio.create_task(hold())]
+        await asyncio.sleep(0)
+        assert queue.depth("sess_a") == 1
+        with pytest.raises(TurnQueueFullError):
+            async with queue.turn("sess_a"):
+                pass
+        release.set()
+        await asyncio.gather(*tasks)
+
+    async def test_supersede_cancels_in_flight_turn(self):
+        queue = TurnQueue(max_depth=4, supersede=True)
+        started = asyncio.Event()
+
+        async def slow():
+            async with queue.turn("sess_a"):
+                started.set()
+                await asyncio.sleep(10)
+
+        first = asyncio.create_task(slow())
+        await started.wait()
+        async with queue.turn("sess_a"):
+            pass
+        with pytest.raises(TurnSupersededError):
+            await first
+
+
+class TestTurnQueueEndpoint:
+    def test_full_queue_returns_429(self, client, session_id):
+        sm = client.app.state.session_manager
+        with patch.object(sm.turns, "check_capacity", side_effect=TurnQueueFullError()):
+            resp = client.post(f"/sessions/{session_id}/messages", json={"content": "Hello"})
+        assert resp.status_code == 429
+        assert resp.json()["error"]["code"] == "TURN_QUEUE_FULL"
+
+
+class TestSessionLeases:
+    def _pair(self, **kwargs):
+        backend = LocalKVBackend()
+        kwargs = {"poll_seconds": 0.005, **kwargs}
+        return SessionLeases(backend, **kwargs), SessionLeases(backend, **kwargs)
+
+    async def test_workers_take_turns(self):
+        a, b = self._pair()
+        order = []
+
+        async def turn(leases, n):
+            async with leases.hold("sess_a"):
+                order.append(("start", n))
+                await asyncio.sleep(0.01)
+                order.append(("end", n))
+
+        await asyncio.gather(turn(a, 1), turn(b, 2), turn(a, 3))
+        # arrival order is not kept across workers, but each turn ends before the next starts
+        assert [event for event, _ in order] == ["start", "end"] * 3
+        assert [n for _, n in order[::2]] == [n for _, n in order[1::2]]
+        async with b.hold("sess_a"):
+            pass  # released by every turn
+
+    async def test_busy_after_wait(self):
+        a, b = self._pair(wait_seconds=0.05)
+        async with a.hold("sess_a"):
+            with pytest.raises(SessionBusyError) as exc:
+                async with b.hold("sess_a"):
+                    pass
+            assert exc.value.details["retry_after"] >= 1
+            async with b.hold("sess_b"):
+                pass
+
+    async def test_lease_renewed_while_turn_runs(self):
+        a, b = self._pair(ttl_seconds=0.06, wait_seconds=0.05)
+        async with a.hold("sess_a"):
+            await asyncio.sleep(0.1)
+            with pytest.raises(SessionBusyError):
+                async with b.hold("sess_a"):
+                    pass
+
+    async def test_lapsed_lease_taken_over(self):
+        a, b = self._pair(ttl_seconds=0.03, wait_seconds=1)
+
+        async def stalled(*args):
+            await asyncio.Event().wait()
+
+        with patch.object(a, "_renew", stalled):
+            async with a.hold("sess_a"):
+                # a's worker stopped renewing (e.g. it hung); b takes over once the lease lapses
+                async with b.hold("sess_a"):
+                    pass
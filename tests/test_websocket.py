@@ -0,0 +1,76 @@
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.config import get_settings
+
+
+def _events(ws, msg_id, until=("done", "error", "cancelled")):
+    events = []
+    while True:
+        event = ws.receive_json()
+        if event.get("id") != msg_id:
+            continue
+        events.append(event)
+        if event["event"] in until:
+            return events
+
+
+class TestWebSocket:
+    def test_streams_turn_tagged_with_ids(self, client, session_id):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "send", "id": "m1", "session_id": session_id, "content": "Hello"})
+            events = _events(ws, "m1")
+        assert {e["session_id"] for e in events} == {session_id}
+        assert [e["event"] for e in events] == ["start", "progress", "token", "done"]
+        assert events[2]["content"] == "Mock streamed response"
+        assert client.get(f"/sessions/{session_id}/history").json()["message_count"] == 2
+
+    def test_multiplexes_sessions(self, client):
+        ids = [client.post("/sessions", json={}).json()["session_id"] for _ in range(3)]
+        with client.websocket_connect("/ws") as ws:
+            for i, sid in enumerate(ids):
+                ws.send_json({"type": "send", "id": f"m{i}", "session_id": sid, "content": "Hi"})
+            done = set()
+            while len(done) < 3:
+                event = ws.receive_json()
+                if event["event"] == "done":
+                    done.add((event["id"], event["session_id"]))
+        assert done == {(f"m{i}", sid) for i, sid in enumerate(ids)}
+
+    def test_errors_are_per_message(self, client, session_id):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "send", "id": "bad", "session_id": "sess_missing", "content": "Hi"})
+            assert _events(ws, "bad")[-1]["code"] == "SESSION_NOT_FOUND"
+            ws.send_json({"type": "send", "id": "empty", "session_id": session_id, "content": ""})
+            assert _events(ws, "empty")[-1]["code"] == "INVALID_REQUEST"
+            ws.send_json({"type": "ping"})
+            assert ws.receive_json() == {"event": "pong"}
+
+    def test_unexpected_error_is_reported_for_its_message(self, client, session_id, monkeypatch):
+        async def broken(session_id):
+            raise RuntimeError("store is down")
+
+        monkeypatch.setattr(client.app.state.session_manager, "get_session", broken)
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "send", "id": "m1", "session_id": session_id, "content": "Hi"})
+            assert _events(ws, "m1") == [{"id": "m1", "session_id": session_id, "event": "error", "code": "INTERNAL_ERROR",
+                                          "message": "An unexpected error occurred."}]
+            ws.send_json({"type": "ping"})
+            assert ws.receive_json() == {"event": "pong"}
+
+    def test_rejects_missing_api_key(self, client, monkeypatch):
+        monkeypatch.setattr(get_settings(), "api_key_enabled", True)
+        monkeypatch.setattr(get_settings(), "api_keys", "secret")
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/ws") as ws:
+                ws.receive_json()
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/ws?api_key=secret") as ws:
+                ws.receive_json()
+        with client.websocket_connect("/ws", headers={"X-API-Key": "secret"}) as ws:
+            ws.send_json({"type": "ping"})
+            assert ws.receive_json() == {"event": "pong"}
+        with client.websocket_connect("/ws", subprotocols=["cyndx", "cyndx.api-key.secret"]) as ws:
+            assert ws.accepted_subprotocol == "cyndx"
+            ws.send_json({"type": "ping"})
+            assert ws.receive_json() == {"event": "pong"}